@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# GraphQL requests are executed on the event loop, see core.views.AsyncGraphQLView.
+os.environ.setdefault("GRAPHQL_ASYNC", "1")
 
 application = get_asgi_application()
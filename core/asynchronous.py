@@ -0,0 +1,51 @@
+"""
+Helpers for code which runs both synchronously (WSGI) and on the event loop (ASGI).
+
+The GraphQL schema is executed synchronously by core.views.GraphQLView and asynchronously by
+core.views.AsyncGraphQLView. Resolvers can't tell which view called them, so they check
+in_event_loop() and either do their work directly or return an awaitable. The ORM must not be
+used from the event loop, so queries that have no async counterpart (e.g. transactions) are run
+in a worker thread with asgiref's sync_to_async().
+"""
+
+import asyncio
+from functools import wraps
+
+
+def in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def async_variant(async_func):
+    """
+    Decorates a synchronous function, which is replaced by async_func (accepting the same arguments)
+    when called from the event loop.
+
+    Usage:
+
+    async def resolve_async(root, info): ...
+
+    @async_variant(resolve_async)
+    def resolve(root, info): ...
+    """
+
+    # Static methods are only callable since Python 3.10.
+    if isinstance(async_func, staticmethod):
+        async_func = async_func.__func__
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if in_event_loop():
+                return async_func(*args, **kwargs)
+
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,56 @@
+"""
+Periodic work of a worker, off the request path.
+
+Counters which change on every request (e.g. the metrics, see core/metrics.py) are buffered in
+memory and flushed to the database in batches. A PeriodicTask runs the flush in a daemon thread
+of the worker every few seconds, so no request waits for it.
+
+The thread is started on first use in each process (not at import time), so servers which fork
+their workers after loading the application (e.g. gunicorn --preload) start one thread per worker.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name: str, function, interval):
+        """
+        Calls function every interval() seconds (a callable, so that settings can be overridden).
+        """
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.lock = threading.Lock()
+        # The process which runs the thread.
+        self.pid = None
+
+    def start(self):
+        """
+        Starts the thread of this process, unless it is running already.
+        """
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+
+            self.pid = os.getpid()
+
+        threading.Thread(target=self.run, name=self.name, daemon=True).start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval())
+
+            try:
+                self.function()
+            except Exception:
+                logger.exception("%s failed.", self.name)
+            finally:
+                # The thread's connections are closed between runs, like at the end of requests.
+                connections.close_all()
@@ -0,0 +1,181 @@
+"""
+Benchmarks of the hot paths, which are compared with committed baselines.
+
+Apps register benchmarks in their benchmarks module (e.g. user/benchmarks.py) with @benchmark.
+`manage.py benchmark` runs them and measures per call:
+
+- time_ms: The median wall time.
+- allocated_kib: The peak of the memory allocated during the call (measured with tracemalloc
+  in a separate call, as tracing slows the code down).
+- queries: The number of SQL queries.
+
+The results are compared with the baselines (settings.BENCHMARKS["BASELINES"]). A benchmark
+regresses if it runs more queries than its baseline, or if its allocations exceed the baseline
+by more than THRESHOLD (differences of less than 1 KiB are ignored as noise).
+
+Wall times depend on the machine and its load, so even the median of a few calls varies by more
+than THRESHOLD between runs. Time regressions are therefore only reported, unless CHECK_TIME is
+set (e.g. on a dedicated CI machine whose baselines were updated with --update-baselines there).
+
+All benchmarks run in a transaction which is rolled back, so they don't change the database.
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+DEFAULTS = {
+    # The JSON file containing the baselines, or None.
+    "BASELINES": None,
+    # The relative increase of the time or allocations which is considered a regression.
+    "THRESHOLD": 0.25,
+    # Whether time regressions fail the benchmarks (see above).
+    "CHECK_TIME": False,
+}
+
+
+def get_setting(name: str):
+    return getattr(settings, "BENCHMARKS", {}).get(name, DEFAULTS[name])
+
+
+class Benchmark:
+    """
+    A benchmark of func(argument).
+
+    - setup(options) is called once before the benchmark and returns the context (default: the
+      options of the command).
+    - prepare(context) is called before every call and returns the argument of func (default:
+      the context). It isn't measured, e.g. it creates the objects which are changed by func.
+    - requires contains the options the benchmark needs (e.g. "org_id"). Without them, the
+      benchmark is skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func,
+        setup=None,
+        prepare=None,
+        requires: tuple = (),
+        repeat: int = None,
+    ):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.prepare = prepare
+        self.requires = requires
+        self.repeat = repeat
+
+    def call(self, context):
+        argument = self.prepare(context) if self.prepare else context
+
+        return self.func, argument
+
+    def run(self, options: dict, repeat: int) -> dict:
+        context = self.setup(options) if self.setup else options
+        repeat = min(repeat, self.repeat or repeat)
+
+        # Warms up caches (e.g. of the schema and the documents), which are shared by requests.
+        func, argument = self.call(context)
+        func(argument)
+
+        times = []
+
+        for _ in range(repeat):
+            func, argument = self.call(context)
+
+            start = time.perf_counter()
+            func(argument)
+            times.append(time.perf_counter() - start)
+
+        func, argument = self.call(context)
+
+        with CaptureQueriesContext(connection) as queries:
+            func(argument)
+
+        func, argument = self.call(context)
+
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            func(argument)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "time_ms": round(statistics.median(times) * 1000, 3),
+            "allocated_kib": round((peak - before) / 1024, 1),
+            "queries": len(queries),
+        }
+
+
+registry = {}
+
+
+def benchmark(
+    name: str = None,
+    setup=None,
+    prepare=None,
+    requires: tuple = (),
+    repeat: int = None,
+):
+    """
+    Registers a benchmark of the decorated function (see Benchmark).
+    The name defaults to <app>.<function name>.
+    """
+
+    def decorator(func):
+        benchmark_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        registry[benchmark_name] = Benchmark(
+            benchmark_name, func, setup, prepare, requires, repeat
+        )
+
+        return func
+
+    return decorator
+
+
+def load_baselines() -> dict:
+    path = get_setting("BASELINES")
+
+    if not path or not Path(path).exists():
+        return {}
+
+    return json.loads(Path(path).read_text())
+
+
+def save_baselines(baselines: dict):
+    Path(get_setting("BASELINES")).write_text(
+        json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+    )
+
+
+def regressions(
+    result: dict, baseline: dict, threshold: float, metrics: tuple = ("allocated_kib",)
+) -> list[str]:
+    """
+    Returns the regressions of a result compared with its baseline, e.g. ["queries: 3 > 2"].
+    The query count is always compared, metrics contains the other metrics to compare.
+    """
+    found = []
+
+    if result["queries"] > baseline["queries"]:
+        found.append(f"queries: {result['queries']} > {baseline['queries']}")
+
+    for metric, noise in (("time_ms", 1), ("allocated_kib", 1)):
+        if metric not in metrics:
+            continue
+
+        limit = max(baseline[metric] * (1 + threshold), baseline[metric] + noise)
+
+        if result[metric] > limit:
+            found.append(f"{metric}: {result[metric]} > {baseline[metric]}")
+
+    return found
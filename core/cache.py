@@ -0,0 +1,256 @@
+"""
+Response cache for GraphQL queries.
+
+Responses are cached per normalized query document, variables and organization. Every
+cached response is tagged (e.g. with its organization and the forms it contains), and
+mutations invalidate those tags. A tag's version is the time of its last invalidation,
+so an entry is only served while all its tags still have the versions it was stored with.
+
+Only queries whose root fields all checked the membership of the user in the organization are
+cached, so a response never contains data which is specific to the user.
+
+The cache uses one of the caches from settings.CACHES (see settings.GRAPHQL_CACHE). It has to be
+shared by all workers (see core/caches.py), otherwise a mutation would only invalidate the
+responses of the worker which handled it. The hits and misses are counted in the metrics (see
+core/metrics.py).
+"""
+
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from graphql import FieldNode, GraphQLError, OperationType, get_operation_ast
+from graphql_relay import from_global_id
+
+from . import metrics
+from .caches import get_shared_cache
+
+DEFAULTS = {
+    # The alias of the cache in settings.CACHES. It has to be shared by all workers.
+    "CACHE_ALIAS": "graphql",
+    # Seconds after which a cached response expires, even if none of its tags were invalidated.
+    "TIMEOUT": 300,
+    # The variable which contains the organization's global ID.
+    "ORGANIZATION_VARIABLE": "orgId",
+}
+
+KEY_PREFIX = "graphql-cache"
+
+
+def get_setting(name: str):
+    return getattr(settings, "GRAPHQL_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return get_shared_cache(get_setting("CACHE_ALIAS"), 'GRAPHQL_CACHE["CACHE_ALIAS"]')
+
+
+def organization_tag(org_id) -> str:
+    return f"org:{org_id}"
+
+
+def form_tag(form_id) -> str:
+    return f"form:{form_id}"
+
+
+def tag_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def add_cache_tags(info, *tags: str):
+    """
+    Tags the response of the current request, so that it is invalidated together with the given tags.
+    """
+    cache_tags = getattr(info.context, "cache_tags", None)
+
+    if cache_tags is None:
+        cache_tags = set()
+        info.context.cache_tags = cache_tags
+
+    cache_tags.update(tags)
+
+
+def add_org_role(info, org_id, role: str):
+    """
+    Records that the user passed the membership check of role for the organization
+    (a global ID). Only responses whose root fields all recorded their checks are cached.
+    """
+    org_roles = getattr(info.context, "org_roles", None)
+
+    if org_roles is None:
+        org_roles = set()
+        info.context.org_roles = org_roles
+        info.context.org_root_fields = set()
+
+    org_roles.add((from_global_id(org_id)[1], role))
+
+    if info.path.prev is None:
+        info.context.org_root_fields.add(info.path.key)
+
+
+def is_org_role(request, org_id, role: str) -> bool:
+    """
+    Runs the schema's membership check of role for the organization (a global ID).
+    """
+    # The permissions are part of the api app, which depends on this module.
+    from api.permissions import is_org_member
+
+    check = is_org_member(role)(lambda root, info, **kwargs: None)
+
+    try:
+        check(None, SimpleNamespace(context=request), org_id=org_id)
+    except GraphQLError:
+        return False
+
+    return True
+
+
+def invalidate_tags(*tags: str):
+    """
+    Invalidates every cached response tagged with one of the given tags.
+    """
+    version = time.time_ns()
+    get_cache().set_many({tag_key(tag): version for tag in tags}, None)
+
+
+class ResponseCache:
+    """
+    Caches the responses of a single GraphQL request.
+
+    Only queries with an organization are cached, and only if the resolvers of all their root
+    fields checked the membership of the user in that organization (see add_org_role()). The roles are stored with
+    the response and checked again before it is served, so a cached response is never served
+    to users without these roles (e.g. members which are not admins, or former members).
+    """
+
+    def __init__(self, request, document, variables: dict, operation_name: str):
+        """
+        document is a valid core.documents.Document.
+        """
+        self.request = request
+        self.cache = get_cache()
+        self.key = None
+        self.org_id = None
+
+        operation_ast = get_operation_ast(document.ast, operation_name)
+
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            return
+
+        selections = operation_ast.selection_set.selections
+
+        # Fragments on the root type aren't resolved by a single root field.
+        if not all(isinstance(selection, FieldNode) for selection in selections):
+            return
+
+        # The response keys of the root fields, which all have to check the membership.
+        self.root_fields = {
+            (selection.alias or selection.name).value
+            for selection in selections
+            if selection.name.value != "__typename"
+        }
+
+        org_global_id = (variables or {}).get(get_setting("ORGANIZATION_VARIABLE"))
+
+        if not org_global_id or not request.user.is_authenticated:
+            return
+
+        self.org_global_id = org_global_id
+        self.org_id = from_global_id(org_global_id)[1]
+
+        # The printed document ignores whitespace, comments and formatting of the query.
+        key_data = json.dumps(
+            [document.printed, operation_name, variables, self.org_id],
+            sort_keys=True,
+            default=str,
+        )
+        self.key = (
+            f"{KEY_PREFIX}:response:{hashlib.sha256(key_data.encode()).hexdigest()}"
+        )
+
+    def get_version(self, tag: str, versions: dict) -> int:
+        """
+        Returns the version of a tag from versions (as returned by get_many()).
+        Tags without a version have never been invalidated (or were evicted), so they get a new one.
+        """
+        key = tag_key(tag)
+
+        if key in versions:
+            return versions[key]
+
+        version = time.time_ns()
+
+        if not self.cache.add(key, version, None):
+            version = self.cache.get(key, version)
+
+        return version
+
+    def get(self):
+        """
+        Returns the cached data, or None if the response is not cached (anymore).
+        """
+        if not self.key:
+            return None
+
+        org_tag = organization_tag(self.org_id)
+        values = self.cache.get_many([self.key, tag_key(org_tag)])
+
+        # Read before the query is executed, so that a mutation committed during the
+        # execution invalidates the response that is about to be stored.
+        self.org_version = self.get_version(org_tag, values)
+
+        entry = values.get(self.key)
+
+        if entry is not None:
+            tags = dict(entry["tags"])
+
+            if tags.pop(org_tag, None) == self.org_version:
+                versions = self.cache.get_many([tag_key(tag) for tag in tags])
+
+                if all(
+                    versions.get(tag_key(tag)) == version
+                    for tag, version in tags.items()
+                ) and all(
+                    is_org_role(self.request, self.org_global_id, role)
+                    for role in entry["roles"]
+                ):
+                    metrics.count("graphql_response_cache_hits")
+                    return entry["data"]
+
+        metrics.count("graphql_response_cache_misses")
+        return None
+
+    def set(self, data):
+        if not self.key:
+            return
+
+        org_roles = getattr(self.request, "org_roles", set())
+        org_root_fields = getattr(self.request, "org_root_fields", set())
+
+        # Responses with root fields without membership checks (which may return data of the
+        # user), or with checks of other organizations, could be served to users which are not
+        # allowed to see them.
+        if (
+            not org_roles
+            or not self.root_fields <= org_root_fields
+            or any(org_id != self.org_id for org_id, _ in org_roles)
+        ):
+            return
+
+        tags = set(getattr(self.request, "cache_tags", ()))
+        versions = self.cache.get_many([tag_key(tag) for tag in tags])
+
+        entry_tags = {tag: self.get_version(tag, versions) for tag in tags}
+        entry_tags[organization_tag(self.org_id)] = self.org_version
+
+        self.cache.set(
+            self.key,
+            {
+                "tags": entry_tags,
+                "roles": sorted(role for _, role in org_roles),
+                "data": data,
+            },
+            get_setting("TIMEOUT"),
+        )
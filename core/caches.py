@@ -0,0 +1,27 @@
+"""
+Caches which have to be shared by all workers.
+
+State like rate limits, metrics and revoked tokens is kept in Django's cache framework. A cache
+which is local to a worker (the local-memory cache) would let every worker keep its own state,
+e.g. limit requests on its own, so these caches fail loudly instead of silently diverging.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def get_shared_cache(alias: str, setting: str):
+    """
+    Returns the cache of settings.CACHES[alias]. Raises ImproperlyConfigured if it isn't shared
+    by the workers. setting names the setting which selected the alias, for the error message.
+    """
+    cache = caches[alias]
+
+    if isinstance(cache, LocMemCache):
+        raise ImproperlyConfigured(
+            f"{setting} uses the local-memory cache {alias!r}, which isn't shared by the "
+            "workers. Use a shared cache, e.g. the database cache."
+        )
+
+    return cache
@@ -0,0 +1,220 @@
+"""
+Static cost and depth analysis of GraphQL queries.
+
+Every validated document is analyzed before it is executed, and rejected if it is nested too
+deeply or costs more than the budget of its organization. The cost estimates the number of
+objects a query resolves:
+
+- Every field costs its weight (FIELD_COSTS, by default 1 for objects and 0 for scalars).
+  The edges of connections are free, their nodes are counted instead.
+- Fields below a list are counted once per item. The items of a connection are counted
+  `first` (or `last`) times, other lists (and connections without `first` or `last`) as
+  often as their expected size (LIST_SIZES, by default DEFAULT_LIST_SIZE).
+
+The edges and node fields of connections don't add to the depth either.
+
+See settings.GRAPHQL_COMPLEXITY.
+"""
+
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    get_named_type,
+    get_nullable_type,
+    get_operation_ast,
+    is_composite_type,
+    is_list_type,
+)
+from graphql.execution.values import get_argument_values
+from graphql_relay import from_global_id
+
+DEFAULTS = {
+    "MAX_DEPTH": 10,
+    "MAX_COST": 50000,
+    # The expected number of items of lists and connections without `first` or `last`.
+    "DEFAULT_LIST_SIZE": 100,
+    # Expected sizes of lists by field, e.g. {"KanbonFieldType.conditions": 5}.
+    "LIST_SIZES": {},
+    # Weights of fields, e.g. {"KanbonFormType.activityMetrics": 5}.
+    "FIELD_COSTS": {},
+    # The maximum cost per organization ID (instead of MAX_COST).
+    "ORGANIZATION_BUDGETS": {},
+    # The argument of root fields which contains the organization's global ID.
+    "ORGANIZATION_ARGUMENT": "orgId",
+}
+
+
+def get_setting(name: str):
+    return getattr(settings, "GRAPHQL_COMPLEXITY", {}).get(name, DEFAULTS[name])
+
+
+class Analysis:
+    """
+    The cost and depth of an operation (see analyze()).
+    """
+
+    def __init__(self, schema, fragments: dict, variables: dict):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+        self.field_costs = get_setting("FIELD_COSTS")
+        self.list_sizes = get_setting("LIST_SIZES")
+        self.default_list_size = get_setting("DEFAULT_LIST_SIZE")
+        self.organization_ids = set()
+        self.cost = 0
+        self.depth = 0
+
+    def collect_fields(self, selection_set, parent_type):
+        """
+        Yields (field node, parent type) for the fields of a selection set, including fragments.
+        """
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection, parent_type
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments[selection.name.value]
+            else:
+                fragment = selection
+
+            fragment_type = parent_type
+
+            if fragment.type_condition:
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+
+            yield from self.collect_fields(fragment.selection_set, fragment_type)
+
+    def visit(
+        self, selection_set, parent_type, depth: int, connection_size=None
+    ) -> int:
+        """
+        Returns the cost of a selection set. connection_size is the number of edges, if the
+        selection set belongs to a connection.
+        """
+        cost = 0
+
+        for node, field_parent_type in self.collect_fields(selection_set, parent_type):
+            name = node.name.value
+
+            # Introspection is not analyzed.
+            if name.startswith("__"):
+                continue
+
+            field = field_parent_type.fields[name]
+            field_type = get_named_type(field.type)
+            args = get_argument_values(field, node, self.variables)
+
+            org_argument_name = get_setting("ORGANIZATION_ARGUMENT")
+            org_argument = field.args.get(org_argument_name)
+
+            if depth == 0 and org_argument:
+                # Graphene passes arguments by their Python names (e.g. org_id).
+                org_global_id = args.get(org_argument.out_name or org_argument_name)
+
+                if org_global_id:
+                    self.organization_ids.add(from_global_id(org_global_id)[1])
+
+            key = f"{field_parent_type.name}.{name}"
+
+            # The edges of a connection and their nodes are not nested any deeper.
+            is_edges = connection_size is not None and name == "edges"
+            is_node = connection_size is not None and name == "node"
+            field_depth = depth if is_edges or is_node else depth + 1
+            self.depth = max(self.depth, field_depth)
+
+            weight = self.field_costs.get(
+                key, 1 if is_composite_type(field_type) and not is_edges else 0
+            )
+            list_size = self.list_sizes.get(key, self.default_list_size)
+            size = 1
+
+            if is_list_type(get_nullable_type(field.type)):
+                size = connection_size if is_edges else list_size
+
+            child_connection_size = None
+
+            if "first" in field.args or "last" in field.args:
+                page_sizes = [
+                    args[argument]
+                    for argument in ("first", "last")
+                    if args.get(argument) is not None
+                ]
+
+                # Negative sizes would make the cost negative.
+                if any(page_size < 0 for page_size in page_sizes):
+                    raise GraphQLError(
+                        f"The arguments first and last of {key} must not be negative.",
+                        extensions={"code": "INVALID_PAGE_SIZE"},
+                    )
+
+                child_connection_size = max(page_sizes, default=0) or list_size
+            elif is_edges:
+                # The node field of the edges.
+                child_connection_size = connection_size
+
+            children_cost = 0
+
+            if node.selection_set:
+                children_cost = self.visit(
+                    node.selection_set, field_type, field_depth, child_connection_size
+                )
+
+            cost += size * (weight + children_cost)
+
+        return cost
+
+
+def analyze(schema, document_ast, operation_name: str, variables: dict) -> Analysis:
+    operation = get_operation_ast(document_ast, operation_name)
+    fragments = {
+        definition.name.value: definition
+        for definition in document_ast.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+
+    analysis = Analysis(schema, fragments, variables)
+
+    if operation is not None:
+        root_type = schema.get_root_type(operation.operation)
+        analysis.cost = analysis.visit(operation.selection_set, root_type, 0)
+
+    return analysis
+
+
+def check_complexity(schema, document_ast, operation_name: str, variables: dict):
+    """
+    Errors:
+    - INVALID_PAGE_SIZE: A connection is queried with a negative first or last.
+    - QUERY_TOO_DEEP: The query is nested deeper than MAX_DEPTH.
+    - QUERY_TOO_COMPLEX: The cost of the query exceeds the budget of its organization.
+    """
+    analysis = analyze(schema, document_ast, operation_name, variables)
+    max_depth = get_setting("MAX_DEPTH")
+
+    if analysis.depth > max_depth:
+        raise GraphQLError(
+            f"The query has a depth of {analysis.depth}, but at most {max_depth} is allowed.",
+            extensions={"code": "QUERY_TOO_DEEP"},
+        )
+
+    budgets = {
+        str(org_id): budget
+        for org_id, budget in get_setting("ORGANIZATION_BUDGETS").items()
+    }
+    budget = min(
+        [
+            budgets.get(org_id, get_setting("MAX_COST"))
+            for org_id in analysis.organization_ids
+        ]
+        or [get_setting("MAX_COST")]
+    )
+
+    if analysis.cost > budget:
+        raise GraphQLError(
+            f"The query has a cost of {analysis.cost}, but at most {budget} is allowed.",
+            extensions={"code": "QUERY_TOO_COMPLEX", "cost": analysis.cost},
+        )
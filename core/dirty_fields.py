@@ -0,0 +1,109 @@
+"""
+Dirty field tracking for models.
+
+Model.save() writes every column of a row, even if only a single value changed. Models using
+the DirtyFieldsMixin remember the values they were loaded with, and save() only writes the
+columns that changed since (or skips the query entirely if nothing changed).
+"""
+
+from copy import deepcopy
+
+
+class DirtyFieldsMixin:
+    """
+    Must be placed before models.Model (or its subclasses) in the bases of a model.
+
+    Fields listed in counter_fields are never written by save() once a row exists,
+    as they are only changed with F() expressions.
+    """
+
+    counter_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        self.snapshot_fields(fields)
+
+    def snapshot_fields(self, fields=None):
+        """
+        Remembers the current values of the given (default: all loaded) fields as saved.
+        """
+        if not hasattr(self, "_saved_values"):
+            self._saved_values = {}
+
+        for field in self._meta.concrete_fields:
+            if (
+                fields is not None
+                and field.name not in fields
+                and field.attname not in fields
+            ):
+                continue
+
+            # Deferred fields have not been loaded.
+            if field.attname not in self.__dict__:
+                continue
+
+            value = self.__dict__[field.attname]
+
+            # Mutable values (e.g. of JSON fields) can be changed in place, so they are copied.
+            if isinstance(value, (dict, list)):
+                value = deepcopy(value)
+
+            self._saved_values[field.attname] = value
+
+    def get_dirty_fields(self) -> list[str]:
+        """
+        Returns the names of all fields that changed since the instance was loaded or saved.
+        """
+        saved_values = getattr(self, "_saved_values", {})
+        dirty_fields = []
+
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.name in self.counter_fields:
+                continue
+
+            if field.attname not in self.__dict__:
+                continue
+
+            if (
+                field.attname not in saved_values
+                or self.__dict__[field.attname] != saved_values[field.attname]
+            ):
+                dirty_fields.append(field.name)
+
+        return dirty_fields
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+
+        if (
+            self._state.adding
+            or update_fields is not None
+            or kwargs.get("force_insert")
+            or not hasattr(self, "_saved_values")
+        ):
+            super().save(*args, **kwargs)
+            self.snapshot_fields(update_fields)
+            return
+
+        dirty_fields = self.get_dirty_fields()
+
+        if not dirty_fields:
+            return
+
+        # Fields with auto_now (e.g. updated_at) are only set if they are written.
+        dirty_fields += [
+            field.name
+            for field in self._meta.concrete_fields
+            if getattr(field, "auto_now", False) and field.name not in dirty_fields
+        ]
+
+        kwargs["update_fields"] = dirty_fields
+        super().save(*args, **kwargs)
+        self.snapshot_fields(dirty_fields)
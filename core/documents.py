@@ -0,0 +1,135 @@
+"""
+Persisted queries and the document cache for GraphQL requests.
+
+Persisted queries: instead of the document, clients send the SHA-256 hash of a document from
+the registry (the *.graphql files in settings.GRAPHQL_PERSISTED_QUERIES["DIRECTORY"]), using the
+format of Apollo's persisted queries:
+
+{"extensions": {"persistedQuery": {"version": 1, "sha256Hash": "<hash>"}}, "variables": {...}}
+
+Only documents of the registry can be executed by hash, clients can't register documents. If
+REQUIRED is set, no other documents can be executed at all.
+
+Document cache: every worker keeps the parsed and validated documents of the most recent
+queries (persisted or not), so a repeated query is neither parsed nor validated again.
+"""
+
+import hashlib
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, parse, print_ast, validate
+
+DEFAULTS = {
+    # The directory containing the registered documents (*.graphql files), or None.
+    "DIRECTORY": None,
+    # Only allow persisted queries.
+    "REQUIRED": False,
+}
+
+
+def get_setting(name: str):
+    return getattr(settings, "GRAPHQL_PERSISTED_QUERIES", {}).get(name, DEFAULTS[name])
+
+
+@lru_cache(maxsize=None)
+def get_registry() -> dict:
+    """
+    Returns the registered documents as a dict {sha256 hash: document}.
+    The registry is read once per worker.
+    """
+    directory = get_setting("DIRECTORY")
+
+    if not directory or not Path(directory).is_dir():
+        return {}
+
+    registry = {}
+
+    for path in sorted(Path(directory).glob("**/*.graphql")):
+        query = path.read_text()
+        registry[hashlib.sha256(query.encode()).hexdigest()] = query
+
+    return registry
+
+
+def get_query(query: str, extensions: dict) -> str:
+    """
+    Returns the document of the request: the persisted document if extensions contain a hash,
+    otherwise the given query.
+
+    Errors:
+    - PERSISTED_QUERY_NOT_FOUND: There's no registered document with the given hash.
+    - PERSISTED_QUERY_REQUIRED: Only persisted queries are allowed.
+    """
+    persisted_query = (extensions or {}).get("persistedQuery")
+
+    if persisted_query:
+        sha256_hash = persisted_query.get("sha256Hash")
+
+        if sha256_hash not in get_registry():
+            raise GraphQLError(
+                "PersistedQueryNotFound",
+                extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+            )
+
+        return get_registry()[sha256_hash]
+
+    if query and get_setting("REQUIRED"):
+        raise GraphQLError(
+            "Only persisted queries are allowed.",
+            extensions={"code": "PERSISTED_QUERY_REQUIRED"},
+        )
+
+    return query
+
+
+class Document:
+    """
+    A parsed and validated document. Documents are shared between requests and must not be changed.
+    """
+
+    def __init__(self, ast, errors: list):
+        self.ast = ast
+        self.errors = errors
+
+    @cached_property
+    def printed(self) -> str:
+        """
+        The normalized document, which ignores whitespace, comments and formatting.
+        """
+        return print_ast(self.ast)
+
+
+@lru_cache(maxsize=256)
+def get_document(schema, query: str, validation_rules: tuple = None) -> Document:
+    """
+    Parses and validates a query against the schema.
+    The last 256 documents of a worker are cached, see stats().
+    """
+    try:
+        ast = parse(query)
+    except GraphQLError as e:
+        return Document(None, [e])
+
+    errors = validate(
+        schema, ast, validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+    )
+
+    return Document(ast, errors)
+
+
+def stats() -> dict:
+    """
+    Returns the hits and misses of the document cache (of this worker).
+    """
+    info = get_document.cache_info()
+    total = info.hits + info.misses
+
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "hit_rate": info.hits / total if total else 0.0,
+    }
@@ -0,0 +1,415 @@
+"""
+Per-request metrics in the Prometheus text format.
+
+metrics_middleware records for every request its latency, the number of SQL queries and the time
+spent executing them, as histograms labeled with the route and the GraphQL operation name.
+The histograms are aggregated in memory and added to the counters in the database (see
+core.models.Counter) every FLUSH_INTERVAL seconds by a thread of the worker (see
+core/background.py), so requests never wait for a flush. /metrics (see metrics_view in
+core/views.py) returns the metrics of all workers, no matter which worker serves it.
+
+A flush adds the counts of a worker with a single upsert (UPDATE ... SET value = value + ...), so
+concurrent flushes of several workers never lose counts.
+
+To limit the number of series, unknown GraphQL operation names are recorded as "other" once a
+worker has seen MAX_SERIES series.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.utils.decorators import sync_and_async_middleware
+
+from .background import PeriodicTask
+from .models import Counter, MetricSeries
+
+DEFAULTS = {
+    # Seconds between the flushes of a worker's metrics to the database.
+    "FLUSH_INTERVAL": 10,
+    # The number of series (histograms per label values) a worker records.
+    "MAX_SERIES": 500,
+    # If set, /metrics requires the header "Authorization: Bearer <TOKEN>".
+    "TOKEN": None,
+}
+
+# The number of counters added by a single upsert.
+BATCH_SIZE = 500
+
+OPERATION_NAME = re.compile(r"^[_A-Za-z][_0-9A-Za-z]*$")
+
+
+def get_setting(name: str):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+class Histogram:
+    """
+    The counters only store integers, so the values are stored multiplied by scale.
+    """
+
+    def __init__(self, name: str, description: str, buckets: tuple, scale: int = 1):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.scale = scale
+
+    def bucket_index(self, value) -> int:
+        """
+        Returns the index of the smallest bucket containing the value (len(buckets) for +Inf).
+        """
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                return index
+
+        return len(self.buckets)
+
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HISTOGRAMS = {
+    histogram.name: histogram
+    for histogram in [
+        Histogram(
+            "http_request_duration_seconds",
+            "Latency of requests.",
+            SECONDS_BUCKETS,
+            scale=1_000_000,
+        ),
+        Histogram(
+            "http_request_sql_duration_seconds",
+            "Time spent executing SQL queries per request.",
+            SECONDS_BUCKETS,
+            scale=1_000_000,
+        ),
+        Histogram(
+            "http_request_sql_queries",
+            "Number of SQL queries per request.",
+            (0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+        ),
+    ]
+}
+
+
+class Recorder:
+    """
+    The SQL queries of the current request.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+
+
+# Context variables are copied to the threads of sync_to_async, so queries of async views
+# are recorded as well.
+current_recorder: ContextVar = ContextVar("metrics_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.queries += 1
+        recorder.sql_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Every thread has its own connections.
+connection_created.connect(install_query_recorder)
+
+
+class Buffer:
+    """
+    The metrics of this worker since its last flush.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {series ID: [count per bucket, ..., count of +Inf, scaled sum]}
+        self.values = {}
+        # {series ID: [histogram name, labels]}
+        self.series = {}
+        # The series which are stored in the database (see MetricSeries).
+        self.published = set()
+        # {counter name: count} of plain counters, e.g. the hits of the response cache.
+        self.counters = {}
+
+    def observe(self, histogram: Histogram, labels: dict, value, limit: bool = True):
+        """
+        Returns False if the series is new and limit is set, but MAX_SERIES series are recorded already.
+        """
+        series_id = hashlib.sha1(
+            json.dumps([histogram.name, labels], sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+        with self.lock:
+            if series_id not in self.series:
+                if limit and len(self.series) >= get_setting("MAX_SERIES"):
+                    return False
+
+                self.series[series_id] = [histogram.name, labels]
+
+            values = self.values.setdefault(
+                series_id, [0] * (len(histogram.buckets) + 2)
+            )
+            values[histogram.bucket_index(value)] += 1
+            values[-1] += round(value * histogram.scale)
+
+        return True
+
+    def count(self, name: str, delta: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + delta
+
+    def flush(self):
+        """
+        Adds the metrics of this worker to the counters in the database.
+        """
+        with self.lock:
+            values, self.values = self.values, {}
+            counters, self.counters = self.counters, {}
+            unpublished = [
+                MetricSeries(id=series_id, histogram=name, labels=labels)
+                for series_id, (name, labels) in self.series.items()
+                if series_id not in self.published
+            ]
+
+        counts = {
+            f"{series_id}:{index}": value
+            for series_id, series_values in values.items()
+            for index, value in enumerate(series_values)
+            if value
+        }
+        counts.update(counters)
+
+        try:
+            if unpublished:
+                MetricSeries.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                    unpublished, ignore_conflicts=True
+                )
+                self.published.update(series.id for series in unpublished)
+
+            add_to_counters(counts)
+        except Exception:
+            # The counts are added by the next flush instead.
+            with self.lock:
+                for series_id, series_values in values.items():
+                    current = self.values.setdefault(
+                        series_id, [0] * len(series_values)
+                    )
+
+                    for index, value in enumerate(series_values):
+                        current[index] += value
+
+                for name, count in counters.items():
+                    self.counters[name] = self.counters.get(name, 0) + count
+
+            raise
+
+
+buffer = Buffer()
+
+flush_task = PeriodicTask(
+    "metrics-flush", buffer.flush, lambda: get_setting("FLUSH_INTERVAL")
+)
+
+
+def count(name: str, delta: int = 1):
+    """
+    Adds delta to a counter of all workers, e.g. count("graphql_response_cache_hits").
+    """
+    flush_task.start()
+    buffer.count(name, delta)
+
+
+def add_to_counters(counts: dict):
+    """
+    Atomically adds the counts to the counters ({counter name: count}), creating missing counters.
+    """
+    if not counts:
+        return
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    items = sorted(counts.items())
+
+    if connection.vendor not in ("sqlite", "postgresql"):
+        for name, count in items:
+            add_to_counter(name, count)
+
+        return
+
+    table = connection.ops.quote_name(Counter._meta.db_table)
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS), connection.cursor() as cursor:
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start : start + BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} (name, value) VALUES "
+                f"{', '.join(['(%s, %s)'] * len(batch))} "
+                f"ON CONFLICT (name) DO UPDATE SET value = {table}.value + excluded.value",
+                [param for item in batch for param in item],
+            )
+
+
+def add_to_counter(name: str, count: int):
+    counters = Counter.objects.using(DEFAULT_DB_ALIAS).filter(name=name)
+
+    if counters.update(value=F("value") + count):
+        return
+
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            Counter.objects.using(DEFAULT_DB_ALIAS).create(name=name, value=count)
+    except IntegrityError:
+        # Another worker created the counter in the meantime.
+        counters.update(value=F("value") + count)
+
+
+def observe(request, recorder: Recorder, duration: float):
+    resolver_match = getattr(request, "resolver_match", None)
+    operation = getattr(request, "graphql_operation", "")
+
+    if operation and not OPERATION_NAME.match(operation):
+        operation = "other"
+
+    labels = {
+        "route": resolver_match.route if resolver_match else "unmatched",
+        "operation": operation,
+    }
+    observations = [
+        ("http_request_duration_seconds", duration),
+        ("http_request_sql_duration_seconds", recorder.sql_time),
+        ("http_request_sql_queries", recorder.queries),
+    ]
+
+    flush_task.start()
+
+    for name, value in observations:
+        if not buffer.observe(HISTOGRAMS[name], labels, value):
+            # Too many series, e.g. because of arbitrary operation names.
+            buffer.observe(
+                HISTOGRAMS[name], {**labels, "operation": "other"}, value, limit=False
+            )
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    # Connections which were created before the middleware was loaded.
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection=connection)
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            recorder = Recorder()
+            token = current_recorder.set(recorder)
+            start = time.perf_counter()
+
+            try:
+                return await get_response(request)
+            finally:
+                current_recorder.reset(token)
+                observe(request, recorder, time.perf_counter() - start)
+
+    else:
+
+        def middleware(request):
+            recorder = Recorder()
+            token = current_recorder.set(recorder)
+            start = time.perf_counter()
+
+            try:
+                return get_response(request)
+            finally:
+                current_recorder.reset(token)
+                observe(request, recorder, time.perf_counter() - start)
+
+    return middleware
+
+
+def format_labels(labels: dict) -> str:
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+
+    return ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def format_value(value) -> str:
+    return (
+        f"{value:.6f}".rstrip("0").rstrip(".")
+        if isinstance(value, float)
+        else str(value)
+    )
+
+
+def render() -> str:
+    """
+    Returns the metrics of all workers in the Prometheus text format.
+    """
+    series_by_histogram = {}
+
+    for series in MetricSeries.objects.using(DEFAULT_DB_ALIAS).order_by("histogram"):
+        if series.histogram in HISTOGRAMS:
+            series_by_histogram.setdefault(series.histogram, []).append(
+                (series.id, series.labels)
+            )
+
+    values = dict(Counter.objects.using(DEFAULT_DB_ALIAS).values_list("name", "value"))
+    lines = []
+
+    for name, series in series_by_histogram.items():
+        histogram = HISTOGRAMS[name]
+        lines.append(f"# HELP {name} {histogram.description}")
+        lines.append(f"# TYPE {name} histogram")
+
+        for series_id, labels in sorted(
+            series, key=lambda item: sorted(item[1].items())
+        ):
+            counts = [
+                values.get(f"{series_id}:{i}", 0)
+                for i in range(len(histogram.buckets) + 1)
+            ]
+            total = values.get(f"{series_id}:{len(histogram.buckets) + 1}", 0)
+            cumulative = 0
+
+            for bucket, count in zip([*histogram.buckets, "+Inf"], counts):
+                cumulative += count
+                bucket_labels = format_labels({**labels, "le": format_value(bucket)})
+                lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+
+            sum_value = total / histogram.scale if histogram.scale != 1 else total
+            lines.append(
+                f"{name}_sum{{{format_labels(labels)}}} {format_value(sum_value)}"
+            )
+            lines.append(f"{name}_count{{{format_labels(labels)}}} {cumulative}")
+
+    # The hits and misses of the response cache (see core/cache.py).
+    for counter in ("hits", "misses"):
+        name = f"graphql_response_cache_{counter}_total"
+        lines.append(f"# HELP {name} Number of GraphQL response cache {counter}.")
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {values.get(f'graphql_response_cache_{counter}', 0)}")
+
+    return "\n".join(lines) + "\n"
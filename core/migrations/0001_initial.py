@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Counter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="MetricSeries",
+            fields=[
+                (
+                    "id",
+                    models.CharField(max_length=16, primary_key=True, serialize=False),
+                ),
+                ("histogram", models.CharField(max_length=100)),
+                ("labels", models.JSONField(default=dict)),
+            ],
+            options={
+                "verbose_name_plural": "metric series",
+            },
+        ),
+    ]
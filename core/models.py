@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class Counter(models.Model):
+    """
+    A counter shared by all workers, e.g. a bucket of a metrics histogram (see core/metrics.py).
+
+    Counters are only ever incremented within the database (see core.metrics.add_to_counters), so
+    concurrent increments of several workers are never lost.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class MetricSeries(models.Model):
+    """
+    A series of a metrics histogram, i.e. its name and label values (see core/metrics.py).
+    """
+
+    # The hash of the histogram's name and labels (see core.metrics.Buffer.observe).
+    id = models.CharField(max_length=16, primary_key=True)
+    histogram = models.CharField(max_length=100)
+    labels = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = "metric series"
+
+    def __str__(self):
+        return f"{self.histogram} {self.labels}"
@@ -0,0 +1,185 @@
+"""
+Keyset pagination for Relay connections.
+
+DjangoConnectionField paginates with offsets (LIMIT/OFFSET) and counts all rows for every
+page, so the deeper a client pages, the more rows the database has to skip. The
+KeysetConnectionField seeks directly to the position of the cursor instead, so that every
+page costs the same, given an index matching the ordering of the queryset.
+"""
+
+import base64
+import json
+from functools import reduce
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q, QuerySet
+from graphene.relay import PageInfo
+from graphene_django import DjangoConnectionField
+from graphql import GraphQLError
+
+from .asynchronous import in_event_loop
+
+
+def get_ordering(queryset: QuerySet) -> list[tuple[str, bool]]:
+    """
+    Returns the ordering of the queryset as a list of (field name, descending) tuples.
+    The primary key is appended if missing, so that every row has a unique position.
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by or model._meta.ordering)
+
+    keys = []
+
+    for order in ordering:
+        if not isinstance(order, str):
+            raise ValueError("Keyset pagination only supports ordering by field names.")
+
+        descending = order.startswith("-")
+        name = order.lstrip("-")
+
+        keys.append((model._meta.pk.name if name == "pk" else name, descending))
+
+    if model._meta.pk.name not in [name for name, _ in keys]:
+        descending = keys[-1][1] if keys else False
+        keys.append((model._meta.pk.name, descending))
+
+    return keys
+
+
+def encode_cursor(obj, ordering: list[tuple[str, bool]]) -> str:
+    values = [obj._meta.get_field(name).value_to_string(obj) for name, _ in ordering]
+
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, model, ordering: list[tuple[str, bool]]) -> list:
+    """
+    Errors:
+    - INVALID_CURSOR: The cursor is malformed or belongs to another ordering.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+        if len(values) != len(ordering):
+            raise ValueError
+
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(ordering, values)
+        ]
+    except Exception:
+        raise GraphQLError("Invalid cursor.", extensions={"code": "INVALID_CURSOR"})
+
+
+def seek(ordering: list[tuple[str, bool]], values: list, reverse: bool = False) -> Q:
+    """
+    Returns the filter for all rows after the given values (or before them, if reverse is True).
+    For the ordering (-a, -b) this is: a < x OR (a = x AND b < y).
+    """
+    conditions = []
+
+    for index, ((name, descending), value) in enumerate(zip(ordering, values)):
+        lookup = "lt" if descending != reverse else "gt"
+
+        equal = {
+            previous_name: previous_value
+            for (previous_name, _), previous_value in zip(
+                ordering[:index], values[:index]
+            )
+        }
+
+        conditions.append(Q(**equal, **{f"{name}__{lookup}": value}))
+
+    return reduce(lambda a, b: a | b, conditions)
+
+
+class KeysetConnectionField(DjangoConnectionField):
+    """
+    Connection field which paginates by keyset instead of offset, using the ordering of
+    the node type's queryset (see get_queryset()). Cursors are opaque and encode the values
+    of the ordering fields of an edge.
+
+    The total count is not calculated and the `offset` argument is not supported.
+    hasPreviousPage (when paginating forwards) and hasNextPage (when paginating backwards)
+    are only true if a cursor was given.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.args.pop("offset", None)
+
+    @classmethod
+    def connection_resolver(cls, *args, **kwargs):
+        # On the event loop, the field's resolver, get_queryset() and the page are resolved
+        # synchronously in a worker thread.
+        if in_event_loop():
+            return sync_to_async(super().connection_resolver)(*args, **kwargs)
+
+        return super().connection_resolver(*args, **kwargs)
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        assert isinstance(
+            iterable, QuerySet
+        ), "KeysetConnectionField requires get_queryset() to return a QuerySet."
+
+        first = args.get("first")
+        last = args.get("last")
+        after = args.get("after")
+        before = args.get("before")
+
+        ordering = get_ordering(iterable)
+        queryset = iterable.order_by(
+            *[("-" if descending else "") + name for name, descending in ordering]
+        )
+
+        if after:
+            queryset = queryset.filter(
+                seek(ordering, decode_cursor(after, iterable.model, ordering))
+            )
+
+        if before:
+            queryset = queryset.filter(
+                seek(
+                    ordering,
+                    decode_cursor(before, iterable.model, ordering),
+                    reverse=True,
+                )
+            )
+
+        # When only `last` is given, the page is read from the end and reversed afterwards.
+        backwards = last is not None and first is None
+        limit = (last if backwards else first) or max_limit
+
+        if backwards:
+            queryset = queryset.reverse()
+
+        if limit is not None:
+            # One additional row tells whether there is another page.
+            nodes = list(queryset[: limit + 1])
+            has_more = len(nodes) > limit
+            nodes = nodes[:limit]
+        else:
+            nodes = list(queryset)
+            has_more = False
+
+        if backwards:
+            nodes.reverse()
+
+        edges = [
+            connection.Edge(node=node, cursor=encode_cursor(node, ordering))
+            for node in nodes
+        ]
+
+        connection = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_more if backwards else bool(after),
+                has_next_page=bool(before) if backwards else has_more,
+            ),
+        )
+        connection.iterable = iterable
+
+        return connection
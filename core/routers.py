@@ -0,0 +1,172 @@
+"""
+Routing of reads to read replicas (settings.DATABASE_ROUTING["REPLICAS"]).
+
+Writes always go to the primary ("default"). Reads go to a replica only during requests (see
+routing_middleware), and only if the request can't observe replication lag:
+
+- GET and HEAD requests (e.g. admin pages) read from a replica, other requests (e.g. admin
+  changes) from the primary. GraphQL queries read from a replica and mutations from the primary,
+  no matter the method (see use_replicas() and use_primary() in core/views.py).
+- Once a request wrote, its remaining reads go to the primary.
+- After a write, the client is pinned to the primary for STICKY_SECONDS with a cookie, so it
+  reads its own writes even if the replicas lag behind. Writes of UNPINNED_MODELS (e.g. the
+  activity counters of forms) and of the database cache don't count as writes.
+
+Every request reads from a single replica, so its reads are consistent with each other.
+Outside of requests (e.g. management commands), all reads go to the primary.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+DEFAULTS = {
+    # The aliases of the read replicas in settings.DATABASES.
+    "REPLICAS": [],
+    # Seconds during which a client reads from the primary after it wrote.
+    "STICKY_SECONDS": 5,
+    "COOKIE_NAME": "primary_db_pinned",
+    # Models (app_label.model_name) whose writes don't pin the client, as it never reads them
+    # back, e.g. counters.
+    "UNPINNED_MODELS": ["forms.formactivity", "core.counter", "core.metricseries"],
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The app label of the entries of the database cache, which are always read from the primary.
+CACHE_APP_LABEL = "django_cache"
+
+
+def get_setting(name: str):
+    return getattr(settings, "DATABASE_ROUTING", {}).get(name, DEFAULTS[name])
+
+
+class RoutingState:
+    """
+    The routing of the current request.
+    """
+
+    def __init__(self, pinned: bool, primary: bool):
+        # The client wrote within the last STICKY_SECONDS.
+        self.pinned = pinned
+        # Reads go to the primary.
+        self.primary = primary or pinned
+        # The request wrote.
+        self.wrote = False
+        replicas = get_setting("REPLICAS")
+        self.replica = random.choice(replicas) if replicas else None
+
+
+# Context variables are copied to the threads of sync_to_async, so async views are routed as well.
+current_state: ContextVar = ContextVar("routing_state", default=None)
+
+
+def use_primary():
+    """
+    Sends the remaining reads of the current request to the primary.
+    """
+    state = current_state.get()
+
+    if state is not None:
+        state.primary = True
+
+
+def use_replicas():
+    """
+    Sends the remaining reads of the current request to its replica, unless the client is pinned
+    to the primary or the request wrote already.
+    """
+    state = current_state.get()
+
+    if state is not None:
+        state.primary = state.pinned
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+
+        if (
+            state is None
+            or state.replica is None
+            or state.primary
+            or state.wrote
+            or model._meta.app_label == CACHE_APP_LABEL
+        ):
+            return DEFAULT_DB_ALIAS
+
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+
+        # Writes to the database cache (e.g. of the rate limiters) don't pin the client.
+        if (
+            state is not None
+            and model._meta.app_label != CACHE_APP_LABEL
+            and model._meta.label_lower not in get_setting("UNPINNED_MODELS")
+        ):
+            state.wrote = True
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas contain the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas are migrated through replication.
+        if db in get_setting("REPLICAS"):
+            return False
+
+        return None
+
+
+@sync_and_async_middleware
+def routing_middleware(get_response):
+    def start(request) -> RoutingState:
+        return RoutingState(
+            pinned=get_setting("COOKIE_NAME") in request.COOKIES,
+            primary=request.method not in SAFE_METHODS,
+        )
+
+    def finish(state: RoutingState, response):
+        if state.wrote:
+            response.set_cookie(
+                get_setting("COOKIE_NAME"),
+                "1",
+                max_age=get_setting("STICKY_SECONDS"),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state = start(request)
+            token = current_state.set(state)
+
+            try:
+                return finish(state, await get_response(request))
+            finally:
+                current_state.reset(token)
+
+    else:
+
+        def middleware(request):
+            state = start(request)
+            token = current_state.set(state)
+
+            try:
+                return finish(state, get_response(request))
+            finally:
+                current_state.reset(token)
+
+    return middleware
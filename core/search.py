@@ -0,0 +1,329 @@
+"""
+Indexed search for the admin.
+
+The default admin search filters every search field with icontains, which scans the whole
+table (and the joined tables) for every search. A SearchIndex instead keeps the searchable text
+of every object in a full-text table (SQLite FTS5 with the trigram tokenizer), so substring
+searches are answered from the index:
+
+- The content of an object is its search fields (which may span relations, e.g.
+  created_by__email_address) joined with SEPARATOR.
+- A search matches the objects whose content contains every word of the search term
+  (case-insensitive), like the admin's default search. Words of less than three characters
+  can't use the trigram index, so they are matched with LIKE on the (much smaller) index table.
+
+The index is kept current by SQLite triggers on the indexed table and on the tables its fields
+span, so every write (including bulk_create, QuerySet.update() and raw SQL) updates the index
+within the same statement, without additional queries. The triggers are generated from the
+content query of the index. They are dropped during `migrate`, since SQLite can't rebuild tables
+which other triggers refer to, and the indexes are rebuilt after migrations were applied.
+`manage.py rebuild_search_indexes` rebuilds all indexes.
+
+The index only exists on SQLite. On other databases, the admin falls back to its default search.
+"""
+
+from functools import cached_property
+
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Concat
+from django.db.models.signals import post_migrate, pre_migrate
+from django.utils.text import smart_split, unescape_string_literal
+
+SEPARATOR = " | "
+
+# The minimum length of a word which can be looked up in the trigram index.
+TRIGRAM_LENGTH = 3
+
+registry = []
+
+
+def split_search_term(search_term: str) -> list[str]:
+    """
+    Splits the search term into words like the admin does (quoted phrases are one word).
+    """
+    words = []
+
+    for word in smart_split(search_term):
+        if word.startswith(('"', "'")) and word[0] == word[-1]:
+            word = unescape_string_literal(word)
+
+        if word:
+            words.append(word)
+
+    return words
+
+
+class SearchIndex:
+    def __init__(self, table: str, model: str, fields: tuple):
+        """
+        model is the label of the indexed model (e.g. "user.User"), fields are its search fields.
+        """
+        self.table = table
+        self.model = model
+        self.fields = fields
+        registry.append(self)
+
+    def available(self) -> bool:
+        return connections[DEFAULT_DB_ALIAS].vendor == "sqlite"
+
+    def content_queryset(self, apps=global_apps):
+        """
+        Returns the (pk, content) of all objects.
+        """
+        model = apps.get_model(self.model)
+        parts = []
+
+        for field in self.fields:
+            parts += [Coalesce(Cast(field, TextField()), Value("")), Value(SEPARATOR)]
+
+        return (
+            model._base_manager.using(DEFAULT_DB_ALIAS)
+            .annotate(search_content=Concat(*parts[:-1], output_field=TextField()))
+            .values_list("pk", "search_content")
+            .order_by()
+        )
+
+    def create(self, apps=global_apps):
+        """
+        Creates and fills the index table (used by the migrations).
+        """
+        if not self.available():
+            return
+
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5(content, tokenize='trigram')"
+            )
+
+        self.refresh(apps=apps)
+
+    def drop(self, apps=global_apps):
+        if not self.available():
+            return
+
+        self.drop_triggers()
+
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def refresh(self, apps=global_apps):
+        """
+        Rebuilds the whole index.
+        """
+        if not self.available():
+            return
+
+        sql, params = self.content_queryset(apps).query.sql_with_params()
+
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(f"INSERT INTO {self.table} (rowid, content) {sql}", params)
+
+    def search(self, search_term: str) -> RawSQL:
+        """
+        Returns a subquery of the primary keys of the objects which match every word of the search term.
+        """
+        words = split_search_term(search_term)
+        conditions = []
+        params = []
+
+        long_words = [word for word in words if len(word) >= TRIGRAM_LENGTH]
+
+        if long_words:
+            # Every word is a phrase of trigrams, i.e. a case-insensitive substring.
+            conditions.append(f"{self.table} MATCH %s")
+            params.append(
+                " AND ".join('"' + word.replace('"', '""') + '"' for word in long_words)
+            )
+
+        for word in words:
+            if len(word) < TRIGRAM_LENGTH:
+                escaped = (
+                    word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                )
+                conditions.append("content LIKE %s ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+
+        return RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {' AND '.join(conditions)}",
+            params,
+        )
+
+    @cached_property
+    def related_lookups(self) -> dict:
+        """
+        Returns {model label: (lookup from the indexed model, indexed fields of the model)} for
+        the relations the fields span.
+        """
+        model = global_apps.get_model(self.model)
+        related = {}
+
+        for field in self.fields:
+            path = field.split("__")
+            current = model
+
+            for index, name in enumerate(path[:-1]):
+                current = current._meta.get_field(name).related_model
+                lookup, fields = related.setdefault(
+                    current._meta.label, ("__".join(path[: index + 1]), set())
+                )
+                fields.add(path[index + 1])
+
+        return related
+
+    def update_sql(self, lookup: str, column: str, apps=global_apps) -> str:
+        """
+        Returns the statement of a trigger, which replaces the entries of the objects whose lookup
+        equals the column of the trigger's row.
+        """
+        connection = connections[DEFAULT_DB_ALIAS]
+        queryset = self.content_queryset(apps).filter(
+            **{lookup: RawSQL(f"NEW.{connection.ops.quote_name(column)}", [])}
+        )
+        sql, params = queryset.query.sql_with_params()
+
+        # Triggers can't have parameters, so they are inlined as literals.
+        with connection.schema_editor(atomic=False, collect_sql=True) as editor:
+            sql = sql % tuple(editor.quote_value(param) for param in params)
+
+        return f"INSERT OR REPLACE INTO {self.table} (rowid, content) {sql}"
+
+    def update_trigger(self, model, columns: set, lookup: str, apps=global_apps):
+        """
+        Returns the SQL of a trigger, which updates the entries referencing a row of the model
+        (by lookup) when one of the columns changes.
+        """
+        quote_name = connections[DEFAULT_DB_ALIAS].ops.quote_name
+        columns = sorted(columns)
+        # Django updates all columns of a row, so unchanged rows are skipped.
+        changed = " OR ".join(
+            f"OLD.{quote_name(column)} IS NOT NEW.{quote_name(column)}"
+            for column in columns
+        )
+
+        return (
+            f"AFTER UPDATE OF {', '.join(map(quote_name, columns))} "
+            f"ON {quote_name(model._meta.db_table)} FOR EACH ROW WHEN {changed} "
+            f"BEGIN {self.update_sql(lookup, model._meta.pk.column, apps)}; END"
+        )
+
+    def triggers(self, apps=global_apps) -> dict:
+        """
+        Returns {trigger name: SQL} of the triggers which keep the index current.
+        """
+        quote_name = connections[DEFAULT_DB_ALIAS].ops.quote_name
+        model = apps.get_model(self.model)
+        table = quote_name(model._meta.db_table)
+        pk = quote_name(model._meta.pk.column)
+        # The columns of the model the content depends on (including foreign keys).
+        columns = {
+            model._meta.get_field(field.split("__")[0]).column for field in self.fields
+        }
+
+        triggers = {
+            f"{self.table}_insert": (
+                f"AFTER INSERT ON {table} "
+                f"BEGIN {self.update_sql('pk', model._meta.pk.column, apps)}; END"
+            ),
+            f"{self.table}_update": self.update_trigger(model, columns, "pk", apps),
+            f"{self.table}_delete": (
+                f"AFTER DELETE ON {table} "
+                f"BEGIN DELETE FROM {self.table} WHERE rowid = OLD.{pk}; END"
+            ),
+        }
+
+        # New related rows aren't referenced yet, and deleting them deletes or updates the
+        # referencing rows of the model.
+        for label, (lookup, fields) in self.related_lookups.items():
+            related_model = apps.get_model(label)
+            triggers[f"{self.table}_{related_model._meta.db_table}_update"] = (
+                self.update_trigger(
+                    related_model,
+                    {related_model._meta.get_field(field).column for field in fields},
+                    lookup,
+                    apps,
+                )
+            )
+
+        return triggers
+
+    def trigger_names(self) -> list[str]:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f"{self.table}_%"],
+            )
+
+            return [name for name, in cursor.fetchall()]
+
+    def create_triggers(self):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            for name, sql in self.triggers().items():
+                cursor.execute(f"CREATE TRIGGER {name} {sql}")
+
+    def drop_triggers(self):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            for name in self.trigger_names():
+                cursor.execute(f"DROP TRIGGER {name}")
+
+    def exists(self) -> bool:
+        return self.table in connections[DEFAULT_DB_ALIAS].introspection.table_names()
+
+
+def app_indexes(app_config, using: str) -> list[SearchIndex]:
+    if using != DEFAULT_DB_ALIAS:
+        return []
+
+    return [
+        index
+        for index in registry
+        if index.model.split(".")[0] == app_config.label and index.available()
+    ]
+
+
+def drop_triggers(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Drops the triggers before `migrate`: SQLite can't rebuild a table (see
+    DatabaseSchemaEditor._remake_table()) while a trigger on another table refers to it.
+    """
+    for index in app_indexes(sender, using):
+        index.drop_triggers()
+
+
+def create_triggers(sender, using=DEFAULT_DB_ALIAS, plan=None, **kwargs):
+    """
+    Creates the triggers after `migrate` and rebuilds the indexes if migrations were applied,
+    since the indexes weren't updated in the meantime.
+    """
+    for index in app_indexes(sender, using):
+        if index.exists():
+            index.create_triggers()
+
+            if plan != []:
+                index.refresh()
+
+
+pre_migrate.connect(drop_triggers, dispatch_uid="core.search.drop_triggers")
+post_migrate.connect(create_triggers, dispatch_uid="core.search.create_triggers")
+
+
+class IndexedSearchMixin:
+    """
+    ModelAdmin mixin which searches with search_index instead of search_fields.
+    """
+
+    search_index: SearchIndex = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if (
+            not self.search_index
+            or not self.search_index.available()
+            or not split_search_term(search_term)
+        ):
+            return super().get_search_results(request, queryset, search_term)
+
+        return queryset.filter(pk__in=self.search_index.search(search_term)), False
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +32,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    "core",
     "user",
     "forms",
     "django.contrib.admin",
@@ -39,14 +41,23 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "graphene_django",
 ]
 
 MIDDLEWARE = [
+    # Records the latency and SQL queries of every request, see core/metrics.py.
+    "core.metrics.metrics_middleware",
+    # Routes the reads of requests to the read replicas, see core/routers.py.
+    "core.routers.routing_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Authenticates requests with signed tokens instead of sessions, see user/authentication.py.
+    "user.authentication.token_authentication_middleware",
+    # Responds with 503 if too many passwords are being hashed, see user/hashing.py.
+    "user.hashing.hasher_busy_middleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -82,6 +93,131 @@ DATABASES = {
     }
 }
 
+# Read replicas, see core/routers.py. Locally, DATABASE_REPLICAS=2 adds two aliases of the
+# SQLite database, which behave like replicas without replication lag.
+DATABASE_ROUTING = {
+    "REPLICAS": [
+        f"replica_{i}"
+        for i in range(1, int(os.environ.get("DATABASE_REPLICAS", 0)) + 1)
+    ],
+    # Seconds during which a client reads from the primary after it wrote.
+    "STICKY_SECONDS": 5,
+}
+
+for replica in DATABASE_ROUTING["REPLICAS"]:
+    DATABASES[replica] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Any other backend works as well, e.g. without Redis:
+# - "django.core.cache.backends.filebased.FileBasedCache" with "LOCATION": "/var/tmp/django_cache"
+# - "django.core.cache.backends.db.DatabaseCache" with "LOCATION": "cache_table" (see createcachetable)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # The GraphQL response cache, shared by all workers (see core/cache.py).
+    "graphql": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "graphql_cache",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+    # State which has to be shared by all workers (see core/caches.py).
+    # Create its table with `manage.py createcachetable`.
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "shared_cache",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+
+# The cache used by the anti-spam rate limiters, see user/rate_limit.py.
+# It has to be shared by all workers, the local-memory cache is rejected.
+RATE_LIMIT_CACHE = "shared"
+
+
+# GraphQL
+# https://docs.graphene-python.org/projects/django/en/latest/settings/
+
+GRAPHENE = {
+    "SCHEMA": "api.schema.schema",
+}
+
+# Persisted queries, see core/documents.py.
+GRAPHQL_PERSISTED_QUERIES = {
+    "DIRECTORY": BASE_DIR / "persisted_queries",
+    "REQUIRED": False,
+}
+
+# Limits of the cost and depth of GraphQL queries, see core/complexity.py.
+GRAPHQL_COMPLEXITY = {
+    "MAX_DEPTH": 10,
+    "MAX_COST": 50000,
+    "DEFAULT_LIST_SIZE": 100,
+    "LIST_SIZES": {
+        "KanbonFormType.fields": 50,
+        "KanbonFieldType.conditions": 5,
+    },
+    "FIELD_COSTS": {
+        "KanbonFormType.activityMetrics": 2,
+    },
+    "ORGANIZATION_BUDGETS": {},
+}
+
+# Serve GraphQL with the async view (core.views.AsyncGraphQLView). Set by core/asgi.py.
+GRAPHQL_ASYNC = os.environ.get("GRAPHQL_ASYNC") == "1"
+
+# Response cache for GraphQL queries, see core/cache.py.
+GRAPHQL_CACHE = {
+    "CACHE_ALIAS": "graphql",
+    "TIMEOUT": 300,
+    "ORGANIZATION_VARIABLE": "orgId",
+}
+
+
+# Per-request metrics, served in the Prometheus format at /metrics (see core/metrics.py).
+# The metrics of all workers are stored in the database (see core.models.Counter).
+METRICS = {
+    "FLUSH_INTERVAL": 10,
+    "MAX_SERIES": 500,
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
+
+# Benchmarks of the hot paths, see core/benchmarks.py and `manage.py benchmark`.
+BENCHMARKS = {
+    "BASELINES": BASE_DIR / "benchmarks.json",
+    "THRESHOLD": 0.25,
+}
+
+
+# Signed authentication tokens, see user/tokens.py.
+# The cache has to be shared by all workers, see core/caches.py.
+AUTH_TOKENS = {
+    "CACHE_ALIAS": "shared",
+    "LIFETIME": 14 * 24 * 60 * 60,
+    "EPOCH_TIMEOUT": 60 * 60,
+}
+
+AUTHENTICATION_BACKENDS = [
+    "django.contrib.auth.backends.ModelBackend",
+    "user.authentication.TokenBackend",
+]
+
+
+# The concurrency of password hashing, see user/hashing.py.
+# Run `manage.py calibrate_password_hasher` to measure the throughput of the host.
+PASSWORD_HASHING = {
+    "WORKERS": None,
+    "MAX_PENDING": 64,
+    "RETRY_AFTER": 1,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
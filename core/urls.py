@@ -15,9 +15,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from forms.views import compiled_form_view
+from user.views import token_view
+
+from .views import AsyncGraphQLView, GraphQLView, metrics_view
+
+# ASGI servers execute GraphQL on the event loop, WSGI servers synchronously.
+graphql_view = AsyncGraphQLView if settings.GRAPHQL_ASYNC else GraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view),
+    path("forms/compiled", compiled_form_view),
+    path("auth/token", token_view),
+    path("graphql/", csrf_exempt(graphql_view.as_view(graphiql=settings.DEBUG))),
 ]
@@ -0,0 +1,353 @@
+import inspect
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+)
+from django.utils.crypto import constant_time_compare
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView as BaseGraphQLView
+from graphene_django.views import HttpError
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+    validate_schema,
+)
+
+from . import metrics, routers
+from .cache import ResponseCache
+from .complexity import check_complexity
+from .documents import get_document, get_query
+
+
+def metrics_view(request):
+    """
+    Returns the metrics of all workers in the Prometheus text format (see core/metrics.py).
+    """
+    token = metrics.get_setting("TOKEN")
+
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+
+    # Includes the latest metrics of this worker.
+    metrics.buffer.flush()
+
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQL view which supports persisted queries, reuses parsed and validated documents
+    (see core/documents.py), rejects too complex queries (see core/complexity.py) and serves
+    repeated queries from the response cache (see core/cache.py).
+    """
+
+    def get_extensions(self, request, data) -> dict:
+        extensions = request.GET.get("extensions") or data.get("extensions")
+
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except Exception:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        return extensions
+
+    def get_document(self, request, data, query):
+        """
+        Returns the validated document of the request, or an ExecutionResult with the errors.
+        """
+        try:
+            query = get_query(query, self.get_extensions(request, data))
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        validation_rules = (
+            tuple(self.validation_rules) if self.validation_rules else None
+        )
+        document = get_document(schema, query, validation_rules)
+
+        if document.errors:
+            return ExecutionResult(data=None, errors=document.errors)
+
+        return document
+
+    def record_operation(self, request, operation_ast):
+        """
+        Labels the metrics of the request with the operation name (see core/metrics.py).
+        """
+        name = (
+            operation_ast.name.value
+            if operation_ast is not None and operation_ast.name
+            else "anonymous"
+        )
+        # Batches are recorded as a single request.
+        request.graphql_operation = (
+            "batch" if getattr(request, "graphql_operation", None) else name
+        )
+
+    def route_operation(self, operation_ast):
+        """
+        Queries read from a replica, mutations from the primary (see core/routers.py).
+        """
+        if operation_ast is not None and operation_ast.operation == OperationType.QUERY:
+            routers.use_replicas()
+        else:
+            routers.use_primary()
+
+    def check_method(self, request, operation_ast):
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+    def execute_document(self, request, document, variables, operation_name):
+        """
+        Executes a validated document. Returns an awaitable if a resolver did.
+        """
+        operation_ast = get_operation_ast(document.ast, operation_name)
+
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = (
+                    self.execution_context_class
+                )
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and self.atomic_mutations()
+            ):
+                with transaction.atomic():
+                    result = execute(
+                        self.schema.graphql_schema, document.ast, **execute_options
+                    )
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(self.schema.graphql_schema, document.ast, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    @staticmethod
+    def atomic_mutations() -> bool:
+        return (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+        )
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if not query and show_graphiql:
+            return None
+
+        document = self.get_document(request, data, query)
+
+        if isinstance(document, ExecutionResult):
+            return document
+
+        operation_ast = get_operation_ast(document.ast, operation_name)
+        self.record_operation(request, operation_ast)
+        self.route_operation(operation_ast)
+
+        try:
+            self.check_method(request, operation_ast)
+        except HttpError:
+            if show_graphiql:
+                return None
+            raise
+
+        try:
+            check_complexity(
+                self.schema.graphql_schema, document.ast, operation_name, variables
+            )
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        response_cache = ResponseCache(request, document, variables, operation_name)
+
+        cached_data = response_cache.get()
+
+        if cached_data is not None:
+            return ExecutionResult(data=cached_data)
+
+        result = self.execute_document(request, document, variables, operation_name)
+
+        if not result.errors:
+            response_cache.set(result.data)
+
+        return result
+
+
+class AsyncGraphQLView(GraphQLView):
+    """
+    GraphQL view for ASGI servers (see core/asgi.py), which executes the schema on the event loop.
+
+    Resolvers return awaitables when called from the event loop (see core/asynchronous.py), so a
+    request only occupies a worker thread while it is actually running queries. GraphiQL and
+    atomic mutations (settings.GRAPHENE["ATOMIC_MUTATIONS"]) are not supported on the event loop
+    and are served by the synchronous view in a worker thread instead.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Resolvers access the user without querying the session.
+        request.user = await request.auser()
+
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+
+            data = self.parse_body(request)
+
+            if (
+                self.graphiql and self.can_display_graphiql(request, data)
+            ) or self.atomic_mutations():
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            if self.batch:
+                responses = [
+                    await self.get_response_async(request, entry) for entry in data
+                ]
+                result = "[{}]".format(
+                    ",".join([response[0] for response in responses])
+                )
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.get_response_async(request, data)
+
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(
+                request, {"errors": [self.format_error(e)]}
+            )
+            return response
+
+    async def get_response_async(self, request, data):
+        """
+        The same as get_response(), but awaits the execution of the query.
+        """
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = await self.execute_graphql_request_async(
+            request, data, query, variables, operation_name
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        response = {}
+
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response), status_code
+
+    async def execute_graphql_request_async(
+        self, request, data, query, variables, operation_name
+    ):
+        document = self.get_document(request, data, query)
+
+        if isinstance(document, ExecutionResult):
+            return document
+
+        operation_ast = get_operation_ast(document.ast, operation_name)
+        self.record_operation(request, operation_ast)
+        self.route_operation(operation_ast)
+        self.check_method(request, operation_ast)
+
+        try:
+            check_complexity(
+                self.schema.graphql_schema, document.ast, operation_name, variables
+            )
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        response_cache = ResponseCache(request, document, variables, operation_name)
+
+        cached_data = await sync_to_async(response_cache.get)()
+
+        if cached_data is not None:
+            return ExecutionResult(data=cached_data)
+
+        # The execution returns an awaitable as soon as a resolver does.
+        result = self.execute_document(request, document, variables, operation_name)
+
+        if inspect.isawaitable(result):
+            try:
+                result = await result
+            except Exception as e:
+                result = ExecutionResult(errors=[e])
+
+        if not result.errors:
+            await sync_to_async(response_cache.set)(result.data)
+
+        return result
@@ -0,0 +1,193 @@
+"""
+Monthly activity of forms.
+
+Activity is counted in FormActivity rows (one per form and month) instead of on the form
+itself. The rolling window of the last 12 months is computed when it is read, and cached
+for a short time, as the counters change far more often than they are displayed.
+
+Views are counted whenever a form is opened, which otherwise only reads (see forms/views.py).
+They are buffered in memory by each worker and added to the database every VIEWS_FLUSH_INTERVAL
+seconds by a thread of the worker (see core/background.py), once per form and month.
+"""
+
+import threading
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from core.background import PeriodicTask
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FormActivity
+
+COUNTERS = ("submissions", "views")
+
+# The number of months returned by get_activity_metrics().
+MONTHS = 12
+
+# Seconds for which the activity metrics of a form are cached.
+CACHE_TIMEOUT = 60
+
+# Seconds between the flushes of the buffered views of a worker.
+VIEWS_FLUSH_INTERVAL = 10
+
+
+def month_bucket(when=None) -> date:
+    """
+    Returns the first day of the month of the given datetime (default: now).
+    """
+    when = timezone.localdate(when) if when else timezone.localdate()
+
+    return when.replace(day=1)
+
+
+def last_months(when=None) -> list[date]:
+    """
+    Returns the first days of the last MONTHS months (including the current one), oldest first.
+    """
+    month = month_bucket(when)
+    months = []
+
+    for _ in range(MONTHS):
+        months.append(month)
+        month = (month - timedelta(days=1)).replace(day=1)
+
+    months.reverse()
+
+    return months
+
+
+def record_activity(form_id: int, when=None, **counters: int):
+    """
+    Atomically increments the given counters of a form for the month of when (default: now).
+
+    Usage:
+
+    record_activity(form.id, submissions=1)
+    """
+    unknown = set(counters) - set(COUNTERS)
+
+    if unknown:
+        raise ValueError(f"Unknown activity counters: {', '.join(sorted(unknown))}.")
+
+    add_activity(form_id, month_bucket(when), counters)
+
+
+def add_activity(form_id: int, month: date, counters: dict):
+    increments = {name: F(name) + value for name, value in counters.items() if value}
+
+    if not increments:
+        return
+
+    activity = FormActivity.objects.filter(form_id=form_id, month=month)
+
+    if activity.update(**increments):
+        return
+
+    # This is the first activity of the month.
+    try:
+        with transaction.atomic():
+            FormActivity.objects.create(form_id=form_id, month=month, **counters)
+    except IntegrityError:
+        # Another request created the row in the meantime.
+        activity.update(**increments)
+
+
+class ViewBuffer:
+    """
+    The views of forms counted by this worker since its last flush.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {(form ID, month): views}
+        self.views = defaultdict(int)
+
+    def add(self, form_id: int, month: date):
+        with self.lock:
+            self.views[(form_id, month)] += 1
+
+    def flush(self):
+        with self.lock:
+            views, self.views = self.views, defaultdict(int)
+
+        items = list(views.items())
+
+        try:
+            while items:
+                (form_id, month), count = items[-1]
+                add_activity(form_id, month, {"views": count})
+                items.pop()
+        finally:
+            # The views which weren't added are added by the next flush.
+            with self.lock:
+                for key, count in items:
+                    self.views[key] += count
+
+
+view_buffer = ViewBuffer()
+
+flush_task = PeriodicTask(
+    "form-views-flush", view_buffer.flush, lambda: VIEWS_FLUSH_INTERVAL
+)
+
+
+def record_view(form_id: int):
+    """
+    Counts a view of a form without writing to the database (see the module's docstring).
+    """
+    flush_task.start()
+    view_buffer.add(int(form_id), month_bucket())
+
+
+def cache_key(form_id: int, month: date) -> str:
+    return f"form-activity:{form_id}:{month:%Y-%m}"
+
+
+def get_activity_metrics(form_ids: list[int]) -> dict:
+    """
+    Returns the activity of the last MONTHS months for each of the given forms, as
+    {form_id: [{"month": "YYYY-MM", "submissions": 0, "views": 0}, ...]}, oldest month first.
+
+    Forms whose metrics are not cached are loaded with a single query.
+    """
+    months = last_months()
+    keys = {form_id: cache_key(form_id, months[-1]) for form_id in form_ids}
+
+    cached = cache.get_many(keys.values())
+    metrics = {form_id: cached[key] for form_id, key in keys.items() if key in cached}
+
+    missing = [form_id for form_id in keys if form_id not in metrics]
+
+    if not missing:
+        return metrics
+
+    rows = FormActivity.objects.filter(
+        form_id__in=missing, month__gte=months[0]
+    ).values("form_id", "month", *COUNTERS)
+
+    activity = defaultdict(dict)
+
+    for row in rows:
+        activity[row["form_id"]][row["month"]] = row
+
+    for form_id in missing:
+        metrics[form_id] = [
+            {
+                "month": f"{month:%Y-%m}",
+                **{
+                    counter: activity[form_id].get(month, {}).get(counter, 0)
+                    for counter in COUNTERS
+                },
+            }
+            for month in months
+        ]
+
+    cache.set_many(
+        {keys[form_id]: metrics[form_id] for form_id in missing}, CACHE_TIMEOUT
+    )
+
+    return metrics
@@ -1,6 +1,9 @@
+from core.search import IndexedSearchMixin
 from django.contrib import admin
 
+from .compiled import schedule_compile_form
 from .models import KanbonForm
+from .search import form_search_index
 
 
 # class KanbonFieldInline(admin.TabularInline):
@@ -15,7 +18,7 @@ from .models import KanbonForm
 
 
 # Add KanbonFormAdmin
-class KanbonFormAdmin(admin.ModelAdmin):
+class KanbonFormAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "id",
         #'organization',
@@ -31,6 +34,13 @@ class KanbonFormAdmin(admin.ModelAdmin):
         "created_by__first_name",
         "created_by__last_name",
     )
+    # Searches are answered by the search index (see search.py), search_fields only enable the search box.
+    search_index = form_search_index
+
+    # Forms changed here are recompiled for the mobile app (see compiled.py).
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        schedule_compile_form(obj.pk)
 
     # inlines = [KanbonFieldInline]
 
@@ -0,0 +1,258 @@
+"""
+Benchmarks of the forms API (see core/benchmarks.py).
+
+The mutations and queries are executed through the schema (without the view and the response
+cache) as the admin --username of the organization --org-id. open_compiled_form opens an
+unchanged form, which is answered with 304 Not Modified. evaluate_conditions needs no options.
+"""
+
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.test import RequestFactory
+from graphene_django.settings import graphene_settings
+
+from core.benchmarks import benchmark
+
+from .conditions import ConditionPlan
+from .views import compiled_form_view
+
+REQUIRES = ("username", "org_id")
+
+CREATE_FORM = """
+mutation CreateForm($orgId: ID!, $name: String!) {
+  createKanbonForm(orgId: $orgId, formInput: {name: $name, status: "ACTIVE"}) { form { id } }
+}
+"""
+
+UPDATE_FORM = """
+mutation UpdateForm($orgId: ID!, $formId: ID!, $name: String!) {
+  updateKanbonForm(orgId: $orgId, formId: $formId, formInput: {name: $name}) { form { id } }
+}
+"""
+
+CREATE_FIELD = """
+mutation CreateField($orgId: ID!, $formId: ID!) {
+  createKanbonField(orgId: $orgId, formId: $formId, fieldInput: {title: "Title", fieldType: "TEXT"}) {
+    field { id }
+  }
+}
+"""
+
+CREATE_FIELDS = """
+mutation CreateFields($orgId: ID!, $formId: ID!, $fields: [KanbonFieldBatchInput!]!) {
+  createKanbonFields(orgId: $orgId, formId: $formId, fields: $fields) { fields { id } }
+}
+"""
+
+UPDATE_FIELD = """
+mutation UpdateField($orgId: ID!, $fieldId: ID!) {
+  updateKanbonField(orgId: $orgId, fieldId: $fieldId, fieldInput: {title: "Updated"}) {
+    field { id }
+  }
+}
+"""
+
+LIST_FORMS = """
+query Forms($orgId: ID!) {
+  kanbonForms(orgId: $orgId, first: 20) {
+    edges {
+      node {
+        id
+        name
+        fields {
+          edges {
+            node {
+              title
+              conditions { edges { node { operator compareTo { title } } } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class Context:
+    def __init__(self, options: dict):
+        self.org_id = options["org_id"]
+        self.user = get_user_model().objects.get(username=options["username"])
+
+    def execute(self, query: str, **variables) -> dict:
+        # Every execution gets its own request, like in production (e.g. the loaders are per request).
+        request = RequestFactory().post("/graphql")
+        request.user = self.user
+
+        result = graphene_settings.SCHEMA.execute(
+            query,
+            context_value=request,
+            variable_values={"orgId": self.org_id, **variables},
+        )
+
+        if result.errors:
+            raise CommandError(f"The benchmark failed: {result.errors}")
+
+        return result.data
+
+    def create_form(self) -> str:
+        data = self.execute(CREATE_FORM, name=f"Benchmark {uuid4().hex}")
+
+        return data["createKanbonForm"]["form"]["id"]
+
+    def create_field(self, form_id: str) -> str:
+        data = self.execute(CREATE_FIELD, formId=form_id)
+
+        return data["createKanbonField"]["field"]["id"]
+
+
+@benchmark(setup=Context, requires=REQUIRES)
+def create_kanbon_form(context: Context):
+    context.create_form()
+
+
+@benchmark(
+    setup=Context,
+    prepare=lambda context: (context, context.create_form()),
+    requires=REQUIRES,
+)
+def update_kanbon_form(argument):
+    context, form_id = argument
+    context.execute(UPDATE_FORM, formId=form_id, name=f"Benchmark {uuid4().hex}")
+
+
+@benchmark(
+    setup=Context,
+    prepare=lambda context: (context, context.create_form()),
+    requires=REQUIRES,
+)
+def create_kanbon_field(argument):
+    context, form_id = argument
+    context.create_field(form_id)
+
+
+@benchmark(
+    setup=Context,
+    prepare=lambda context: (context, context.create_field(context.create_form())),
+    requires=REQUIRES,
+)
+def update_kanbon_field(argument):
+    context, field_id = argument
+    context.execute(UPDATE_FIELD, fieldId=field_id)
+
+
+def setup_list_forms(options) -> Context:
+    """
+    Creates 20 forms with 5 fields each, every field but the first with a condition.
+    """
+    context = Context(options)
+
+    for _ in range(20):
+        fields = [
+            {
+                "clientId": str(i),
+                "fieldInput": {"title": f"Field {i}", "fieldType": "TEXT"},
+                "conditions": (
+                    [{"compareTo": str(i - 1), "operator": "EQUALS", "content": "yes"}]
+                    if i
+                    else []
+                ),
+            }
+            for i in range(5)
+        ]
+        context.execute(CREATE_FIELDS, formId=context.create_form(), fields=fields)
+
+    return context
+
+
+@benchmark(setup=setup_list_forms, requires=REQUIRES)
+def list_kanbon_forms(context: Context):
+    context.execute(LIST_FORMS)
+
+
+def setup_open_compiled_form(options) -> tuple:
+    """
+    Creates a form with 20 fields and returns the request of a client which has its current document.
+    """
+    context = Context(options)
+    form_id = context.create_form()
+    fields = [
+        {
+            "clientId": str(i),
+            "fieldInput": {"title": f"Field {i}", "fieldType": "TEXT"},
+            "conditions": (
+                [{"compareTo": str(i - 1), "operator": "EQUALS", "content": "yes"}]
+                if i
+                else []
+            ),
+        }
+        for i in range(20)
+    ]
+    context.execute(CREATE_FIELDS, formId=form_id, fields=fields)
+
+    path = f"/forms/compiled?orgId={context.org_id}&formId={form_id}"
+    response = compiled_form_view(open_compiled_form_request(context, path))
+
+    return context, path, response["ETag"]
+
+
+def open_compiled_form_request(context: Context, path: str, etag: str = None):
+    headers = {"Accept-Encoding": "gzip"}
+
+    if etag:
+        headers["If-None-Match"] = etag
+
+    request = RequestFactory().get(path, headers=headers)
+    request.user = context.user
+
+    return request
+
+
+@benchmark(
+    setup=setup_open_compiled_form,
+    prepare=lambda argument: open_compiled_form_request(*argument),
+    requires=REQUIRES,
+)
+def open_compiled_form(request):
+    compiled_form_view(request)
+
+
+def setup_evaluate_conditions(options) -> tuple:
+    """
+    Compiles the plan of a form with 50 fields, every field but the first depending on the
+    previous one, and 1,000 submissions in columnar form.
+    """
+    document = {
+        "fields": [
+            {
+                "id": f"field-{i}",
+                "isRequired": True,
+                "conditions": (
+                    [
+                        {
+                            "compareTo": f"field-{i - 1}",
+                            "operator": "NOT_EQUALS",
+                            "content": "no",
+                        }
+                    ]
+                    if i
+                    else []
+                ),
+            }
+            for i in range(50)
+        ]
+    }
+    columns = {
+        f"field-{i}": [("yes", "no", None)[(i + j) % 3] for j in range(1000)]
+        for i in range(50)
+    }
+
+    return ConditionPlan(document), columns
+
+
+@benchmark(setup=setup_evaluate_conditions)
+def evaluate_conditions(argument):
+    plan, columns = argument
+    plan.evaluate_batch(columns, 1000)
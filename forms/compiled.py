@@ -0,0 +1,176 @@
+"""
+Compiled documents of forms for the mobile app.
+
+Opening a form used to resolve the form, its fields and their conditions through the schema.
+Instead, every active form is compiled into a single JSON document (the form with its fields in
+field_order and their conditions), which is stored gzip-compressed in CompiledForm:
+
+- The forms mutations recompile the document of the changed form, once their transaction is
+  committed (see invalidate_form_cache() in forms/schema.py). Recompiling an unchanged form
+  doesn't store a new version.
+- The document is served by compiled_form_view (see forms/views.py) with a strong ETag (the
+  hash of the document), so clients which send If-None-Match receive 304 Not Modified.
+  Opening a form costs a single lookup by primary key and no serialization.
+
+Inactive and deleted forms have no document. `manage.py compile_forms` compiles all forms,
+e.g. after forms were changed in the admin.
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from graphql_relay import to_global_id
+
+from .models import CompiledForm, Condition, KanbonField, KanbonForm
+
+# The length of the ETags (hex digits of the document's SHA-256 hash).
+ETAG_LENGTH = 32
+
+
+def order_fields(form: KanbonForm, fields: list[KanbonField]) -> list[KanbonField]:
+    """
+    Orders the fields by the form's field_order, which references fields by client_id, global ID or ID.
+    Fields which are not part of the field order follow in the order of their creation.
+    """
+    positions = {}
+
+    for position, reference in enumerate(form.field_order or []):
+        positions.setdefault(str(reference), position)
+
+    def position(field: KanbonField) -> tuple:
+        for reference in (
+            field.client_id,
+            to_global_id("KanbonFieldType", field.pk),
+            str(field.pk),
+        ):
+            if reference in positions:
+                return (0, positions[reference], field.pk)
+
+        return (1, 0, field.pk)
+
+    return sorted(fields, key=position)
+
+
+def build_document(
+    form: KanbonForm, fields: list[KanbonField], conditions: list[Condition]
+) -> dict:
+    """
+    Returns the document of a form. Keys are named like the fields of the schema.
+    """
+    conditions_by_field = {}
+
+    for condition in conditions:
+        conditions_by_field.setdefault(condition.field_id, []).append(
+            {
+                "compareTo": (
+                    to_global_id("KanbonFieldType", condition.compare_to_id)
+                    if condition.compare_to_id
+                    else None
+                ),
+                "operator": condition.operator,
+                "content": condition.content,
+            }
+        )
+
+    return {
+        "id": to_global_id("KanbonFormType", form.pk),
+        "name": form.name,
+        "description": form.description,
+        "status": form.status,
+        "fieldOrder": form.field_order,
+        "fields": [
+            {
+                "id": to_global_id("KanbonFieldType", field.pk),
+                "clientId": field.client_id,
+                "title": field.title,
+                "helpText": field.help_text,
+                "isRequired": field.is_required,
+                "fieldType": field.field_type,
+                "fieldOptions": field.field_options,
+                "conditions": conditions_by_field.get(field.pk, []),
+            }
+            for field in order_fields(form, fields)
+        ],
+    }
+
+
+def serialize(document: dict) -> bytes:
+    """
+    Serializes a document deterministically, so unchanged documents have the same ETag.
+    """
+    return json.dumps(
+        document,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode()
+
+
+def compile_form(form_id, organization_id=None) -> CompiledForm:
+    """
+    Compiles the document of a form and stores it as a new version if it changed.
+    Returns None (and removes the document) if the form is inactive or deleted.
+
+    If organization_id is given, only a form of that organization is compiled. Forms of other
+    organizations are neither compiled nor removed (returns None).
+
+    Reads from the primary, so the document never lags behind the form (see core/routers.py).
+    """
+    forms = KanbonForm.objects.using(DEFAULT_DB_ALIAS)
+    compiled_forms = CompiledForm.objects.using(DEFAULT_DB_ALIAS)
+
+    if organization_id is not None:
+        forms = forms.filter(organization_id=organization_id)
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        form = forms.alive().filter(pk=form_id, status="ACTIVE").first()
+
+        if form is None:
+            if organization_id is None:
+                compiled_forms.filter(form_id=form_id).delete()
+
+            return None
+
+        fields = list(
+            KanbonField.objects.using(DEFAULT_DB_ALIAS).alive().filter(form=form)
+        )
+        conditions = list(
+            Condition.objects.using(DEFAULT_DB_ALIAS)
+            .filter(field__in=[field.pk for field in fields])
+            .order_by("id")
+        )
+
+        content = serialize(build_document(form, fields, conditions))
+        etag = hashlib.sha256(content).hexdigest()[:ETAG_LENGTH]
+
+        compiled = compiled_forms.select_for_update().filter(form=form).first()
+
+        if compiled is None:
+            compiled = CompiledForm(form=form, version=0)
+        elif compiled.etag == etag:
+            return compiled
+
+        compiled.version += 1
+        compiled.etag = etag
+        # mtime=0 keeps the compressed document deterministic.
+        compiled.content = gzip.compress(content, mtime=0)
+
+        try:
+            # Concurrent compilations of a new form may both try to create its document.
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                compiled.save(using=DEFAULT_DB_ALIAS)
+        except IntegrityError:
+            return compiled_forms.get(form=form)
+
+    return compiled
+
+
+def schedule_compile_form(form_id):
+    """
+    Recompiles the document of a form, once the current transaction is committed.
+    """
+    transaction.on_commit(lambda: compile_form(form_id))
@@ -0,0 +1,428 @@
+"""
+Server-side evaluation of the conditions of forms.
+
+A field with conditions is only visible if all of its conditions hold. A condition compares the
+answer of another field (compare_to) with its content using its operator (see OPERATORS). The
+answers of hidden fields count as empty, so fields which depend on hidden fields are evaluated
+accordingly. Required fields are only required while they are visible.
+
+The conditions of a form are compiled into a ConditionPlan: the conditions are ordered by their
+dependencies and translated into the source of two Python functions, which are compiled once
+per plan. One evaluates a single submission, the other a batch of submissions in columnar form
+(a list of answers per field), evaluating every condition with a single list comprehension over
+the batch. Evaluating submissions therefore doesn't interpret operators or walk the conditions.
+
+Plans are built from the compiled documents of forms (see forms/compiled.py) and cached per
+document version, so a plan is only compiled again once its form changed.
+
+Answers are keyed by the global IDs of the fields (the "id" of the fields in the document).
+Conditions with unknown operators never hold. Fields whose conditions depend on each other in a
+cycle are never visible.
+"""
+
+import gzip
+import json
+from functools import lru_cache
+
+from .compiled import compile_form
+from .models import CompiledForm
+
+# The number of plans cached per process.
+CACHE_SIZE = 256
+
+
+def number(value):
+    """
+    Returns the value as a float, or None if it isn't a number.
+    """
+    if isinstance(value, bool):
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def contains(answer, content) -> bool:
+    if isinstance(answer, str):
+        return isinstance(content, str) and content in answer
+
+    return isinstance(answer, list) and content in answer
+
+
+def greater(answer, content) -> bool:
+    answer = number(answer)
+
+    return answer is not None and answer > content
+
+
+def greater_or_equal(answer, content) -> bool:
+    answer = number(answer)
+
+    return answer is not None and answer >= content
+
+
+def less(answer, content) -> bool:
+    answer = number(answer)
+
+    return answer is not None and answer < content
+
+
+def less_or_equal(answer, content) -> bool:
+    answer = number(answer)
+
+    return answer is not None and answer <= content
+
+
+EMPTY = '({a} is None or {a} == "" or {a} == [])'
+
+# {operator: (expression template, whether the content is a number)}
+# In the templates, {a} is the answer of the compared field and {c} the content of the condition.
+OPERATORS = {
+    "EQUALS": ("{a} == {c}", False),
+    "NOT_EQUALS": ("{a} != {c}", False),
+    "IN": ("{a} in {c}", False),
+    "NOT_IN": ("{a} not in {c}", False),
+    "CONTAINS": ("contains({a}, {c})", False),
+    "NOT_CONTAINS": ("not contains({a}, {c})", False),
+    "GREATER_THAN": ("greater({a}, {c})", True),
+    "GREATER_THAN_OR_EQUAL": ("greater_or_equal({a}, {c})", True),
+    "LESS_THAN": ("less({a}, {c})", True),
+    "LESS_THAN_OR_EQUAL": ("less_or_equal({a}, {c})", True),
+    "IS_EMPTY": (EMPTY, False),
+    "IS_NOT_EMPTY": ("not " + EMPTY, False),
+}
+
+HELPERS = {
+    "contains": contains,
+    "greater": greater,
+    "greater_or_equal": greater_or_equal,
+    "less": less,
+    "less_or_equal": less_or_equal,
+}
+
+
+class Evaluation:
+    """
+    The result of evaluating a single submission.
+    """
+
+    def __init__(self, visible: set, missing: list):
+        # The IDs of the visible fields.
+        self.visible = visible
+        # The IDs of the visible, required fields without an answer.
+        self.missing = missing
+
+    @property
+    def valid(self) -> bool:
+        return not self.missing
+
+
+class BatchEvaluation:
+    """
+    The result of evaluating a batch of submissions, in columnar form.
+    """
+
+    def __init__(self, count: int, visible: dict, missing: dict):
+        self.count = count
+        # {field ID: [whether the field is visible in each submission]}
+        self.visible = visible
+        # {required field ID: [whether the field is visible and unanswered in each submission]}
+        self.missing = missing
+
+    @property
+    def valid(self) -> list[bool]:
+        if not self.missing:
+            return [True] * self.count
+
+        return [not any(row) for row in zip(*self.missing.values())]
+
+
+class ConditionPlan:
+    """
+    The compiled conditions of a form (see the module's docstring).
+    """
+
+    def __init__(self, document: dict):
+        fields = document["fields"]
+        self.field_ids = [field["id"] for field in fields]
+        self.required = {field["id"] for field in fields if field["isRequired"]}
+        self.constants = {}
+
+        index = {field_id: i for i, field_id in enumerate(self.field_ids)}
+        # {field index: [(compared field index or None, operator, content)]}
+        conditions = {
+            i: [
+                (
+                    index.get(condition["compareTo"]),
+                    str(condition["operator"]).upper(),
+                    condition["content"],
+                )
+                for condition in field["conditions"]
+            ]
+            for i, field in enumerate(fields)
+        }
+        self.order, self.cyclic = self.dependency_order(conditions)
+
+        # The variables of the generated functions are named after the field's index:
+        # k<i> is the field's ID, v<i> whether it is visible and a<i> its answer (None if hidden).
+        for i, field_id in enumerate(self.field_ids):
+            self.constants[f"k{i}"] = field_id
+
+        self.evaluate_one = self.compile_function(
+            "evaluate_one", self.row_source(conditions)
+        )
+        self.evaluate_columns = self.compile_function(
+            "evaluate_columns", self.columns_source(conditions)
+        )
+
+    @staticmethod
+    def dependency_order(conditions: dict) -> tuple[list, set]:
+        """
+        Returns the field indexes ordered so that every field follows the fields it compares to,
+        and the indexes of the fields which depend on themselves (directly or indirectly).
+        """
+        order = []
+        # 1: being visited, 2: done
+        state = {}
+        cyclic = set()
+
+        def visit(i, path: list):
+            if state.get(i) == 2:
+                return
+
+            if state.get(i) == 1:
+                cyclic.update(path[path.index(i) :])
+                return
+
+            state[i] = 1
+            path.append(i)
+
+            for compare_to, _, _ in conditions[i]:
+                if compare_to is not None:
+                    visit(compare_to, path)
+
+            path.pop()
+            state[i] = 2
+            order.append(i)
+
+        for i in conditions:
+            visit(i, [])
+
+        return order, cyclic
+
+    def condition_expression(
+        self, condition_index: int, operator: str, content, answer: str
+    ) -> str:
+        """
+        Returns the expression of a condition on the answer variable.
+        """
+        if operator not in OPERATORS:
+            return "False"
+
+        template, numeric = OPERATORS[operator]
+
+        if numeric:
+            content = number(content)
+
+            if content is None:
+                return "False"
+
+        if operator in ("IN", "NOT_IN") and not isinstance(content, list):
+            content = [content]
+
+        name = f"c{condition_index}"
+        self.constants[name] = content
+
+        return "(" + template.format(a=answer, c=name) + ")"
+
+    def row_source(self, conditions: dict) -> list[str]:
+        lines = ["def evaluate_one(answers):", "    get = answers.get"]
+        condition_index = 0
+
+        for i in self.order:
+            if i in self.cyclic:
+                lines += [f"    v{i} = False", f"    a{i} = None"]
+                continue
+
+            expressions = []
+
+            for compare_to, operator, content in conditions[i]:
+                answer = f"a{compare_to}" if compare_to is not None else "None"
+                expressions.append(
+                    self.condition_expression(
+                        condition_index, operator, content, answer
+                    )
+                )
+                condition_index += 1
+
+            lines.append(f"    v{i} = {' and '.join(expressions) or 'True'}")
+            lines.append(f"    a{i} = get(k{i}) if v{i} else None")
+
+        lines.append("    missing = []")
+
+        for i, field_id in enumerate(self.field_ids):
+            if field_id in self.required:
+                empty = EMPTY.format(a=f"a{i}")
+                lines.append(f"    if v{i} and {empty}:")
+                lines.append(f"        missing.append(k{i})")
+
+        visible = ", ".join(f"v{i}" for i in range(len(self.field_ids)))
+        lines.append(f"    return ({visible},), missing")
+
+        return lines
+
+    def columns_source(self, conditions: dict) -> list[str]:
+        lines = [
+            "def evaluate_columns(columns, count):",
+            "    get = columns.get",
+            "    none = [None] * count",
+        ]
+        condition_index = 0
+
+        for i in self.order:
+            if i in self.cyclic:
+                lines += [f"    v{i} = [False] * count", f"    a{i} = none"]
+                continue
+
+            if not conditions[i]:
+                lines += [f"    v{i} = [True] * count", f"    a{i} = get(k{i}, none)"]
+                continue
+
+            # Every compared field is bound to a loop variable x<j> of the comprehension.
+            compared = list(
+                dict.fromkeys(
+                    compare_to
+                    for compare_to, _, _ in conditions[i]
+                    if compare_to is not None
+                )
+            )
+            expressions = []
+
+            for compare_to, operator, content in conditions[i]:
+                answer = (
+                    f"x{compared.index(compare_to)}"
+                    if compare_to is not None
+                    else "None"
+                )
+                expressions.append(
+                    self.condition_expression(
+                        condition_index, operator, content, answer
+                    )
+                )
+                condition_index += 1
+
+            expression = " and ".join(expressions)
+
+            if not compared:
+                lines.append(f"    v{i} = [bool({expression})] * count")
+            elif len(compared) == 1:
+                lines.append(f"    v{i} = [{expression} for x0 in a{compared[0]}]")
+            else:
+                variables = ", ".join(f"x{j}" for j in range(len(compared)))
+                columns = ", ".join(f"a{j}" for j in compared)
+                lines.append(
+                    f"    v{i} = [{expression} for {variables} in zip({columns})]"
+                )
+
+            lines.append(
+                f"    a{i} = [x if v else None for x, v in zip(get(k{i}, none), v{i})]"
+            )
+
+        lines.append("    missing = {}")
+
+        for i, field_id in enumerate(self.field_ids):
+            if field_id in self.required:
+                empty = EMPTY.format(a="x")
+                lines.append(
+                    f"    missing[k{i}] = [v and {empty} for v, x in zip(v{i}, a{i})]"
+                )
+
+        visible = ", ".join(f"k{i}: v{i}" for i in range(len(self.field_ids)))
+        lines.append(f"    return {{{visible}}}, missing")
+
+        return lines
+
+    def compile_function(self, name: str, lines: list[str]):
+        # The contents are passed as constants, only names and operators are part of the source.
+        namespace = {**HELPERS, **self.constants}
+        exec(compile("\n".join(lines), f"<{name}>", "exec"), namespace)
+
+        return namespace[name]
+
+    def evaluate(self, answers: dict) -> Evaluation:
+        """
+        Evaluates a single submission ({field ID: answer}).
+        """
+        visible, missing = self.evaluate_one(answers)
+
+        return Evaluation(
+            {field_id for field_id, v in zip(self.field_ids, visible) if v}, missing
+        )
+
+    def evaluate_batch(self, columns: dict, count: int) -> BatchEvaluation:
+        """
+        Evaluates a batch of count submissions in columnar form ({field ID: [answer, ...]}).
+        Missing columns count as unanswered.
+        """
+        visible, missing = self.evaluate_columns(columns, count)
+
+        return BatchEvaluation(count, visible, missing)
+
+    def evaluate_many(self, submissions: list[dict]) -> BatchEvaluation:
+        """
+        Evaluates a list of submissions ({field ID: answer}) as a batch.
+        """
+        columns = {
+            field_id: [submission.get(field_id) for submission in submissions]
+            for field_id in self.field_ids
+        }
+
+        return self.evaluate_batch(columns, len(submissions))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def load_plan(form_id: int, etag: str) -> ConditionPlan:
+    content = (
+        CompiledForm.objects.filter(form_id=form_id, etag=etag)
+        .values_list("content", flat=True)
+        .first()
+    )
+
+    if content is None:
+        raise CompiledForm.DoesNotExist
+
+    return ConditionPlan(json.loads(gzip.decompress(content)))
+
+
+def get_plan(form_id: int) -> ConditionPlan:
+    """
+    Returns the cached plan of an active form, or None if the form is inactive or deleted.
+    Costs a single query while the form is unchanged.
+    """
+    form_id = int(form_id)
+    etag = (
+        CompiledForm.objects.filter(form_id=form_id)
+        .values_list("etag", flat=True)
+        .first()
+    )
+
+    if etag is not None:
+        try:
+            return load_plan(form_id, etag)
+        except CompiledForm.DoesNotExist:
+            # The form was recompiled since the etag was read (or the replica lags behind).
+            pass
+
+    compiled = compile_form(form_id)
+
+    if compiled is None:
+        return None
+
+    try:
+        return load_plan(form_id, compiled.etag)
+    except CompiledForm.DoesNotExist:
+        # Replaced again already, so the plan is built for the document which was compiled
+        # instead of retrying (a form which changes constantly would never be loaded).
+        return ConditionPlan(json.loads(gzip.decompress(compiled.content)))
@@ -0,0 +1,184 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from core.asynchronous import in_event_loop
+from django.contrib.auth import get_user_model
+
+from .activity import get_activity_metrics
+from .models import Condition, KanbonField
+
+
+class DataLoader:
+    """
+    A minimal, synchronous data loader.
+
+    graphql-core resolves list items one after another, so a loader cannot wait for
+    sibling objects to ask for their keys. Instead, whoever knows the siblings
+    (usually the parent connection) enqueues their keys up front, and the first
+    load() that misses the cache resolves all queued keys with a single batch_load().
+
+    Loaders live on info.context and therefore only cache for a single request.
+
+    On the event loop (see core.views.AsyncGraphQLView), aload() runs the batch in a worker thread.
+    """
+
+    def __init__(self, loaders: "Loaders"):
+        self.loaders = loaders
+        self._cache = {}
+        # A dict is used as an insertion ordered set.
+        self._queue = {}
+        self._lock = None
+
+    def batch_load(self, keys: list) -> dict:
+        """
+        Returns a dict mapping each key to its value. Keys missing from the dict
+        resolve to empty().
+        """
+        raise NotImplementedError
+
+    def empty(self):
+        return None
+
+    def enqueue(self, keys):
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._queue[key] = None
+
+    def prime(self, key, value):
+        self._cache.setdefault(key, value)
+
+    def load(self, key):
+        if key not in self._cache:
+            self._queue[key] = None
+            self.dispatch()
+
+        return self._cache[key]
+
+    async def aload(self, key):
+        if key not in self._cache:
+            self.enqueue([key])
+
+            # Siblings wait for the batch which is already being loaded instead of dispatching
+            # their own.
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+
+            async with self._lock:
+                if key not in self._cache:
+                    await sync_to_async(self.dispatch)()
+
+        return self._cache[key]
+
+    def resolve(self, key):
+        """
+        Returns load(key), or the awaitable aload(key) if called from the event loop and the
+        key isn't loaded yet.
+        """
+        if key in self._cache or not in_event_loop():
+            return self.load(key)
+
+        return self.aload(key)
+
+    def load_many(self, keys) -> list:
+        keys = list(keys)
+        self.enqueue(keys)
+        self.dispatch()
+
+        return [self._cache[key] for key in keys]
+
+    def dispatch(self):
+        if not self._queue:
+            return
+
+        keys = list(self._queue)
+        self._queue.clear()
+
+        results = self.batch_load(keys)
+
+        for key in keys:
+            self._cache[key] = results[key] if key in results else self.empty()
+
+
+class UserLoader(DataLoader):
+    def batch_load(self, keys):
+        return get_user_model().objects.in_bulk(keys)
+
+
+class FieldLoader(DataLoader):
+    def batch_load(self, keys):
+        return KanbonField.objects.in_bulk(keys)
+
+
+class FieldsByFormLoader(DataLoader):
+    def empty(self):
+        return []
+
+    def batch_load(self, keys):
+        fields = KanbonField.objects.alive().filter(form_id__in=keys).order_by("id")
+
+        fields_by_form = defaultdict(list)
+
+        for field in fields:
+            fields_by_form[field.form_id].append(field)
+            self.loaders.fields.prime(field.pk, field)
+
+        # The conditions of these fields are very likely to be requested next.
+        self.loaders.conditions_by_field.enqueue(
+            field.pk for form_fields in fields_by_form.values() for field in form_fields
+        )
+
+        return fields_by_form
+
+
+class ConditionsByFieldLoader(DataLoader):
+    def empty(self):
+        return []
+
+    def batch_load(self, keys):
+        conditions = Condition.objects.filter(field_id__in=keys).order_by("id")
+
+        conditions_by_field = defaultdict(list)
+
+        for condition in conditions:
+            conditions_by_field[condition.field_id].append(condition)
+
+        # Fields referenced by the conditions are resolved together as well.
+        self.loaders.fields.enqueue(
+            condition.compare_to_id
+            for field_conditions in conditions_by_field.values()
+            for condition in field_conditions
+        )
+
+        return conditions_by_field
+
+
+class ActivityMetricsLoader(DataLoader):
+    def batch_load(self, keys):
+        return get_activity_metrics(keys)
+
+
+class Loaders:
+    """
+    All data loaders of a single request.
+    """
+
+    def __init__(self):
+        self.users = UserLoader(self)
+        self.fields = FieldLoader(self)
+        self.fields_by_form = FieldsByFormLoader(self)
+        self.conditions_by_field = ConditionsByFieldLoader(self)
+        self.activity_metrics = ActivityMetricsLoader(self)
+
+
+def get_loaders(info) -> Loaders:
+    """
+    Returns the loaders of the current request, creating them on first use.
+    """
+    loaders = getattr(info.context, "loaders", None)
+
+    if loaders is None:
+        loaders = Loaders()
+        info.context.loaders = loaders
+
+    return loaders
@@ -0,0 +1,135 @@
+"""
+Runs the benchmarks of the hot paths and compares them with the committed baselines
+(see core/benchmarks.py). Exits with an error if a benchmark regressed.
+
+The benchmarks of the forms API need an admin (--username) of an organization (--org-id),
+otherwise they are skipped.
+
+Examples:
+
+python manage.py benchmark --username admin --org-id T3JnYW5pemF0aW9uVHlwZTox
+python manage.py benchmark user. --update-baselines
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Runs the benchmarks and compares them with the baselines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Only run the benchmarks whose names start with one of these prefixes.",
+        )
+        parser.add_argument("--username")
+        parser.add_argument("--org-id")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="The number of measured calls per benchmark.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=benchmarks.get_setting("THRESHOLD"),
+            help="The relative increase of time or allocations which fails a benchmark.",
+        )
+        parser.add_argument(
+            "--check-time",
+            action="store_true",
+            default=benchmarks.get_setting("CHECK_TIME"),
+            help="Fail benchmarks whose time regressed, instead of only reporting it.",
+        )
+        parser.add_argument(
+            "--update-baselines",
+            action="store_true",
+            help="Save the results of the benchmarks which ran as their new baselines.",
+        )
+
+    def handle(self, *args, **options):
+        # Registers the benchmarks of all apps.
+        autodiscover_modules("benchmarks")
+
+        selected = [
+            benchmark
+            for name, benchmark in sorted(benchmarks.registry.items())
+            if not options["names"]
+            or any(name.startswith(prefix) for prefix in options["names"])
+        ]
+
+        if not selected:
+            raise CommandError("No benchmarks match the given names.")
+
+        if options["update_baselines"] and not benchmarks.get_setting("BASELINES"):
+            raise CommandError('settings.BENCHMARKS["BASELINES"] is not set.')
+
+        baselines = benchmarks.load_baselines()
+        failed = []
+
+        self.stdout.write(
+            f"{'benchmark':<30} {'time ms':>9} {'alloc KiB':>10} {'queries':>8}  result"
+        )
+
+        for benchmark in selected:
+            missing = [option for option in benchmark.requires if not options[option]]
+
+            if missing:
+                flags = ", ".join(f"--{option.replace('_', '-')}" for option in missing)
+                self.stdout.write(f"{benchmark.name:<30} skipped (requires {flags})")
+                continue
+
+            # Nothing the benchmarks write is kept.
+            with transaction.atomic():
+                result = benchmark.run(options, options["repeat"])
+                transaction.set_rollback(True)
+
+            baseline = baselines.get(benchmark.name)
+
+            if options["update_baselines"]:
+                status = "baseline updated"
+                baselines[benchmark.name] = result
+            elif baseline is None:
+                status = "no baseline"
+            else:
+                checked = ("allocated_kib",)
+
+                if options["check_time"]:
+                    checked += ("time_ms",)
+
+                found = benchmarks.regressions(
+                    result, baseline, options["threshold"], checked
+                )
+                # Time regressions which don't fail the benchmark are reported as warnings.
+                slower = [
+                    regression
+                    for regression in benchmarks.regressions(
+                        result, baseline, options["threshold"], ("time_ms",)
+                    )
+                    if regression not in found
+                ]
+
+                status = self.style.ERROR(", ".join(found)) if found else "ok"
+
+                if slower:
+                    status += self.style.WARNING(f" ({', '.join(slower)}, not checked)")
+
+                if found:
+                    failed.append(benchmark.name)
+
+            self.stdout.write(
+                f"{benchmark.name:<30} {result['time_ms']:>9.2f} {result['allocated_kib']:>10.1f} "
+                f"{result['queries']:>8}  {status}"
+            )
+
+        if options["update_baselines"]:
+            benchmarks.save_baselines(baselines)
+
+        if failed:
+            raise CommandError(f"Regressions: {', '.join(failed)}")
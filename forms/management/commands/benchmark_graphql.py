@@ -0,0 +1,185 @@
+"""
+Compares the throughput of the GraphQL endpoint under WSGI (core.views.GraphQLView, one thread
+per request) and ASGI (core.views.AsyncGraphQLView, executed on the event loop) at increasing
+numbers of concurrent requests.
+
+Both views are called in-process through Django's test clients, so the numbers don't include
+the HTTP server. The WSGI server is simulated with a pool of --wsgi-threads threads (e.g. gunicorn
+with one worker and that many threads). As local databases answer much faster than a database
+server, a latency can be added to every query with --db-latency.
+
+Example:
+
+python manage.py benchmark_graphql --username admin --org-id T3JnYW5pemF0aW9uVHlwZTox --db-latency 5
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from core.views import AsyncGraphQLView, GraphQLView
+
+urlpatterns = [
+    path("wsgi/", csrf_exempt(GraphQLView.as_view())),
+    path("asgi/", csrf_exempt(AsyncGraphQLView.as_view())),
+]
+
+DEFAULT_QUERY = """
+query Forms($orgId: ID!, $first: Int) {
+  kanbonForms(orgId: $orgId, first: $first) {
+    edges {
+      node {
+        id
+        name
+        createdBy { firstName }
+        fields {
+          edges {
+            node {
+              title
+              conditions { edges { node { operator compareTo { title } } } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the GraphQL endpoint under WSGI and ASGI at increasing concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True)
+        parser.add_argument(
+            "--org-id", required=True, help="Global ID of the organization."
+        )
+        parser.add_argument("--query-file", help="Defaults to a list of 20 forms.")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", default="1,4,16,64")
+        parser.add_argument("--wsgi-threads", type=int, default=4)
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="Milliseconds added to every query.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist.")
+
+        if options["query_file"]:
+            with open(options["query_file"]) as file:
+                query = file.read()
+        else:
+            query = DEFAULT_QUERY
+
+        self.payload = {
+            "query": query,
+            "variables": {"orgId": options["org_id"], "first": 20},
+        }
+
+        if options["db_latency"]:
+            latency = options["db_latency"] / 1000
+
+            def delay(execute, sql, params, many, context):
+                time.sleep(latency)
+                return execute(sql, params, many, context)
+
+            # Every thread has its own connection.
+            def add_latency(sender, connection, **kwargs):
+                connection.execute_wrappers.append(delay)
+
+            connection_created.connect(add_latency, weak=False)
+
+        # Responses are not cached, so that every request executes the query.
+        with override_settings(
+            ROOT_URLCONF=__name__,
+            ALLOWED_HOSTS=["testserver"],
+            GRAPHQL_CACHE={"TIMEOUT": 0},
+        ):
+            self.stdout.write(
+                f"{'concurrency':>11} {'wsgi req/s':>11} {'asgi req/s':>11} {'speedup':>8}"
+            )
+
+            for concurrency in [int(c) for c in options["concurrency"].split(",")]:
+                wsgi = self.run_wsgi(
+                    options["requests"], concurrency, options["wsgi_threads"]
+                )
+                asgi = asyncio.run(self.run_asgi(options["requests"], concurrency))
+
+                self.stdout.write(
+                    f"{concurrency:>11} {wsgi:>11.1f} {asgi:>11.1f} {asgi / wsgi:>7.2f}x"
+                )
+
+    def check_response(self, response):
+        if response.status_code != 200 or "errors" in response.json():
+            raise CommandError(f"The query failed: {response.content.decode()}")
+
+    def run_wsgi(self, requests: int, concurrency: int, threads: int) -> float:
+        """
+        Returns the number of requests per second.
+        """
+
+        def send(clients):
+            client = clients.pop()
+            self.check_response(
+                client.post("/wsgi/", self.payload, content_type="application/json")
+            )
+            clients.append(client)
+
+        clients = []
+
+        for _ in range(concurrency):
+            client = Client()
+            client.force_login(self.user)
+            clients.append(client)
+
+        # Requests beyond the number of threads wait for a free thread.
+        with ThreadPoolExecutor(max_workers=min(concurrency, threads)) as executor:
+            start = time.perf_counter()
+            list(executor.map(lambda _: send(clients), range(requests)))
+
+            return requests / (time.perf_counter() - start)
+
+    async def run_asgi(self, requests: int, concurrency: int) -> float:
+        """
+        Returns the number of requests per second.
+        """
+        clients = asyncio.Queue()
+
+        for _ in range(concurrency):
+            client = AsyncClient()
+            await client.aforce_login(self.user)
+            clients.put_nowait(client)
+
+        async def send():
+            client = await clients.get()
+
+            # Like the ASGI handler, every request gets its own worker thread.
+            async with ThreadSensitiveContext():
+                response = await client.post(
+                    "/asgi/", self.payload, content_type="application/json"
+                )
+
+            self.check_response(response)
+            clients.put_nowait(client)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(requests)))
+
+        return requests / (time.perf_counter() - start)
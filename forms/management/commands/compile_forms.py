@@ -0,0 +1,22 @@
+"""
+Compiles the documents of all forms for the mobile app (see forms/compiled.py), e.g. after forms
+were changed outside of the forms mutations. Unchanged documents keep their version.
+"""
+
+from django.core.management.base import BaseCommand
+
+from forms.compiled import compile_form
+from forms.models import KanbonForm
+
+
+class Command(BaseCommand):
+    help = "Compiles the documents of all forms."
+
+    def handle(self, *args, **options):
+        compiled = 0
+
+        for form_id in KanbonForm.objects.values_list("id", flat=True).iterator():
+            if compile_form(form_id):
+                compiled += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Compiled {compiled} forms."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0002_kanbonfield_condition"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kanbonform",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["-updated_at", "-id"],
+                name="form_alive_updated_idx",
+            ),
+        ),
+    ]
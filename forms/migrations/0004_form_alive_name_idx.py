@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0003_form_alive_updated_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kanbonform",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["name"],
+                name="form_alive_name_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:55
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COUNTERS = ("submissions", "views")
+
+
+def parse_month(value):
+    """
+    Returns the first day of the month of "YYYY-MM" or "YYYY-MM-DD", or None.
+    """
+    try:
+        return datetime.date.fromisoformat(f"{str(value)[:7]}-01")
+    except ValueError:
+        return None
+
+
+def copy_activity_metrics(apps, schema_editor):
+    """
+    Copies the monthly activity from the activity_metrics JSON of the forms into FormActivity.
+    Entries are expected as {"month": "YYYY-MM", "submissions": 0, "views": 0} (the format
+    of the activity_metrics field of the schema). Entries without a valid month are skipped.
+    """
+    KanbonForm = apps.get_model("forms", "KanbonForm")
+    FormActivity = apps.get_model("forms", "FormActivity")
+
+    forms = KanbonForm.objects.exclude(activity_metrics=None).values_list(
+        "id", "activity_metrics"
+    )
+
+    for form_id, metrics in forms.iterator():
+        activity = {}
+
+        for entry in metrics if isinstance(metrics, list) else []:
+            month = parse_month(entry.get("month")) if isinstance(entry, dict) else None
+
+            if month is None:
+                continue
+
+            counters = activity.setdefault(month, dict.fromkeys(COUNTERS, 0))
+
+            for counter in COUNTERS:
+                value = entry.get(counter)
+
+                if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+                    counters[counter] += value
+
+        FormActivity.objects.bulk_create(
+            [
+                FormActivity(form_id=form_id, month=month, **counters)
+                for month, counters in activity.items()
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0004_form_alive_name_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField()),
+                ("submissions", models.PositiveIntegerField(default=0)),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "form",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        to="forms.kanbonform",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="formactivity",
+            constraint=models.UniqueConstraint(
+                fields=("form", "month"), name="form_activity_month_unique"
+            ),
+        ),
+        migrations.RunPython(copy_activity_metrics, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="kanbonform",
+            name="activity_metrics",
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:12
+
+from django.db import migrations
+
+from forms.search import form_search_index
+
+
+def create_index(apps, schema_editor):
+    form_search_index.create(apps)
+
+
+def drop_index(apps, schema_editor):
+    form_search_index.drop(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0005_formactivity"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0006_form_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompiledForm",
+            fields=[
+                (
+                    "form",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="compiled",
+                        serialize=False,
+                        to="forms.kanbonform",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=1)),
+                ("etag", models.CharField(max_length=64)),
+                ("content", models.BinaryField()),
+                ("compiled_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
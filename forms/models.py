@@ -1,10 +1,22 @@
 from uuid import uuid4
 
+from core.dirty_fields import DirtyFieldsMixin
 from django.core.exceptions import ValidationError
 from django.db import models
 
+# Keeps the search index of forms current.
+from .search import form_search_index  # noqa: F401
 
-class KanbonForm(models.Model):
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        """
+        Excludes soft-deleted objects (deleted_at is set).
+        """
+        return self.filter(deleted_at__isnull=True)
+
+
+class KanbonForm(DirtyFieldsMixin, models.Model):
     # organization = models.ForeignKey('organization.Organization', on_delete=models.CASCADE, related_name='forms',
     #                                 null=True, blank=True)
 
@@ -23,8 +35,7 @@ class KanbonForm(models.Model):
     # The field order stores all fields in the order they are displayed on the mobile app.
     field_order = models.JSONField(null=True, blank=True, default=list)
 
-    # Stores the monthly activity over a period of 12 months.
-    activity_metrics = models.JSONField(null=True, blank=True, default=list)
+    # The monthly activity is stored in FormActivity (see forms/activity.py).
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -45,6 +56,31 @@ class KanbonForm(models.Model):
         blank=True,
     )
 
+    objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        # The names of forms that have not been deleted are unique per organization (see
+        # FORM_NAME_EXISTS). Enforce it with a constraint once the organization is a field:
+        # models.UniqueConstraint(
+        #     fields=["organization", "name"],
+        #     name="form_alive_org_name_unique",
+        #     condition=models.Q(deleted_at__isnull=True),
+        # )
+        indexes = [
+            # Name lookups (e.g. FORM_NAME_EXISTS) only consider forms that have not been deleted.
+            models.Index(
+                fields=["name"],
+                name="form_alive_name_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Keyset pagination of forms (see KanbonFormType.get_queryset).
+            models.Index(
+                fields=["-updated_at", "-id"],
+                name="form_alive_updated_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -59,3 +95,119 @@ class KanbonForm(models.Model):
             )
 
         super().save(*args, **kwargs)
+
+
+class KanbonField(DirtyFieldsMixin, models.Model):
+    form = models.ForeignKey(
+        KanbonForm, on_delete=models.CASCADE, related_name="fields"
+    )
+
+    title = models.CharField(max_length=255, null=True, blank=True)
+    help_text = models.TextField(null=True, blank=True)
+    is_required = models.BooleanField(default=False)
+    field_type = models.CharField(max_length=255, null=True, blank=True)
+    field_options = models.JSONField(null=True, blank=True)
+
+    # The client_id is generated by the admin app, so that fields can reference each other
+    # (e.g. in conditions) before they have been saved.
+    client_id = models.CharField(max_length=255, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(
+        "user.User",
+        on_delete=models.SET_NULL,
+        related_name="fields_created",
+        null=True,
+        blank=True,
+    )
+
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    deleted_by = models.ForeignKey(
+        "user.User",
+        on_delete=models.SET_NULL,
+        related_name="fields_deleted",
+        null=True,
+        blank=True,
+    )
+
+    objects = SoftDeleteQuerySet.as_manager()
+
+    def __str__(self):
+        return self.title
+
+    def is_deleted(self):
+        return self.deleted_at is not None
+
+
+class Condition(models.Model):
+    # The field which is shown or hidden depending on this condition.
+    field = models.ForeignKey(
+        KanbonField, on_delete=models.CASCADE, related_name="conditions"
+    )
+
+    # The field whose answer is compared against the content of this condition.
+    compare_to = models.ForeignKey(
+        KanbonField,
+        on_delete=models.CASCADE,
+        related_name="dependent_conditions",
+        null=True,
+        blank=True,
+    )
+    operator = models.CharField(max_length=255)
+    content = models.JSONField(null=True, blank=True)
+
+
+class CompiledForm(models.Model):
+    """
+    The compiled document of an active form, which is served to the mobile app (see forms/compiled.py).
+
+    A new version is stored whenever the document changes. The document is stored gzip-compressed,
+    so unchanged forms are served without serializing or compressing anything.
+    """
+
+    form = models.OneToOneField(
+        KanbonForm,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="compiled",
+    )
+
+    version = models.PositiveIntegerField(default=1)
+    # The SHA-256 hash (hex, truncated) of the uncompressed document.
+    etag = models.CharField(max_length=64)
+    # The gzip-compressed JSON document.
+    content = models.BinaryField()
+    compiled_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.form_id} (v{self.version})"
+
+
+class FormActivity(models.Model):
+    """
+    Activity counters of a form within a single month.
+
+    Counters are only ever incremented with F() expressions (see forms.activity.record_activity),
+    so that frequent activity neither rewrites nor locks the form's row.
+    """
+
+    form = models.ForeignKey(
+        KanbonForm, on_delete=models.CASCADE, related_name="activity"
+    )
+
+    # The first day of the month.
+    month = models.DateField()
+
+    submissions = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["form", "month"], name="form_activity_month_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.form_id} ({self.month:%Y-%m})"
@@ -1,5 +1,19 @@
+import functools
+from collections import defaultdict
+
 import graphene
 from api.permissions import is_org_member
+from asgiref.sync import sync_to_async
+from core.asynchronous import async_variant, in_event_loop
+from core.cache import (
+    add_cache_tags,
+    add_org_role,
+    form_tag,
+    invalidate_tags,
+    organization_tag,
+)
+from core.pagination import KeysetConnectionField
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from graphene.types.generic import GenericScalar
 from graphene_django import DjangoObjectType
@@ -7,10 +21,35 @@ from graphql import GraphQLError
 from graphql_relay import from_global_id
 from organization.models import Organization
 
-from .models import KanbonForm
+from .activity import record_activity
+from .compiled import schedule_compile_form
+from .conditions import get_plan
+from .loaders import get_loaders
+from .models import Condition, KanbonField, KanbonForm
+
+
+class LoaderConnection(graphene.relay.Connection):
+    """
+    Connection which hands all nodes of a page to the node type's prime_loaders(),
+    so that relations of the nodes are loaded in batches instead of once per node.
+    """
+
+    class Meta:
+        abstract = True
+
+    def resolve_edges(self, info):
+        prime_loaders = getattr(self._meta.node, "prime_loaders", None)
+
+        if prime_loaders:
+            prime_loaders([edge.node for edge in self.edges], info)
+
+        return self.edges
 
 
 class KanbonFormType(DjangoObjectType):
+    # The monthly activity over a period of 12 months (see forms/activity.py).
+    activity_metrics = graphene.JSONString()
+
     class Meta:
         model = KanbonForm
         fields = [
@@ -26,14 +65,45 @@ class KanbonFormType(DjangoObjectType):
         ]
 
         interfaces = (graphene.relay.Node,)
+        connection_class = LoaderConnection
 
     @classmethod
     def get_node(cls, info, id):
-        return KanbonForm.objects.get(id=id)
+        add_cache_tags(info, form_tag(id))
+
+        queryset = cls.get_queryset(KanbonForm.objects, info).filter(id=id)
+
+        if in_event_loop():
+            return queryset.afirst()
+
+        return queryset.first()
 
     @classmethod
     def get_queryset(cls, queryset, info):
-        return queryset
+        # Deleted forms are never served. The ordering is used for keyset pagination
+        # (see KeysetConnectionField) and is backed by the form_alive_updated_idx index.
+        return queryset.alive().order_by("-updated_at", "-id")
+
+    @classmethod
+    def prime_loaders(cls, forms: list[KanbonForm], info):
+        add_cache_tags(info, *(form_tag(form.pk) for form in forms))
+
+        loaders = get_loaders(info)
+        loaders.fields_by_form.enqueue(form.pk for form in forms)
+        loaders.users.enqueue(form.created_by_id for form in forms)
+        loaders.activity_metrics.enqueue(form.pk for form in forms)
+
+    def resolve_created_by(self, info):
+        if self.created_by_id is None:
+            return None
+
+        return get_loaders(info).users.resolve(self.created_by_id)
+
+    def resolve_fields(self, info, **kwargs):
+        return get_loaders(info).fields_by_form.resolve(self.pk)
+
+    def resolve_activity_metrics(self, info):
+        return get_loaders(info).activity_metrics.resolve(self.pk)
 
 
 class KanbonFieldType(DjangoObjectType):
@@ -50,6 +120,14 @@ class KanbonFieldType(DjangoObjectType):
         ]
 
         interfaces = (graphene.relay.Node,)
+        connection_class = LoaderConnection
+
+    @classmethod
+    def prime_loaders(cls, fields: list[KanbonField], info):
+        get_loaders(info).conditions_by_field.enqueue(field.pk for field in fields)
+
+    def resolve_conditions(self, info, **kwargs):
+        return get_loaders(info).conditions_by_field.resolve(self.pk)
 
 
 class ConditionType(DjangoObjectType):
@@ -65,6 +143,12 @@ class ConditionType(DjangoObjectType):
 
         interfaces = (graphene.relay.Node,)
 
+    def resolve_compare_to(self, info):
+        if self.compare_to_id is None:
+            return None
+
+        return get_loaders(info).fields.resolve(self.compare_to_id)
+
 
 class KanbonFormInput(graphene.InputObjectType):
     name = graphene.String()
@@ -88,6 +172,178 @@ class ConditionInput(graphene.InputObjectType):
     content = GenericScalar()
 
 
+# A field of a batch, identified by its client_id so that conditions can reference
+# other fields of the same batch before they have been saved.
+class KanbonFieldBatchInput(graphene.InputObjectType):
+    client_id = graphene.String(required=True)
+    field_input = KanbonFieldInput(required=True)
+    conditions = graphene.List(graphene.NonNull(ConditionInput))
+
+
+def invalidate_form_cache(org_id, form_id=None):
+    """
+    Invalidates the cached query responses of the organization (and form), once the current transaction is committed.
+    The compiled document of the form (see forms/compiled.py) is recompiled.
+    """
+    tags = [organization_tag(org_id)]
+
+    if form_id:
+        tags.append(form_tag(form_id))
+
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+    if form_id:
+        schedule_compile_form(form_id)
+
+
+def get_compare_to_fields(
+    form: KanbonForm, conditions: list[ConditionInput], exclude: set = frozenset()
+) -> dict:
+    """
+    Resolves the global IDs referenced by conditions (compare_to) to existing fields of the form
+    with a single query. IDs contained in exclude (e.g. client_ids of the same batch) are skipped.
+
+    Returns a dict {global_id: KanbonField}.
+
+    Errors:
+    - CONDITION_FIELD_DOES_NOT_EXIST: A condition compares to a field that does not exist in the form.
+    """
+    global_ids = {
+        condition.compare_to
+        for condition in conditions
+        if condition.compare_to and condition.compare_to not in exclude
+    }
+
+    if not global_ids:
+        return {}
+
+    field_ids = {global_id: from_global_id(global_id)[1] for global_id in global_ids}
+
+    fields = (
+        KanbonField.objects.alive()
+        .filter(
+            form=form,
+            id__in=[field_id for field_id in field_ids.values() if field_id.isdigit()],
+        )
+        .in_bulk()
+    )
+
+    compare_to_fields = {}
+
+    for global_id, field_id in field_ids.items():
+        field = fields.get(int(field_id)) if field_id.isdigit() else None
+
+        if not field:
+            raise GraphQLError(
+                "Condition compares to a field that does not exist in the given form.",
+                extensions={"code": "CONDITION_FIELD_DOES_NOT_EXIST"},
+            )
+
+        compare_to_fields[global_id] = field
+
+    return compare_to_fields
+
+
+def get_form(org_id: str, form_id: graphene.ID) -> KanbonForm:
+    """
+    Returns the form with the given global ID of the organization, unless it was deleted.
+
+    Errors:
+    - FORM_DOES_NOT_EXIST: There's no form with the given ID in the organization.
+    """
+    organization = Organization.objects.get(id=org_id)
+
+    try:
+        return KanbonForm.objects.alive().get(
+            id=from_global_id(form_id)[1], organization=organization
+        )
+    except KanbonForm.DoesNotExist:
+        raise GraphQLError(
+            "Form with given ID does not exist in given organization.",
+            extensions={"code": "FORM_DOES_NOT_EXIST"},
+        )
+
+
+def check_form_name(name: str, org_id: str):
+    """
+    Errors:
+    - FORM_NAME_EXISTS: There's a form with the same name in the organization.
+    """
+    if KanbonForm.objects.alive().filter(name=name, organization_id=org_id).exists():
+        raise GraphQLError(
+            "Form with the same name already exists.",
+            extensions={"code": "FORM_NAME_EXISTS"},
+        )
+
+
+def save_form(form: KanbonForm):
+    """
+    Saves a form. Raises FORM_NAME_EXISTS if another form of the organization which is not
+    deleted has the same name. The mutations check the name before (see check_form_name()), but
+    concurrent mutations may both pass the check, so a unique constraint on the organization and
+    the name (see KanbonForm.Meta) rejects the second save.
+    """
+    try:
+        with transaction.atomic():
+            form.save()
+    except IntegrityError:
+        # Only a violation of the name constraint is translated, other errors are raised as they
+        # are. The same forms are considered as by check_form_name().
+        if form.name is not None and (
+            KanbonForm.objects.alive()
+            .filter(name=form.name, organization=form.organization)
+            .exclude(pk=form.pk)
+            .exists()
+        ):
+            raise GraphQLError(
+                "Form with the same name already exists.",
+                extensions={"code": "FORM_NAME_EXISTS"},
+            )
+
+        raise
+
+
+def is_cached_org_member(role: str):
+    """
+    is_org_member() for query resolvers. The passed check is recorded, so the response may be
+    cached and the check is repeated before the cached response is served (see core/cache.py).
+    """
+
+    def decorator(resolver):
+        @is_org_member(role)
+        @functools.wraps(resolver)
+        def wrapper(root, info, **kwargs):
+            add_org_role(info, kwargs["org_id"], role)
+
+            return resolver(root, info, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def save_field(
+    field: KanbonField, conditions: list[ConditionInput], compare_to_fields: dict
+):
+    """
+    Saves a new field together with its conditions.
+    """
+    with transaction.atomic():
+        field.save()
+
+        Condition.objects.bulk_create(
+            [
+                Condition(
+                    field=field,
+                    compare_to=compare_to_fields.get(condition.compare_to),
+                    operator=condition.operator,
+                    content=condition.content,
+                )
+                for condition in conditions
+            ]
+        )
+
+
 class CreateKanbonForm(graphene.Mutation):
     """
     Create a new form.
@@ -104,24 +360,27 @@ class CreateKanbonForm(graphene.Mutation):
     form = graphene.Field(KanbonFormType)
 
     @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        # The form is saved in a transaction (see save_form()), which the async ORM doesn't
+        # support. The mutation is therefore executed synchronously in a worker thread.
+        return await sync_to_async(CreateKanbonForm.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
     @is_org_member("ADMIN")
     def mutate(root, info, org_id: graphene.ID, form_input: KanbonFormInput):
         # Get the organization
         org_id = from_global_id(org_id)[1]
-        organization = Organization.objects.get(id=org_id)
+        Organization.objects.get(id=org_id)
 
         if not form_input.name:
             raise GraphQLError(
-                "Form name is required to create a form.", code="FORM_NAME_REQUIRED"
+                "Form name is required to create a form.",
+                extensions={"code": "FORM_NAME_REQUIRED"},
             )
 
         # Return an error if there's already a form with the same name in the organization.
-        if KanbonForm.objects.filter(
-            name=form_input.name, organization=organization
-        ).exists():
-            raise GraphQLError(
-                "Form with the same name already exists.", code="FORM_NAME_EXISTS"
-            )
+        check_form_name(form_input.name, org_id)
 
         # Create the form
         form: KanbonForm = KanbonForm(
@@ -130,7 +389,9 @@ class CreateKanbonForm(graphene.Mutation):
             status=form_input.status,
         )
 
-        form.save()
+        save_form(form)
+
+        invalidate_form_cache(org_id, form.id)
 
         return CreateKanbonForm(form=form)
 
@@ -140,6 +401,7 @@ class UpdateKanbonForm(graphene.Mutation):
     Update a form.
 
     Errors:
+    - FORM_DOES_NOT_EXIST: There's no form with the given ID in the organization.
     - FORM_NAME_EXISTS: Cannot update form with a name that already exists within your organization.
     - NO_INPUT: No input provided.
     """
@@ -153,6 +415,23 @@ class UpdateKanbonForm(graphene.Mutation):
     form = graphene.Field(KanbonFormType)
 
     @staticmethod
+    def update_form(form: KanbonForm, form_input: KanbonFormInput):
+        form.description = (
+            form_input.description if form_input.description else form.description
+        )
+        form.status = form_input.status if form_input.status else form.status
+        form.field_order = (
+            form_input.field_order if form_input.field_order else form.field_order
+        )
+
+    @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        # The form is saved in a transaction (see save_form()), which the async ORM doesn't
+        # support. The mutation is therefore executed synchronously in a worker thread.
+        return await sync_to_async(UpdateKanbonForm.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
     @is_org_member("ADMIN")
     def mutate(
         root,
@@ -162,13 +441,8 @@ class UpdateKanbonForm(graphene.Mutation):
         form_input: KanbonFormInput = None,
         delete: bool = False,
     ):
-        # Get the organization
         org_id = from_global_id(org_id)[1]
-        organization = Organization.objects.get(id=org_id)
-
-        # Get the form
-        form_id = from_global_id(form_id)[1]
-        form: KanbonForm = KanbonForm.objects.get(id=form_id)
+        form = get_form(org_id, form_id)
 
         # If delete is true, delete the form.
         if delete:
@@ -176,33 +450,24 @@ class UpdateKanbonForm(graphene.Mutation):
             form.deleted_by = info.context.user
             form.save()
 
+            invalidate_form_cache(org_id, form.id)
+
             return UpdateKanbonForm(form=None)
 
         if not form_input:
-            raise GraphQLError("No input provided.", code="NO_INPUT")
+            raise GraphQLError("No input provided.", extensions={"code": "NO_INPUT"})
 
-        if form_input.name:
+        if form_input.name and form_input.name != form.name:
             # Return an error if there's already a form with the same name in the organization.
-            if KanbonForm.objects.filter(
-                name=form_input.name, organization=organization
-            ).exists():
-                raise GraphQLError(
-                    "Form with the same name already exists.", code="FORM_NAME_EXISTS"
-                )
+            check_form_name(form_input.name, org_id)
 
-            else:
-                form.name = form_input.name
+            form.name = form_input.name
 
-        # Update the form
-        form.description = (
-            form_input.description if form_input.description else form.description
-        )
-        form.status = form_input.status if form_input.status else form.status
-        form.field_order = (
-            form_input.field_order if form_input.field_order else form_input.field_order
-        )
+        UpdateKanbonForm.update_form(form, form_input)
 
-        form.save()
+        save_form(form)
+
+        invalidate_form_cache(org_id, form.id)
 
         return UpdateKanbonForm(form=form)
 
@@ -225,6 +490,14 @@ class CreateKanbonField(graphene.Mutation):
     field = graphene.Field(KanbonFieldType)
 
     @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        # The field is saved together with its conditions in a transaction (see save_field()),
+        # which the async ORM doesn't support. The mutation is therefore executed synchronously
+        # in a worker thread.
+        return await sync_to_async(CreateKanbonField.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
     @is_org_member("ADMIN")
     def mutate(
         root,
@@ -237,36 +510,153 @@ class CreateKanbonField(graphene.Mutation):
     ):
         # Get given organization and form
         org_id = from_global_id(org_id)[1]
-        org = Organization.objects.get(id=org_id)
-
-        form_id = from_global_id(form_id)[1]
-
-        try:
-            form = KanbonForm.objects.get(id=form_id, organization=org)
-        except KanbonForm.DoesNotExist:
-            raise GraphQLError(
-                "Form with given ID does not exist in given organization.",
-                extensions={"code": "FORM_DOES_NOT_EXIST"},
-            )
+        form = get_form(org_id, form_id)
 
-        for condition in conditions:
-            pass
+        conditions = conditions or []
+        compare_to_fields = get_compare_to_fields(form, conditions)
 
         field: KanbonField = KanbonField(
             form=form,
             title=field_input.title,
             help_text=field_input.help_text,
-            is_required=field_input.is_required,
+            is_required=bool(field_input.is_required),
             field_type=field_input.field_type,
             field_options=field_input.field_options,
             client_id=client_id,
         )
 
-        field.save()
+        save_field(field, conditions, compare_to_fields)
+
+        invalidate_form_cache(org_id, form.id)
 
         return CreateKanbonField(field=field)
 
 
+class CreateKanbonFields(graphene.Mutation):
+    """
+    Adds multiple fields, including their conditions, to a given form at once.
+    All fields are validated before anything is written, then the fields, the conditions
+    and the form's field order are saved in a single transaction.
+
+    Conditions can compare to fields of the same batch (by client_id) or to existing fields of the form (by ID).
+
+    Errors:
+    - FORM_DOES_NOT_EXIST: There's no form with the given ID in the organization.
+    - NO_INPUT: No fields provided.
+    - CLIENT_ID_NOT_UNIQUE: Multiple fields of the batch share the same client_id.
+    - CONDITION_FIELD_DOES_NOT_EXIST: A condition compares to a field that neither is part of the batch nor of the form.
+    """
+
+    class Arguments:
+        org_id = graphene.ID(required=True)
+        form_id = graphene.ID(required=True)
+        fields = graphene.List(graphene.NonNull(KanbonFieldBatchInput), required=True)
+
+    fields = graphene.List(KanbonFieldType)
+
+    @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        # The whole batch is validated and written in a single transaction, which the async ORM
+        # doesn't support. It is therefore executed synchronously in a worker thread.
+        return await sync_to_async(CreateKanbonFields.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
+    @is_org_member("ADMIN")
+    def mutate(
+        root,
+        info,
+        org_id: graphene.ID,
+        form_id: graphene.ID,
+        fields: list[KanbonFieldBatchInput],
+    ):
+        # Get given organization and form
+        org_id = from_global_id(org_id)[1]
+        form = get_form(org_id, form_id)
+
+        if not fields:
+            raise GraphQLError("No input provided.", extensions={"code": "NO_INPUT"})
+
+        # Validate the whole batch before writing anything.
+        client_ids = [field.client_id for field in fields]
+
+        if len(set(client_ids)) != len(client_ids):
+            raise GraphQLError(
+                "Every field of the batch requires a unique client_id.",
+                extensions={"code": "CLIENT_ID_NOT_UNIQUE"},
+            )
+
+        conditions = [
+            condition for field in fields for condition in field.conditions or []
+        ]
+        compare_to_fields = get_compare_to_fields(
+            form, conditions, exclude=set(client_ids)
+        )
+
+        with transaction.atomic():
+            new_fields: list[KanbonField] = KanbonField.objects.bulk_create(
+                [
+                    KanbonField(
+                        form=form,
+                        title=field.field_input.title,
+                        help_text=field.field_input.help_text,
+                        is_required=bool(field.field_input.is_required),
+                        field_type=field.field_input.field_type,
+                        field_options=field.field_input.field_options,
+                        client_id=field.client_id,
+                    )
+                    for field in fields
+                ]
+            )
+
+            # Not every database backend returns primary keys from bulk_create (e.g. MySQL).
+            if any(field.pk is None for field in new_fields):
+                new_fields = sorted(
+                    KanbonField.objects.filter(
+                        form=form, client_id__in=client_ids
+                    ).order_by("-id")[: len(client_ids)],
+                    key=lambda field: client_ids.index(field.client_id),
+                )
+
+            # From here on, client_ids of the batch resolve to the new fields.
+            compare_to_fields.update(zip(client_ids, new_fields))
+
+            new_conditions: list[Condition] = Condition.objects.bulk_create(
+                [
+                    Condition(
+                        field=new_field,
+                        compare_to=compare_to_fields.get(condition.compare_to),
+                        operator=condition.operator,
+                        content=condition.content,
+                    )
+                    for field, new_field in zip(fields, new_fields)
+                    for condition in field.conditions or []
+                ]
+            )
+
+            # Lock the form, so concurrent batches don't overwrite each other's field order.
+            form = KanbonForm.objects.select_for_update().get(id=form.id)
+            form.field_order = (form.field_order or []) + client_ids
+            form.save(update_fields=["field_order", "updated_at"])
+
+        invalidate_form_cache(org_id, form.id)
+
+        # The created objects are already known, so resolving them for the response costs no queries.
+        loaders = get_loaders(info)
+        conditions_by_field = defaultdict(list)
+
+        for condition in new_conditions:
+            conditions_by_field[condition.field_id].append(condition)
+
+        for new_field in new_fields:
+            loaders.fields.prime(new_field.pk, new_field)
+            loaders.conditions_by_field.prime(
+                new_field.pk, conditions_by_field[new_field.pk]
+            )
+
+        return CreateKanbonFields(fields=new_fields)
+
+
 class UpdateKanbonField(graphene.Mutation):
     """
     Update a single form field.
@@ -285,6 +675,29 @@ class UpdateKanbonField(graphene.Mutation):
     field = graphene.Field(KanbonFieldType)
 
     @staticmethod
+    def update_field(field: KanbonField, field_input: KanbonFieldInput):
+        field.title = field_input.title if field_input.title else field.title
+        field.help_text = (
+            field_input.help_text if field_input.help_text else field.help_text
+        )
+        field.is_required = (
+            field_input.is_required if field_input.is_required else field.is_required
+        )
+        field.field_type = (
+            field_input.field_type if field_input.field_type else field.field_type
+        )
+        field.field_options = (
+            field_input.field_options
+            if field_input.field_options
+            else field.field_options
+        )
+
+    @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        return await sync_to_async(UpdateKanbonField.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
     @is_org_member("ADMIN")
     def mutate(
         root,
@@ -298,11 +711,11 @@ class UpdateKanbonField(graphene.Mutation):
         org_id = from_global_id(org_id)[1]
         org = Organization.objects.get(id=org_id)
 
-        # Get the form
+        # Get the field
         field_id = from_global_id(field_id)[1]
 
         try:
-            field: KanbonField = KanbonField.objects.get(
+            field: KanbonField = KanbonField.objects.alive().get(
                 id=field_id, form__organization=org
             )
         except KanbonField.DoesNotExist:
@@ -316,35 +729,94 @@ class UpdateKanbonField(graphene.Mutation):
             field.deleted_by = info.context.user
             field.save()
 
+            invalidate_form_cache(org_id, field.form_id)
+
             return UpdateKanbonField(field=None)
 
         if not field_input:
-            raise GraphQLError("No input provided.", code="NO_INPUT")
+            raise GraphQLError("No input provided.", extensions={"code": "NO_INPUT"})
 
-        # Update the field
-        field.title = field_input.title if field_input.title else field.title
-        field.help_text = (
-            field_input.help_text if field_input.help_text else field.help_text
-        )
-        field.is_required = (
-            field_input.is_required if field_input.is_required else field.is_required
-        )
-        field.field_type = (
-            field_input.field_type if field_input.field_type else field.field_type
-        )
-        field.field_options = (
-            field_input.field_options
-            if field_input.field_options
-            else field.field_options
-        )
+        UpdateKanbonField.update_field(field, field_input)
 
         field.save()
 
+        invalidate_form_cache(org_id, field.form_id)
+
         return UpdateKanbonField(field=field)
 
 
+class SubmitKanbonForm(graphene.Mutation):
+    """
+    Submits the answers to an active form, keyed by the global IDs of the fields.
+    The answers are validated against the form's conditions (see forms/conditions.py), and
+    valid submissions are counted in the form's activity (see forms/activity.py).
+
+    Errors:
+    - FORM_DOES_NOT_EXIST: There's no active form with the given ID in the organization.
+    """
+
+    class Arguments:
+        org_id = graphene.ID(required=True)
+        form_id = graphene.ID(required=True)
+        answers = GenericScalar(required=True)
+
+    valid = graphene.Boolean()
+    # The global IDs of the visible, required fields without an answer.
+    missing_fields = graphene.List(graphene.ID)
+
+    @staticmethod
+    async def mutate_async(root, info, **kwargs):
+        return await sync_to_async(SubmitKanbonForm.mutate)(root, info, **kwargs)
+
+    @staticmethod
+    @async_variant(mutate_async)
+    @is_org_member("MEMBER")
+    def mutate(root, info, org_id: graphene.ID, form_id: graphene.ID, answers: dict):
+        org_id = from_global_id(org_id)[1]
+        form_id = from_global_id(form_id)[1]
+
+        plan = None
+
+        if (
+            KanbonForm.objects.alive()
+            .filter(id=form_id, organization_id=org_id)
+            .exists()
+        ):
+            plan = get_plan(form_id)
+
+        if plan is None:
+            raise GraphQLError(
+                "Form with given ID does not exist in given organization.",
+                extensions={"code": "FORM_DOES_NOT_EXIST"},
+            )
+
+        evaluation = plan.evaluate(answers if isinstance(answers, dict) else {})
+
+        if evaluation.valid:
+            record_activity(form_id, submissions=1)
+
+        return SubmitKanbonForm(
+            valid=evaluation.valid, missing_fields=evaluation.missing
+        )
+
+
+class Query(graphene.ObjectType):
+    kanbon_forms = KeysetConnectionField(
+        KanbonFormType, org_id=graphene.ID(required=True)
+    )
+
+    @staticmethod
+    @is_cached_org_member("ADMIN")
+    def resolve_kanbon_forms(root, info, org_id: graphene.ID, **kwargs):
+        org_id = from_global_id(org_id)[1]
+
+        return KanbonForm.objects.filter(organization_id=org_id)
+
+
 class Mutation(graphene.ObjectType):
     create_kanbon_form = CreateKanbonForm.Field()
     update_kanbon_form = UpdateKanbonForm.Field()
     create_kanbon_field = CreateKanbonField.Field()
+    create_kanbon_fields = CreateKanbonFields.Field()
     update_kanbon_field = UpdateKanbonField.Field()
+    submit_kanbon_form = SubmitKanbonForm.Field()
@@ -0,0 +1,18 @@
+"""
+The search index of forms, which is used by the KanbonFormAdmin (see core/search.py).
+It covers the form's name and its creator, and is updated when the creator changes
+(by a trigger on the users' table).
+"""
+
+from core.search import SearchIndex
+
+form_search_index = SearchIndex(
+    "forms_search",
+    "forms.KanbonForm",
+    (
+        "name",
+        "created_by__email_address",
+        "created_by__first_name",
+        "created_by__last_name",
+    ),
+)
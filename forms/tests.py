@@ -0,0 +1,138 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+import graphene
+from django.test import TestCase
+from graphene_django import DjangoConnectionField, DjangoObjectType
+
+from user.models import User
+
+
+def fake_module(name: str, **attributes):
+    """
+    Registers a fake of a module of an app which isn't part of this repository (the schema imports
+    the api and organization apps), unless the app is installed.
+    """
+    package = name.split(".")[0]
+
+    if package in sys.modules or importlib.util.find_spec(package) is not None:
+        return
+
+    sys.modules[package] = ModuleType(package)
+    sys.modules[name] = module = ModuleType(name)
+    setattr(sys.modules[package], name.split(".")[-1], module)
+
+    for attribute, value in attributes.items():
+        setattr(module, attribute, value)
+
+
+class Organization:
+    pass
+
+
+# The tests resolve forms without the membership checks of the api app.
+fake_module("api.permissions", is_org_member=lambda role: lambda resolver: resolver)
+fake_module("organization.models", Organization=Organization)
+
+from .models import Condition, KanbonField, KanbonForm  # noqa: E402
+from .schema import KanbonFormType  # noqa: E402
+
+FORMS_QUERY = """
+{
+  forms {
+    edges {
+      node {
+        name
+        createdBy { firstName }
+        fields {
+          edges {
+            node {
+              title
+              conditions {
+                edges { node { operator compareTo { title } } }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class UserType(DjangoObjectType):
+    # The schema's user type is part of the api app.
+    class Meta:
+        model = User
+        fields = ["first_name"]
+
+
+class Query(graphene.ObjectType):
+    forms = DjangoConnectionField(KanbonFormType)
+
+
+schema = graphene.Schema(query=Query)
+
+
+class Context:
+    def __init__(self, user):
+        self.user = user
+        self.META = {}
+
+
+class FormResolutionQueriesTest(TestCase):
+    """
+    Resolving forms with their fields and conditions costs a constant number of queries,
+    however many forms, fields and conditions are resolved (see forms/loaders.py).
+    """
+
+    def create_forms(self, count: int, fields_per_form: int):
+        user = User.objects.create(username=f"creator{count}", first_name="Creator")
+        # bulk_create skips KanbonForm.save(), which requires an organization.
+        forms = KanbonForm.objects.bulk_create(
+            [KanbonForm(name=f"Form {i}", created_by=user) for i in range(count)]
+        )
+        fields = KanbonField.objects.bulk_create(
+            [
+                KanbonField(form=form, title=f"Field {j}")
+                for form in forms
+                for j in range(fields_per_form)
+            ]
+        )
+        Condition.objects.bulk_create(
+            [
+                Condition(
+                    field=field, compare_to=fields[0], operator="EQUALS", content=1
+                )
+                for field in fields
+            ]
+        )
+
+        return user
+
+    def resolve_forms(self, user):
+        # The count, the forms, their creators, fields and conditions.
+        with self.assertNumQueries(5):
+            result = schema.execute(FORMS_QUERY, context_value=Context(user))
+
+        self.assertIsNone(result.errors)
+
+        return result.data["forms"]["edges"]
+
+    def test_single_form(self):
+        user = self.create_forms(1, 1)
+        edges = self.resolve_forms(user)
+
+        self.assertEqual(len(edges), 1)
+
+    def test_many_forms(self):
+        user = self.create_forms(20, 5)
+        edges = self.resolve_forms(user)
+
+        self.assertEqual(len(edges), 20)
+        fields = edges[0]["node"]["fields"]["edges"]
+        self.assertEqual(len(fields), 5)
+        conditions = fields[0]["node"]["conditions"]["edges"]
+        self.assertEqual(conditions[0]["node"]["compareTo"]["title"], "Field 0")
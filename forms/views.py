@@ -0,0 +1,110 @@
+import gzip
+from types import SimpleNamespace
+
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotFound,
+    HttpResponseNotModified,
+)
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from graphql import GraphQLError
+from graphql_relay import from_global_id
+
+from .activity import record_view
+from .compiled import compile_form
+from .models import CompiledForm
+
+
+def check_org_member(request, org_id: str):
+    """
+    Applies the membership check of the schema to a plain request.
+    Raises a GraphQLError if the user isn't a member of the organization.
+    """
+    # Imported on use, so the URLs load without the api app (e.g. for `manage.py check`).
+    from api.permissions import is_org_member
+
+    # Every member of the organization (e.g. the employees using the mobile app) may open its forms.
+    check = is_org_member("MEMBER")(lambda root, info, **kwargs: None)
+
+    check(None, SimpleNamespace(context=request), org_id=org_id)
+
+
+def get_compiled_form(org_id: str, form_id: str):
+    """
+    Returns the (etag, compressed content) of the form's document, or None.
+    """
+    org_id = from_global_id(org_id)[1]
+    form_id = from_global_id(form_id)[1]
+
+    if not form_id.isdigit():
+        return None
+
+    compiled_forms = CompiledForm.objects.filter(
+        form_id=form_id, form__organization_id=org_id
+    ).values_list("etag", "content")
+
+    compiled = compiled_forms.first()
+
+    # Forms which were not changed since documents were introduced are compiled on first access.
+    # Only forms of the organization are compiled, so members can't compile other organizations' forms.
+    if compiled is None and compile_form(form_id, organization_id=org_id):
+        compiled = compiled_forms.first()
+
+    return compiled
+
+
+@require_GET
+def compiled_form_view(request):
+    """
+    Returns the compiled document of an active form (see forms/compiled.py).
+
+    GET /forms/compiled?orgId=<organization's global ID>&formId=<form's global ID>
+
+    The response has a strong ETag. If it matches If-None-Match, 304 Not Modified is returned.
+    The document is sent gzip-compressed (as stored) to clients which accept gzip.
+    Every request counts as a view of the form (see forms/activity.py).
+    """
+    org_id = request.GET.get("orgId", "")
+
+    try:
+        check_org_member(request, org_id)
+    except GraphQLError:
+        return HttpResponseForbidden()
+
+    compiled = get_compiled_form(org_id, request.GET.get("formId", ""))
+
+    if compiled is None:
+        return HttpResponseNotFound()
+
+    # Every time the form is opened counts as a view, even if the client's copy is current.
+    # Views are buffered, so opening a form doesn't write to the database.
+    record_view(from_global_id(request.GET["formId"])[1])
+
+    etag, content = compiled
+    compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+    # Every representation has its own strong ETag.
+    etag = f'"{etag}-gzip"' if compressed else f'"{etag}"'
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+
+    if "*" in if_none_match or etag in (
+        tag.removeprefix("W/") for tag in if_none_match
+    ):
+        response = HttpResponseNotModified()
+    elif compressed:
+        response = HttpResponse(bytes(content), content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(
+            gzip.decompress(content), content_type="application/json"
+        )
+
+    response["ETag"] = etag
+    # Clients have to revalidate the document before using it.
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ["Accept-Encoding", "Authorization"])
+
+    return response
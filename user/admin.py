@@ -3,7 +3,11 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import SystemMessage, User
+from core.search import IndexedSearchMixin
+
+from .ban_codes import ban_codes
+from .models import SystemMessage, User, unread_system_messages_count
+from .search import user_search_index
 
 
 class UserCreationForm(forms.ModelForm):
@@ -36,7 +40,7 @@ class UserCreationForm(forms.ModelForm):
         return user
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(IndexedSearchMixin, BaseUserAdmin):
     # The custom form handling for creating a user
     add_form = UserCreationForm
 
@@ -57,7 +61,14 @@ class UserAdmin(BaseUserAdmin):
 
     list_filter = ("is_active", "is_admin", "default_superuser")
 
-    readonly_fields = ("is_admin", "default_superuser", "created_at")
+    readonly_fields = (
+        "last_phone_request",
+        "last_phone_code_request",
+        "is_admin",
+        "default_superuser",
+        "created_at",
+        "unread_system_messages_count",
+    )
 
     fieldsets = (
         (None, {"fields": ("username", "is_active", "ban_reason")}),
@@ -87,7 +98,16 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
         ("Permissions", {"fields": ("utype", "is_admin", "default_superuser")}),
-        ("Meta", {"fields": ("created_at", "last_logout_all")}),
+        (
+            "Meta",
+            {
+                "fields": (
+                    "created_at",
+                    "last_logout_all",
+                    "unread_system_messages_count",
+                )
+            },
+        ),
     )
 
     # add_fieldsets is not a standard ModelAdmin attribute. UserAdmin
@@ -96,10 +116,43 @@ class UserAdmin(BaseUserAdmin):
         (None, {"fields": ("username", "utype", "password1", "password2")}),
     )
 
+    # Searches are answered by the search index (see search.py), search_fields only enable the search box.
     search_fields = ("id", "username", "email_address")
+    search_index = user_search_index
     ordering = ("id",)
     filter_horizontal = ()
 
+    actions = ["reactivate_accounts"]
+
+    def get_actions(self, request):
+        """
+        Adds an action to deactivate the selected users per ban code.
+        """
+        actions = super().get_actions(request)
+
+        for code, explanation in ban_codes.items():
+            if code:
+                name = f"deactivate_accounts_{code}"
+                actions[name] = (
+                    self.deactivate_accounts_action(code),
+                    name,
+                    f"Deactivate selected users ({code}: {explanation})",
+                )
+
+        return actions
+
+    def deactivate_accounts_action(self, reason: int):
+        def deactivate_accounts(modeladmin, request, queryset):
+            user_ids = User.objects.deactivate_accounts(queryset, reason)
+            self.message_user(request, f"Deactivated {len(user_ids)} users.")
+
+        return deactivate_accounts
+
+    @admin.action(description="Reactivate selected users")
+    def reactivate_accounts(self, request, queryset):
+        user_ids = User.objects.reactivate_accounts(queryset)
+        self.message_user(request, f"Reactivated {len(user_ids)} users.")
+
 
 # Now register the new UserAdmin...
 admin.site.register(User, UserAdmin)
@@ -110,7 +163,24 @@ admin.site.unregister(Group)
 
 # Add SystemMessageAdmin
 class SystemMessageAdmin(admin.ModelAdmin):
-    list_display = ("message", "code", "user", "created_at")
+    list_display = ("__str__", "code", "user", "created_at")
+
+    # Messages can be marked as (un)read or deleted here, so the user's unread counter is recalculated.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.user.recount_unread_system_messages()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.user.recount_unread_system_messages()
+
+    # Used by the "Delete selected" action.
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list("user_id", flat=True))
+        super().delete_queryset(request, queryset)
+        User.objects.filter(pk__in=user_ids).update(
+            unread_system_messages_count=unread_system_messages_count()
+        )
 
 
 admin.site.register(SystemMessage, SystemMessageAdmin)
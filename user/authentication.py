@@ -0,0 +1,100 @@
+# This file contains the authentication of requests with signed tokens (see tokens.py).
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+
+from .tokens import get_user_id
+
+
+def lazy_user(user_id):
+    """
+    Returns the user with the given ID without querying the database. Its other fields are
+    deferred, so they are loaded when they are accessed first.
+    """
+    User = get_user_model()
+
+    # A token is only valid for active users.
+    user = User.from_db(DEFAULT_DB_ALIAS, ["id", "is_active"], [user_id, True])
+    # Loads all deferred fields with a single query (see User.refresh_from_db).
+    user.load_deferred_together = True
+
+    return user
+
+
+class TokenBackend(BaseBackend):
+    """
+    Authentication backend for signed tokens: authenticate(request, token=token).
+    """
+
+    def authenticate(self, request, token: str = None, **kwargs):
+        if token is None:
+            return None
+
+        user_id = get_user_id(token)
+
+        return lazy_user(user_id) if user_id is not None else None
+
+    def get_user(self, user_id):
+        try:
+            return get_user_model().objects.get(pk=user_id, is_active=True)
+        except get_user_model().DoesNotExist:
+            return None
+
+
+def get_bearer_token(request) -> str:
+    authorization = request.headers.get("Authorization", "")
+
+    if not authorization.startswith("Bearer "):
+        return None
+
+    return authorization[len("Bearer ") :]
+
+
+@sync_and_async_middleware
+def token_authentication_middleware(get_response):
+    """
+    Authenticates requests with a token (must be placed after AuthenticationMiddleware).
+    Requests without a token are authenticated by their session as before. Requests with an
+    invalid token are anonymous.
+    """
+    backend = TokenBackend()
+
+    def authenticate(request, token: str):
+        user = backend.authenticate(request, token=token)
+
+        if user is None:
+            user = AnonymousUser()
+
+        request.user = user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = get_bearer_token(request)
+
+            if token is not None:
+                # A cache miss of the epoch queries the database.
+                await sync_to_async(authenticate)(request, token)
+
+            return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            token = get_bearer_token(request)
+
+            if token is not None:
+                authenticate(request, token)
+
+            return get_response(request)
+
+    return middleware
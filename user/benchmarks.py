@@ -0,0 +1,51 @@
+# This file contains the benchmarks of user accounts (see core/benchmarks.py).
+
+from uuid import uuid4
+
+from core.benchmarks import benchmark
+
+from .models import User
+
+# The number of other accounts from which a verified email address is removed.
+FAN_OUT = 20
+
+
+def unique_email_address() -> str:
+    return f"benchmark-{uuid4().hex}@example.com"
+
+
+def create_users(count: int, **fields) -> list[User]:
+    return User.objects.bulk_create(
+        [User(username=uuid4(), **fields) for _ in range(count)]
+    )
+
+
+# Dominated by hashing the password (see hashing.py).
+@benchmark(prepare=lambda options: unique_email_address(), repeat=5)
+def create_user(email_address: str):
+    User.objects.create_user(email_address=email_address, password="benchmark")
+
+
+def prepare_verify_email(options) -> User:
+    email_address = unique_email_address()
+
+    create_users(
+        FAN_OUT, email_address=unique_email_address(), tmp_email_address=email_address
+    )
+
+    return create_users(
+        1,
+        email_address=unique_email_address(),
+        tmp_email_address=email_address,
+        email_verified=True,
+    )[0]
+
+
+@benchmark(prepare=prepare_verify_email)
+def verify_email(user: User):
+    user.verify_email()
+
+
+@benchmark(setup=lambda options: create_users(1)[0])
+def add_system_message(user: User):
+    user.add_system_message("benchmark@example.com", code=1)
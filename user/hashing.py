@@ -0,0 +1,184 @@
+# This file hashes and verifies passwords with bounded concurrency.
+#
+# Password hashers are deliberately slow. At most WORKERS hashes run at the same time per worker
+# (the hashers of Django release the GIL while hashing), so a login storm can occupy at most
+# WORKERS cores. If MAX_PENDING hashes are running or waiting already, further requests are
+# rejected with HasherBusy instead of piling up (see hasher_busy_middleware).
+#
+# The synchronous functions hash on the calling thread, which has to wait for the hash anyway.
+# The async functions hash in the pool's threads, so the event loop isn't blocked while hashing.
+# See settings.PASSWORD_HASHING and `manage.py calibrate_password_hasher`.
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+DEFAULTS = {
+    # The number of threads which hash passwords (default: the number of CPUs).
+    "WORKERS": None,
+    # The number of hashes which may be running or waiting at the same time.
+    "MAX_PENDING": 64,
+    # Seconds after which clients should retry requests rejected with HasherBusy.
+    "RETRY_AFTER": 1,
+}
+
+
+def get_setting(name: str):
+    return getattr(settings, "PASSWORD_HASHING", {}).get(name, DEFAULTS[name])
+
+
+class HasherBusy(Exception):
+    """
+    Raised if too many passwords are being hashed already. The request should be retried later.
+    """
+
+    # Reported as the code of GraphQL errors (graphql-core copies the extensions of exceptions).
+    extensions = {"code": "HASHER_BUSY"}
+
+
+class HasherPool:
+    def __init__(self, workers: int = None, max_pending: int = 64):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = threading.BoundedSemaphore(max_pending)
+        # Shared by the pool's threads and the threads of synchronous callers.
+        self.running = threading.BoundedSemaphore(self.workers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="password-hasher"
+        )
+
+    def acquire_slot(self):
+        """
+        Errors:
+        - HasherBusy: MAX_PENDING hashes are running or waiting already.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy("Too many passwords are being hashed, try again later.")
+
+    def hash(self, func, *args):
+        with self.running:
+            return func(*args)
+
+    def submit(self, func, *args) -> Future:
+        """
+        Hashes in the pool's threads.
+
+        Errors:
+        - HasherBusy: MAX_PENDING hashes are running or waiting already.
+        """
+        self.acquire_slot()
+
+        try:
+            future = self.executor.submit(self.hash, func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda future: self.slots.release())
+
+        return future
+
+    def run(self, func, *args):
+        """
+        Hashes on the calling thread, once fewer than WORKERS hashes are running.
+
+        Errors:
+        - HasherBusy: MAX_PENDING hashes are running or waiting already.
+        """
+        self.acquire_slot()
+
+        try:
+            return self.hash(func, *args)
+        finally:
+            self.slots.release()
+
+    async def arun(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> HasherPool:
+    """
+    Returns the pool of this worker, which is created on first use (e.g. after gunicorn forked).
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HasherPool(get_setting("WORKERS"), get_setting("MAX_PENDING"))
+
+    return _pool
+
+
+def make_password(password: str) -> str:
+    # Unusable passwords are not hashed.
+    if password is None:
+        return hashers.make_password(None)
+
+    return get_pool().run(hashers.make_password, password)
+
+
+async def amake_password(password: str) -> str:
+    if password is None:
+        return hashers.make_password(None)
+
+    return await get_pool().arun(hashers.make_password, password)
+
+
+def verify_password(password: str, encoded: str) -> tuple[bool, bool]:
+    """
+    Returns whether the password matches the encoded hash, and whether the hash has to be updated.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, False
+
+    return get_pool().run(hashers.verify_password, password, encoded)
+
+
+async def averify_password(password: str, encoded: str) -> tuple[bool, bool]:
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, False
+
+    return await get_pool().arun(hashers.verify_password, password, encoded)
+
+
+@sync_and_async_middleware
+def hasher_busy_middleware(get_response):
+    """
+    Responds with 503 Service Unavailable and Retry-After if a view raised HasherBusy,
+    e.g. while authenticating with a password.
+    """
+
+    def process_exception(request, exception):
+        if not isinstance(exception, HasherBusy):
+            return None
+
+        response = HttpResponse(str(exception), status=503, content_type="text/plain")
+        response["Retry-After"] = str(get_setting("RETRY_AFTER"))
+
+        return response
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            return get_response(request)
+
+    # Exceptions of views are handed to process_exception() of the middleware.
+    middleware.process_exception = process_exception
+
+    return middleware
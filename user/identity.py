@@ -0,0 +1,94 @@
+# This file contains the lookup of user accounts by their contact fields
+# (email_address, tmp_email_address, phone_number and tmp_phone_number).
+#
+# Email addresses are stored as entered, but compared case-insensitively: every lookup filters
+# by LOWER(field), which is backed by a functional index per email field (see User.Meta).
+# Phone numbers are normalized when they are saved (see User.save), so they are compared as is
+# and backed by a plain index per phone field.
+#
+# Every lookup resolves with a single indexed query.
+
+import re
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
+
+EMAIL_FIELDS = ("email_address", "tmp_email_address")
+PHONE_FIELDS = ("phone_number", "tmp_phone_number")
+
+# Characters commonly used to format phone numbers, e.g. "+49 (0)30 123-456".
+PHONE_NUMBER_FORMATTING = re.compile(r"[\s()./-]")
+
+
+def normalize_email(email_address: str) -> str:
+    if email_address is None:
+        return None
+
+    return email_address.strip().lower()
+
+
+def normalize_phone_number(phone_number: str) -> str:
+    if phone_number is None:
+        return None
+
+    return PHONE_NUMBER_FORMATTING.sub("", phone_number)
+
+
+def users_with_contact(field: str, value: str) -> QuerySet:
+    """
+    Returns all users whose contact field (one of EMAIL_FIELDS or PHONE_FIELDS) matches the value.
+    """
+    users = get_user_model().objects.all()
+
+    if field in EMAIL_FIELDS:
+        # Must match the expressions of the functional indexes.
+        return users.alias(**{f"{field}_lower": Lower(field)}).filter(
+            **{f"{field}_lower": normalize_email(value)}
+        )
+
+    if field in PHONE_FIELDS:
+        return users.filter(**{field: normalize_phone_number(value)})
+
+    raise ValueError(f"{field} is not a contact field.")
+
+
+def existing_email_addresses(email_addresses) -> set:
+    """
+    Returns the normalized email addresses of the given ones which are the (primary) email address
+    of a user, with a single indexed query.
+    """
+    normalized = {normalize_email(email_address) for email_address in email_addresses}
+
+    return set(
+        get_user_model()
+        .objects.annotate(email_address_lower=Lower("email_address"))
+        .filter(email_address_lower__in=normalized)
+        .values_list("email_address_lower", flat=True)
+    )
+
+
+def get_user_by_email(email_address: str, *fields: str):
+    """
+    Returns the user with the given (primary) email address, or None.
+    If fields are given, only those fields are loaded.
+    """
+    users = users_with_contact("email_address", email_address)
+
+    if fields:
+        users = users.only(*fields)
+
+    return users.first()
+
+
+def get_user_by_phone_number(phone_number: str, *fields: str):
+    """
+    Returns the user with the given (primary) phone number, or None.
+    If fields are given, only those fields are loaded.
+    """
+    users = users_with_contact("phone_number", phone_number)
+
+    if fields:
+        users = users.only(*fields)
+
+    return users.first()
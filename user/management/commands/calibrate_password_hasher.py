@@ -0,0 +1,103 @@
+"""
+Benchmarks the default password hasher (settings.PASSWORD_HASHERS[0]) on this host.
+
+Reports the time of a single hash and the throughput of the hasher pool (see user/hashing.py)
+with increasing numbers of threads, so that PASSWORD_HASHING["WORKERS"] and MAX_PENDING can be
+chosen for the host. With --target-ms, the number of iterations (of hashers that have one) is
+suggested, so that a single hash takes about that long.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+PASSWORD = "calibrate-password-hasher"
+
+
+class Command(BaseCommand):
+    help = "Measures the latency and throughput of the password hasher on this host."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=2,
+            help="Duration of every measurement.",
+        )
+        parser.add_argument(
+            "--threads",
+            help="Comma separated numbers of threads (default: 1, 2, 4, ... up to twice the CPUs).",
+        )
+        parser.add_argument("--target-ms", type=float)
+
+    def hash_for(self, hasher, seconds: float) -> int:
+        """
+        Hashes passwords for the given number of seconds and returns the number of hashes.
+        """
+        count = 0
+        end = time.perf_counter() + seconds
+
+        while time.perf_counter() < end:
+            hasher.encode(PASSWORD, hasher.salt())
+            count += 1
+
+        return count
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        cpus = os.cpu_count() or 1
+        seconds = options["seconds"]
+
+        if options["threads"]:
+            thread_counts = [int(threads) for threads in options["threads"].split(",")]
+        else:
+            thread_counts = [1]
+
+            while thread_counts[-1] < cpus * 2:
+                thread_counts.append(thread_counts[-1] * 2)
+
+        start = time.perf_counter()
+        hashes = self.hash_for(hasher, seconds)
+        latency = (time.perf_counter() - start) / hashes
+
+        self.stdout.write(f"Hasher: {hasher.algorithm} ({cpus} CPUs)")
+        self.stdout.write(f"Single hash: {latency * 1000:.1f} ms")
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'threads':>7} {'hashes/s':>9} {'per core':>9} {'latency ms':>10}"
+        )
+
+        for threads in thread_counts:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                counts = list(
+                    executor.map(
+                        lambda _: self.hash_for(hasher, seconds), range(threads)
+                    )
+                )
+                elapsed = time.perf_counter() - start
+
+            throughput = sum(counts) / elapsed
+
+            self.stdout.write(
+                f"{threads:>7} {throughput:>9.1f} {throughput / min(threads, cpus):>9.1f} "
+                f"{threads / throughput * 1000:>10.1f}"
+            )
+
+        if options["target_ms"]:
+            iterations = getattr(hasher, "iterations", None)
+
+            if iterations is None:
+                self.stdout.write(
+                    f"{hasher.algorithm} has no iterations, see its documentation for its work factors."
+                )
+            else:
+                suggested = int(iterations * options["target_ms"] / 1000 / latency)
+                self.stdout.write("")
+                self.stdout.write(
+                    f"{suggested} iterations take about {options['target_ms']:.0f} ms "
+                    f"(currently {iterations})."
+                )
@@ -0,0 +1,291 @@
+"""
+Imports user accounts from a CSV or NDJSON file.
+
+Every record contains an email_address (or email) and optionally a password, first_name,
+last_name, phone_number and email_verified. The file is streamed in batches of --batch-size
+records, so the memory usage doesn't depend on the size of the file. Per batch:
+
+- The email addresses are checked against the database with a single query. Records whose email
+  address already exists (or appears earlier in the file) are reported as duplicates, invalid
+  records as rejected.
+- The passwords are hashed by a pool of --processes processes. Records without a password get an
+  unusable one.
+- The users are inserted with bulk_create in a single transaction.
+
+After every batch, the number of processed records is written to the state file (--state,
+default: <file>.import-state). An interrupted import continues after the last committed batch
+when it is run again. Duplicates and rejects are written to the report (--report, default:
+<file>.import-report.csv) as they occur, so the report is complete after a resumed import, too.
+
+Example:
+
+python manage.py import_users customers.csv --processes 8
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from uuid import uuid4
+
+import django
+from django.contrib.auth import hashers
+from django.core import exceptions
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from user.identity import (
+    existing_email_addresses,
+    normalize_email,
+    normalize_phone_number,
+)
+from user.models import User
+
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+def setup_process():
+    # Processes which are spawned instead of forked have to load the settings (PASSWORD_HASHERS).
+    django.setup()
+
+
+def make_passwords(passwords: list) -> list:
+    return [hashers.make_password(password) for password in passwords]
+
+
+def read_records(path: Path, file_format: str):
+    """
+    Yields the records of the file as dicts.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+
+            # Invalid lines are passed on, so that they are reported as rejected.
+            yield record if isinstance(record, dict) else {"_invalid": line_number}
+
+
+class Command(BaseCommand):
+    help = "Imports user accounts from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="The format of the file (default: by its extension).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="The number of processes which hash passwords.",
+        )
+        parser.add_argument("--state", type=Path)
+        parser.add_argument("--report", type=Path)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the state of a previous import and start from the beginning.",
+        )
+
+    def handle(self, *args, **options):
+        path: Path = options["file"]
+
+        if not path.is_file():
+            raise CommandError(f"{path} doesn't exist.")
+
+        file_format = options["format"] or (
+            "csv" if path.suffix.lower() == ".csv" else "ndjson"
+        )
+        state_path = options["state"] or path.with_name(path.name + ".import-state")
+        report_path = options["report"] or path.with_name(
+            path.name + ".import-report.csv"
+        )
+
+        state = {"processed": 0, "created": 0, "duplicates": 0, "rejected": 0}
+
+        if state_path.exists() and not options["restart"]:
+            state = json.loads(state_path.read_text())
+            self.stdout.write(
+                f"Resuming after {state['processed']} records (see {state_path})."
+            )
+
+        resumed = state["processed"] > 0
+
+        records = read_records(path, file_format)
+        # Skips the records which were imported already.
+        records = islice(records, state["processed"], None)
+
+        with open(
+            report_path, "a" if resumed else "w", newline="", encoding="utf-8"
+        ) as report_file, ProcessPoolExecutor(
+            max_workers=options["processes"], initializer=setup_process
+        ) as executor:
+            report = csv.writer(report_file)
+
+            if not resumed:
+                report.writerow(["record", "email_address", "result", "reason"])
+
+            start = time.perf_counter()
+            imported = 0
+
+            while True:
+                batch = list(islice(records, options["batch_size"]))
+
+                if not batch:
+                    break
+
+                self.import_batch(batch, state, report, executor, options["processes"])
+
+                state["processed"] += len(batch)
+                imported += len(batch)
+
+                # The report is flushed before the state is saved, so a resumed import never
+                # misses reported records.
+                report_file.flush()
+                self.save_state(state_path, state)
+
+                self.stdout.write(
+                    f"{state['processed']} records processed, {state['created']} users created "
+                    f"({imported / (time.perf_counter() - start):.0f} records/s)."
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Import finished: {state['processed']} records, {state['created']} users created, "
+                f"{state['duplicates']} duplicates, {state['rejected']} rejected "
+                f"(see {report_path})."
+            )
+        )
+
+    def import_batch(self, batch: list, state: dict, report, executor, processes: int):
+        # The number of the first record of the batch in the file (starting at 1).
+        offset = state["processed"] + 1
+        users = []
+        passwords = []
+        email_addresses = set()
+
+        for index, record in enumerate(batch):
+            record = {
+                key.strip().lower(): value
+                for key, value in record.items()
+                if key is not None
+            }
+            email_address = record.get("email_address") or record.get("email")
+
+            if "_invalid" in record:
+                reason = "Invalid JSON."
+            elif not email_address:
+                reason = "No email address."
+            else:
+                email_address = str(email_address).strip()
+                reason = None
+
+                try:
+                    validate_email(email_address)
+                except exceptions.ValidationError:
+                    reason = "Invalid email address."
+
+            if reason:
+                report.writerow([offset + index, email_address, "rejected", reason])
+                state["rejected"] += 1
+                continue
+
+            normalized = normalize_email(email_address)
+
+            if normalized in email_addresses:
+                report.writerow(
+                    [offset + index, email_address, "duplicate", "Repeated in file."]
+                )
+                state["duplicates"] += 1
+                continue
+
+            email_addresses.add(normalized)
+
+            users.append(
+                (
+                    offset + index,
+                    User(
+                        username=uuid4(),
+                        email_address=email_address,
+                        email_verified=str(record.get("email_verified", "")).lower()
+                        in TRUE_VALUES,
+                        first_name=record.get("first_name") or None,
+                        last_name=record.get("last_name") or None,
+                        # bulk_create doesn't call User.save, which normalizes phone numbers.
+                        phone_number=normalize_phone_number(
+                            record.get("phone_number") or None
+                        ),
+                        utype=1,
+                    ),
+                )
+            )
+            passwords.append(record.get("password") or None)
+
+        # A single query for the whole batch (including users imported by earlier batches).
+        existing = existing_email_addresses(email_addresses)
+        new_users = []
+        new_passwords = []
+
+        for (record_number, user), password in zip(users, passwords):
+            if normalize_email(user.email_address) in existing:
+                report.writerow(
+                    [
+                        record_number,
+                        user.email_address,
+                        "duplicate",
+                        "Email address already exists.",
+                    ]
+                )
+                state["duplicates"] += 1
+                continue
+
+            new_users.append(user)
+            new_passwords.append(password)
+
+        if not new_users:
+            return
+
+        # Hashes the passwords in one chunk per process.
+        chunk_size = -(-len(new_passwords) // processes)
+        chunks = [
+            new_passwords[i : i + chunk_size]
+            for i in range(0, len(new_passwords), chunk_size)
+        ]
+
+        for user, password in zip(
+            new_users,
+            (
+                password
+                for chunk in executor.map(make_passwords, chunks)
+                for password in chunk
+            ),
+        ):
+            user.password = password
+
+        with transaction.atomic():
+            User.objects.bulk_create(new_users)
+
+        state["created"] += len(new_users)
+
+    def save_state(self, path: Path, state: dict):
+        # Replacing the file is atomic, so an interrupted import never leaves a broken state.
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, path)
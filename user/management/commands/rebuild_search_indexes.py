@@ -0,0 +1,26 @@
+"""
+Rebuilds the search indexes of the admin (see core/search.py), e.g. after the search fields of
+an index changed.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.search import registry
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search indexes of the admin."
+
+    def handle(self, *args, **options):
+        for index in registry:
+            if not index.available():
+                self.stdout.write(
+                    f"Skipped {index.table} (not supported by the database)."
+                )
+                continue
+
+            with transaction.atomic():
+                index.refresh()
+
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {index.table}."))
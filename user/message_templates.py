@@ -0,0 +1,124 @@
+# This file renders system messages (see system_messages.py) when they are read.
+#
+# Templates use the str.format() syntax. Every template is parsed once per process and
+# cached, so rendering a message only joins the cached parts with its variables.
+
+from functools import lru_cache
+from string import Formatter
+
+from django.conf import settings
+
+from .system_messages import system_messages
+
+# Used if a message is not available in the requested locale.
+FALLBACK_LOCALE = "en"
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> tuple:
+    """
+    Parses a template into a tuple of (literal text, variable index, conversion, format spec) parts.
+    """
+    parts = []
+    auto_index = 0
+
+    for literal_text, field_name, format_spec, conversion in Formatter().parse(
+        template
+    ):
+        if field_name is None:
+            parts.append((literal_text, None, None, None))
+            continue
+
+        if field_name == "":
+            index = auto_index
+            auto_index += 1
+        elif field_name.isdigit():
+            index = int(field_name)
+        else:
+            raise ValueError(
+                f"System message templates only support positional variables: {template}"
+            )
+
+        parts.append((literal_text, index, conversion, format_spec))
+
+    return tuple(parts)
+
+
+def variable_count(template: str) -> int:
+    """
+    Returns the number of variables a template needs (its highest variable index + 1).
+    """
+    return max(
+        (
+            index + 1
+            for _, index, _, _ in compile_template(template)
+            if index is not None
+        ),
+        default=0,
+    )
+
+
+def check_variables(templates: dict, variables: list):
+    """
+    Raises a ValueError unless the variables suffice for the templates of every locale,
+    so that messages don't fail when they are rendered.
+    """
+    for locale, template in templates.items():
+        if variable_count(template) > len(variables):
+            raise ValueError(
+                f"The {locale} template of the system message needs "
+                f"{variable_count(template)} variables, {len(variables)} were given."
+            )
+
+
+def render_template(template: str, variables: list) -> str:
+    rendered = []
+
+    for literal_text, index, conversion, format_spec in compile_template(template):
+        rendered.append(literal_text)
+
+        if index is None:
+            continue
+
+        value = variables[index]
+
+        if conversion == "r":
+            value = repr(value)
+        elif conversion == "s":
+            value = str(value)
+        elif conversion == "a":
+            value = ascii(value)
+
+        rendered.append(format(value, format_spec or ""))
+
+    return "".join(rendered)
+
+
+def select_locale(templates: dict, locale: str = None) -> str:
+    """
+    Returns the template of the requested locale (default: settings.LANGUAGE_CODE),
+    falling back to its language (e.g. "de" for "de-at") and to FALLBACK_LOCALE.
+    """
+    locale = (locale or settings.LANGUAGE_CODE).lower()
+
+    for candidate in (locale, locale.split("-")[0], FALLBACK_LOCALE):
+        if candidate in templates:
+            return templates[candidate]
+
+    return next(iter(templates.values()), "")
+
+
+def render_message(
+    code: int, variables: list = None, message: dict = None, locale: str = None
+) -> str:
+    """
+    Renders a system message in a single locale.
+    Coded messages use the templates of system_messages, custom messages (code 0) bring their own.
+    """
+    templates = message if code == 0 else system_messages[code]
+    template = select_locale(templates, locale)
+
+    if variables is None:
+        return template
+
+    return render_template(template, variables)
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread_system_messages(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    SystemMessage = apps.get_model("user", "SystemMessage")
+
+    User.objects.update(
+        unread_system_messages_count=Coalesce(
+            Subquery(
+                SystemMessage.objects.filter(user=OuterRef("pk"), read=False)
+                .order_by()
+                .values("user")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="unread_system_messages_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread_system_messages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="systemmessage",
+            index=models.Index(
+                fields=["user", "read", "-created_at", "-id"],
+                name="system_message_unread_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="systemmessage",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="system_message_inbox_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0002_system_message_inbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="systemmessage",
+            name="variables",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_systemmessage_variables"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="last_phone_code_request",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="last_phone_request",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="next_email_verification_request_allowed",
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.6 on 2026-10-17 06:13
+
+import re
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Q
+
+# A copy of user.identity.normalize_phone_number at the time of this migration.
+PHONE_NUMBER_FORMATTING = re.compile(r"[\s()./-]")
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    User = apps.get_model("user", "User")
+
+    users = User.objects.filter(
+        Q(phone_number__isnull=False) | Q(tmp_phone_number__isnull=False)
+    ).only("id", "phone_number", "tmp_phone_number")
+
+    changed = []
+
+    for user in users.iterator(chunk_size=2000):
+        phone_number = user.phone_number and PHONE_NUMBER_FORMATTING.sub(
+            "", user.phone_number
+        )
+        tmp_phone_number = user.tmp_phone_number and PHONE_NUMBER_FORMATTING.sub(
+            "", user.tmp_phone_number
+        )
+
+        if (phone_number, tmp_phone_number) != (
+            user.phone_number,
+            user.tmp_phone_number,
+        ):
+            user.phone_number = phone_number
+            user.tmp_phone_number = tmp_phone_number
+            changed.append(user)
+
+        if len(changed) >= 2000:
+            User.objects.bulk_update(changed, ["phone_number", "tmp_phone_number"])
+            changed = []
+
+    User.objects.bulk_update(changed, ["phone_number", "tmp_phone_number"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_rate_limit_cache"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email_address"),
+                name="user_email_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("tmp_email_address"),
+                name="user_tmp_email_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["phone_number"], name="user_phone_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["tmp_phone_number"], name="user_tmp_phone_idx"),
+        ),
+    ]
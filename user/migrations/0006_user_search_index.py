@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 09:12
+
+from django.db import migrations
+
+from user.search import user_search_index
+
+
+def create_index(apps, schema_editor):
+    user_search_index.create(apps)
+
+
+def drop_index(apps, schema_editor):
+    user_search_index.drop(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0005_contact_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -2,14 +2,43 @@ from datetime import timedelta
 from django.core import exceptions
 from django.core.validators import validate_email
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Lower
 from django.utils import timezone
 
 from uuid import uuid4
 
+from core.dirty_fields import DirtyFieldsMixin
+
+from . import hashing, tokens
 from .ban_codes import ban_codes
-from .system_messages import system_messages
+from .identity import (
+    PHONE_FIELDS,
+    get_user_by_email,
+    normalize_phone_number,
+    users_with_contact,
+)
+from .message_templates import check_variables, render_message, select_locale
+from .rate_limit import RateLimiter
+from .search import user_search_index  # noqa: F401
+from .system_messages import ban_reasons, system_messages
+
+
+def unread_system_messages_count() -> Coalesce:
+    """
+    Expression which counts the unread system messages of the user in the outer query.
+    """
+    return Coalesce(
+        Subquery(
+            SystemMessage.objects.filter(user=OuterRef("pk"), read=False)
+            .order_by()
+            .values("user")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
 
 
 class UserManager(BaseUserManager):
@@ -29,10 +58,14 @@ class UserManager(BaseUserManager):
         if not username:
             username = uuid4()
 
-        if email_address and User.objects.filter(email_address=email_address).exists():
-            # There should be only one user with a given email address,
-            # therefore objects.get() is ok without error handling.
-            user: User = User.objects.get(email_address=email_address)
+        # A single indexed, case-insensitive lookup (see identity.py).
+        user: User = (
+            get_user_by_email(email_address, "id", "password")
+            if email_address
+            else None
+        )
+
+        if user:
             if user.check_password(password):
                 raise exceptions.ValidationError(
                     "User already registered. Please log in."
@@ -73,14 +106,103 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def deactivate_accounts(self, users: models.QuerySet, reason: int) -> list[int]:
+        """
+        Deactivates the active accounts among users with a single UPDATE and informs them with a
+        system message (code 4), inserted with a single query. Returns the IDs of the deactivated accounts.
+        """
+        if not reason or reason not in ban_codes:
+            raise ValueError(f"Unknown ban code {reason}.")
+
+        return self._set_active(
+            users.filter(is_active=True),
+            {"is_active": False, "ban_reason": reason},
+            # The reason is translated when the message is rendered (see SystemMessage.render).
+            reason,
+            code=4,
+        )
+
+    def reactivate_accounts(self, users: models.QuerySet) -> list[int]:
+        """
+        Reactivates the inactive accounts among users with a single UPDATE and informs them with a
+        system message (code 5), inserted with a single query. Returns the IDs of the reactivated accounts.
+        """
+        # Active accounts have no ban reason (see User.save).
+        return self._set_active(
+            users.filter(is_active=False),
+            {"is_active": True, "ban_reason": 0},
+            code=5,
+        )
+
+    def _set_active(
+        self, users: models.QuerySet, values: dict, *variables, code: int
+    ) -> list[int]:
+        with transaction.atomic():
+            user_ids = list(
+                users.select_for_update().values_list("id", flat=True).order_by()
+            )
+
+            if not user_ids:
+                return []
+
+            messages = [
+                SystemMessage.objects.build(user_id, *variables, code=code)
+                for user_id in user_ids
+            ]
+
+            # The unread counters are updated by the same query (see SystemMessageManager.add_to_users).
+            self.filter(pk__in=user_ids).update(
+                **values,
+                unread_system_messages_count=F("unread_system_messages_count") + 1,
+            )
+            SystemMessage.objects.bulk_create(messages)
+
+            # QuerySet.update() doesn't run User.save(), which updates the cached revocation epochs.
+            tokens.update_cached_epochs(user_ids)
+
+        return user_ids
 
-class User(AbstractBaseUser):
+
+class User(DirtyFieldsMixin, AbstractBaseUser):
     # Essential fields
     username = models.CharField(max_length=40, unique=True)
     utype = models.IntegerField(verbose_name="User Type", default=0)
     is_admin = models.BooleanField(default=False)
     default_superuser = models.BooleanField(default=False)
 
+    # Passwords are hashed and verified with bounded concurrency (see hashing.py).
+    # All four methods raise hashing.HasherBusy if too many passwords are being hashed.
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    async def aset_password(self, raw_password):
+        self.password = await hashing.amake_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password) -> bool:
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+
+        if is_correct and must_update:
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return is_correct
+
+    async def acheck_password(self, raw_password) -> bool:
+        is_correct, must_update = await hashing.averify_password(
+            raw_password, self.password
+        )
+
+        if is_correct and must_update:
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return is_correct
+
     # Password reset info.
     # - password_reset_token stores the latest token for password reset.
     # - password_reset_token_created stores the time when this token was created.
@@ -95,32 +217,36 @@ class User(AbstractBaseUser):
     password_reset_expiration_time = timedelta(minutes=15)
     password_reset_duration_between_requests = timedelta(minutes=12)
 
+    # The anti-spam state is stored in the cache, not in the user's row (see rate_limit.py).
+    password_reset_limiter = RateLimiter(
+        "password-reset", limit=1, window=password_reset_duration_between_requests
+    )
+
     def seconds_until_next_password_reset(self) -> int:
         """
         Returns the number of seconds until the next password reset can be requested.
         If there has never been a password reset request or the last request is older
         than the duration between requests, this function returns 0.
         """
+        seconds = self.password_reset_limiter.seconds_until_allowed(self.pk)
 
-        if not self.password_reset_token or not self.password_reset_token_created:
-            return 0
+        # A token created within the duration between requests blocks as well,
+        # even if the request has not been registered with the rate limiter.
+        if self.password_reset_token and self.password_reset_token_created:
+            time_remaining = (
+                self.password_reset_token_created
+                + self.password_reset_duration_between_requests
+                - timezone.now()
+            )
+            seconds = max(seconds, int(time_remaining.total_seconds()))
 
-        # To calculate the time until the next password reset is possible,
-        # check if the current datetime is greater than the datetime when the token was created
-        # plus the password_reset_duration_between_requests.
-        time_remaining = (
-            self.password_reset_token_created
-            + self.password_reset_duration_between_requests
-            - timezone.now()
-        )
+        return seconds
 
-        # If the time remaining is negative, just return 0.
-        if time_remaining.total_seconds() < 0:
-            return 0
-
-        # Otherwise, return the time remaining in seconds.
-        # (time_remaining.total_seconds() returns a float, so we need to cast it to int.)
-        return int(time_remaining.total_seconds())
+    def register_password_reset_request(self) -> bool:
+        """
+        Registers a password reset request. Returns False if the request is not allowed yet.
+        """
+        return self.password_reset_limiter.hit(self.pk)
 
     def reset_token_valid(self) -> bool:
         """
@@ -165,31 +291,35 @@ class User(AbstractBaseUser):
     email_verification_expiration_time = timedelta(minutes=15)
     email_block_duration_between_requests = timedelta(minutes=10)
 
-    next_email_verification_request_allowed = models.DateTimeField(
-        null=True, blank=True
+    email_request_limiter = RateLimiter(
+        "email-verification", limit=1, window=email_block_duration_between_requests
     )
 
+    # Formerly a column, now an adapter for email_request_limiter.
+    @property
+    def next_email_verification_request_allowed(self):
+        return self.email_request_limiter.allowed_at(self.pk)
+
+    @next_email_verification_request_allowed.setter
+    def next_email_verification_request_allowed(self, value):
+        if value:
+            self.email_request_limiter.block_until(self.pk, value)
+        else:
+            self.email_request_limiter.reset(self.pk)
+
     def seconds_until_next_email_request(self) -> int:
         """
         Returns the number of seconds until the next email verification can be requested.
         If there has never been a email verification request or the last request is older
         than the duration between requests, this function returns 0.
         """
+        return self.email_request_limiter.seconds_until_allowed(self.pk)
 
-        if not self.next_email_verification_request_allowed:
-            return 0
-
-        # To calculate the time until the next email verification is possible, check the
-        # differnece between the current datetime and the datetime when the next request is allowed.
-        time_remaining = self.next_email_verification_request_allowed - timezone.now()
-
-        # If the time remaining is negative, just return 0.
-        if time_remaining.total_seconds() < 0:
-            return 0
-
-        # Otherwise, return the time remaining in seconds.
-        # (time_remaining.total_seconds() returns a float, so we need to cast it to int.)
-        return int(time_remaining.total_seconds())
+    def register_email_request(self) -> bool:
+        """
+        Registers an email verification request. Returns False if the request is not allowed yet.
+        """
+        return self.email_request_limiter.hit(self.pk)
 
     def email_verification_token_valid(self) -> bool:
         """
@@ -226,14 +356,91 @@ class User(AbstractBaseUser):
     country = models.CharField(max_length=255, null=True, blank=True)
 
     # Anti-Spam
-    last_phone_request = models.DateTimeField(null=True, blank=True)
-    last_phone_code_request = models.DateTimeField(null=True, blank=True)
+    phone_block_duration_between_requests = timedelta(minutes=1)
+    phone_code_block_duration_between_requests = timedelta(minutes=1)
+
+    phone_request_limiter = RateLimiter(
+        "phone-request", limit=1, window=phone_block_duration_between_requests
+    )
+    phone_code_request_limiter = RateLimiter(
+        "phone-code-request", limit=1, window=phone_code_block_duration_between_requests
+    )
+
+    # Formerly columns, now adapters for the phone rate limiters.
+    # They return None once the duration between requests has passed.
+    @property
+    def last_phone_request(self):
+        return self.phone_request_limiter.last_attempt(self.pk)
+
+    @last_phone_request.setter
+    def last_phone_request(self, value):
+        if value:
+            self.phone_request_limiter.record(self.pk, value)
+        else:
+            self.phone_request_limiter.reset(self.pk)
+
+    @property
+    def last_phone_code_request(self):
+        return self.phone_code_request_limiter.last_attempt(self.pk)
+
+    @last_phone_code_request.setter
+    def last_phone_code_request(self, value):
+        if value:
+            self.phone_code_request_limiter.record(self.pk, value)
+        else:
+            self.phone_code_request_limiter.reset(self.pk)
+
+    def seconds_until_next_phone_request(self) -> int:
+        return self.phone_request_limiter.seconds_until_allowed(self.pk)
+
+    def register_phone_request(self) -> bool:
+        """
+        Registers a phone number verification request. Returns False if the request is not allowed yet.
+        """
+        return self.phone_request_limiter.hit(self.pk)
+
+    def seconds_until_next_phone_code_request(self) -> int:
+        return self.phone_code_request_limiter.seconds_until_allowed(self.pk)
+
+    def register_phone_code_request(self) -> bool:
+        """
+        Registers a phone code request. Returns False if the request is not allowed yet.
+        """
+        return self.phone_code_request_limiter.hit(self.pk)
+
+    # The number of unread system messages. It is only changed with F() expressions
+    # (see SystemMessageManager and mark_system_messages_read), therefore save() skips it (see DirtyFieldsMixin).
+    unread_system_messages_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("unread_system_messages_count",)
 
     objects: UserManager = UserManager()
 
     USERNAME_FIELD = "username"
     EMAIL_FIELD = "email"
 
+    class Meta:
+        indexes = [
+            # Lookups by contact fields (see identity.py). Email addresses are compared case-insensitively.
+            models.Index(Lower("email_address"), name="user_email_lower_idx"),
+            models.Index(Lower("tmp_email_address"), name="user_tmp_email_lower_idx"),
+            models.Index(fields=["phone_number"], name="user_phone_idx"),
+            models.Index(fields=["tmp_phone_number"], name="user_tmp_phone_idx"),
+        ]
+
+    # Set on users authenticated by token (see authentication.py).
+    load_deferred_together = False
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # The first access of a deferred field loads all deferred fields, instead of one query per field.
+        if self.load_deferred_together and fields is not None:
+            deferred_fields = self.get_deferred_fields()
+
+            if all(field in deferred_fields for field in fields):
+                fields = list(deferred_fields)
+
+        super().refresh_from_db(using, fields, **kwargs)
+
     def set_last_login(self):
         self.last_login = timezone.now()
         self.save()
@@ -255,18 +462,14 @@ class User(AbstractBaseUser):
             self.tmp_email_address = None
 
         self.email_token = None
-        self.save()
 
-        # Add a system message to every user account of which an email address was removed.
-        users_to_inform = User.objects.filter(
-            Q(tmp_email_address=self.email_address), ~Q(email_address=None)
-        )
+        with transaction.atomic():
+            self.save()
 
-        for user in users_to_inform:
-            user: User
-            user.add_system_message(self.email_address, code=1)
-            user.tmp_email_address = None
-            user.save()
+            # Add a system message to every user account of which an email address was removed.
+            self.remove_unverified_contact(
+                "tmp_email_address", "email_address", self.email_address, code=1
+            )
 
     def verify_phone(self):
         if not self.tmp_phone_number:
@@ -275,18 +478,44 @@ class User(AbstractBaseUser):
         # Set the phone number to primary.
         self.phone_number = self.tmp_phone_number
         self.tmp_phone_number = None
-        self.save()
 
-        # Add a system message to every user account of which a phone number was removed.
-        users_to_inform = User.objects.filter(
-            Q(tmp_phone_number=self.phone_number), ~Q(phone_number=None)
+        with transaction.atomic():
+            self.save()
+
+            # Add a system message to every user account of which a phone number was removed.
+            self.remove_unverified_contact(
+                "tmp_phone_number", "phone_number", self.phone_number, code=2
+            )
+
+    def remove_unverified_contact(
+        self, tmp_field: str, primary_field: str, value: str, code: int
+    ):
+        """
+        Removes a contact (email address or phone number), which was just verified on this account,
+        from the tmp_field of all other user accounts and adds a system message (code) to each of them.
+
+        Uses the same number of queries regardless of the number of affected accounts.
+        """
+        users_to_inform = users_with_contact(tmp_field, value).exclude(
+            **{primary_field: None}
+        )
+
+        user_ids = list(
+            users_to_inform.select_for_update().values_list("id", flat=True)
         )
 
-        for user in users_to_inform:
-            user: User
-            user.add_system_message(self.phone_number, code=2)
-            user.tmp_phone_number = None
-            user.save()
+        if not user_ids:
+            return
+
+        SystemMessage.objects.add_to_users(user_ids, value, code=code)
+        User.objects.filter(id__in=user_ids).update(**{tmp_field: None})
+
+    def log_out_everywhere(self):
+        """
+        Revokes all tokens which were issued until now (see tokens.py).
+        """
+        self.last_logout_all = timezone.now()
+        self.save()
 
     def deactivate_account(self, reason):
         self.is_active = False
@@ -324,32 +553,79 @@ class User(AbstractBaseUser):
             message={'en': 'This is a message with four variables. 1: {} 2: {} 3: {} 4: {}.'}
         )
         """
-        if code:
-            message = system_messages[code]
-        else:
-            if not message:
-                raise ValueError(
-                    "User.add_system_message called without providing either code or message."
+        sys_message = SystemMessage.objects.build(
+            self.pk, *variables, code=code, message=message
+        )
+
+        with transaction.atomic():
+            User.objects.filter(pk=self.pk).update(
+                unread_system_messages_count=F("unread_system_messages_count") + 1
+            )
+
+            sys_message.save()
+
+        return sys_message
+
+    def system_message_inbox(
+        self, unread_only: bool = False, before: "SystemMessage" = None, limit: int = 50
+    ) -> list["SystemMessage"]:
+        """
+        Returns up to limit system messages, newest first.
+
+        To get the next page, pass the last message of the current page as before.
+        Every page is read from the inbox indexes, regardless of the total number of messages.
+        """
+        messages = self.system_messages.order_by("-created_at", "-id")
+
+        if unread_only:
+            messages = messages.filter(read=False)
+
+        if before:
+            messages = messages.filter(
+                Q(created_at__lt=before.created_at)
+                | Q(created_at=before.created_at, id__lt=before.id)
+            )
+
+        return list(messages[:limit])
+
+    def mark_system_messages_read(self, message_ids: list[int] = None) -> int:
+        """
+        Marks the given system messages (default: all) as read with a single UPDATE
+        and returns the number of messages which were unread before.
+        """
+        with transaction.atomic():
+            # Lock the user first, so that messages added in the meantime are counted correctly.
+            user = User.objects.select_for_update().only("id").get(pk=self.pk)
+
+            messages = user.system_messages.filter(read=False)
+
+            if message_ids is not None:
+                messages = messages.filter(id__in=message_ids)
+
+            updated = messages.update(read=True, read_at=timezone.now())
+
+            if updated:
+                User.objects.filter(pk=self.pk).update(
+                    unread_system_messages_count=F("unread_system_messages_count")
+                    - updated
                 )
 
-            code = 0
+        self.refresh_from_db(fields=["unread_system_messages_count"])
 
-        if variables:
-            formatted_message = {}
+        return updated
 
-            for locale, text in message.items():
-                formatted_text = text.format(*variables)
-                formatted_message.update({locale: formatted_text})
-        else:
-            formatted_message = message
+    def mark_all_system_messages_read(self) -> int:
+        return self.mark_system_messages_read()
 
-        sys_message: SystemMessage = SystemMessage.objects.create(
-            user=self, code=code, message=formatted_message
+    def recount_unread_system_messages(self):
+        """
+        Recalculates unread_system_messages_count, e.g. after messages were changed in the admin.
+        """
+        User.objects.filter(pk=self.pk).update(
+            unread_system_messages_count=unread_system_messages_count()
         )
 
-        sys_message.save()
-
-        return sys_message
+        self.refresh_from_db(fields=["unread_system_messages_count"])
 
     def __str__(self):
         return (
@@ -367,8 +643,31 @@ class User(AbstractBaseUser):
         if self.is_active:
             self.ban_reason = 0
 
+        # Phone numbers are stored normalized, so that they can be looked up by index (see identity.py).
+        deferred_fields = self.get_deferred_fields()
+
+        for field in PHONE_FIELDS:
+            if field not in deferred_fields:
+                setattr(self, field, normalize_phone_number(getattr(self, field)))
+
+        # Logging out everywhere and bans revoke the user's tokens (see tokens.py).
+        update_fields = kwargs.get("update_fields")
+
+        if update_fields is not None:
+            revoke = any(field in update_fields for field in tokens.REVOCATION_FIELDS)
+        elif self._state.adding or not hasattr(self, "_saved_values"):
+            revoke = True
+        else:
+            revoke = any(
+                field in self.get_dirty_fields() for field in tokens.REVOCATION_FIELDS
+            )
+
+        # Only changed fields are written (see DirtyFieldsMixin), which includes is_admin and ban_reason.
         super(User, self).save(*args, **kwargs)
 
+        if revoke:
+            tokens.update_revocation_epoch(self)
+
     # Needed for Django functionality
     def has_perm(self, perm, obj=None):
         "Does the user have a specific permission?"
@@ -389,7 +688,67 @@ class User(AbstractBaseUser):
         return self.utype >= 7 or self.is_admin
 
 
-class SystemMessage(models.Model):
+class SystemMessageManager(models.Manager):
+    def build(
+        self, user_id: int, *variables, code: int = None, message: dict = None
+    ) -> "SystemMessage":
+        """
+        Returns an unsaved system message. Only custom messages (code 0) store their message,
+        coded messages are rendered from system_messages when they are read.
+        See User.add_system_message for the arguments.
+
+        Raises a ValueError if the message needs more variables than given in any locale.
+        """
+        if code:
+            if code not in system_messages:
+                raise KeyError(f"Unknown system message code {code}.")
+
+            message = None
+        else:
+            if not message:
+                raise ValueError(
+                    "User.add_system_message called without providing either code or message."
+                )
+
+            code = 0
+
+        # Custom messages without variables are shown as they are (see render_message()).
+        if code or variables:
+            check_variables(message or system_messages[code], variables)
+
+        return self.model(
+            user_id=user_id,
+            code=code,
+            message=message,
+            variables=[
+                value if isinstance(value, (int, float, bool)) else str(value)
+                for value in variables
+            ]
+            or None,
+        )
+
+    def add_to_users(
+        self, user_ids: list[int], *variables, code: int = None, message: dict = None
+    ) -> list["SystemMessage"]:
+        """
+        Adds the same system message to multiple users with a single query.
+        See User.add_system_message for the arguments.
+        """
+        messages = [
+            self.build(user_id, *variables, code=code, message=message)
+            for user_id in user_ids
+        ]
+
+        with transaction.atomic():
+            # The counters are updated first, as this locks the users (see User.mark_system_messages_read).
+            User.objects.filter(pk__in=user_ids).update(
+                unread_system_messages_count=F("unread_system_messages_count") + 1
+            )
+
+            return self.bulk_create(messages)
+
+
+class SystemMessage(DirtyFieldsMixin, models.Model):
     """
     System messages sent to users.
     """
@@ -397,13 +756,59 @@ class SystemMessage(models.Model):
     user: User = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="system_messages"
     )
-    # Message in the format {locale: message}
+    # Only custom messages (code 0) store their message, in the format {locale: message}.
+    # Coded messages are rendered from system_messages.py in the requested locale (see render()).
     message = models.JSONField(null=True, blank=True)
     code = models.IntegerField(null=True, blank=True)
+    # The variables which are inserted into the message, in the format [variable, ...].
+    # Messages created before variables were stored contain the formatted message instead.
+    variables = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
 
+    objects: SystemMessageManager = SystemMessageManager()
+
+    class Meta:
+        indexes = [
+            # Inbox of unread messages and unread counts.
+            models.Index(
+                fields=["user", "read", "-created_at", "-id"],
+                name="system_message_unread_idx",
+            ),
+            # Inbox of all messages.
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="system_message_inbox_idx"
+            ),
+        ]
+
     @property
     def custom(self):
         return True if self.code == 0 else False
+
+    def render(self, locale: str = None) -> str:
+        """
+        Returns the message in the given locale (default: settings.LANGUAGE_CODE).
+        """
+        # Messages created before variables were stored are already formatted.
+        if self.variables is None and self.message:
+            return select_locale(self.message, locale)
+
+        variables = self.variables
+
+        # Deactivations store their ban code, whose reason is inserted in the same locale.
+        if self.code == 4 and variables and isinstance(variables[0], int):
+            reason = ban_reasons.get(variables[0])
+            variables = [
+                (
+                    select_locale(reason, locale)
+                    if reason
+                    else ban_codes.get(variables[0], "")
+                ),
+                *variables[1:],
+            ]
+
+        return render_message(self.code, variables, self.message, locale)
+
+    def __str__(self):
+        return self.render()
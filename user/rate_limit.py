@@ -0,0 +1,164 @@
+# This file contains the rate limiter used by the anti-spam logic of user accounts.
+#
+# The state of a limiter is kept in Django's cache framework instead of the database, so that
+# (throttled) requests don't write to the user's row. The cache is configured with
+# settings.RATE_LIMIT_CACHE. It has to be shared by all workers (e.g. the database cache),
+# otherwise every worker would limit on its own, so the local-memory cache is rejected.
+
+import math
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as datetime_timezone
+
+from core.caches import get_shared_cache
+from django.conf import settings
+from django.utils import timezone
+
+
+def get_cache():
+    return get_shared_cache(
+        getattr(settings, "RATE_LIMIT_CACHE", "default"), "RATE_LIMIT_CACHE"
+    )
+
+
+class RateLimiter:
+    """
+    Sliding window rate limiter: allows limit requests per action and identifier (e.g. the user's ID)
+    within any period of the length of window. Unsaved users have no ID, so they can't be limited.
+
+    Usage:
+
+    limiter = RateLimiter("email-verification", limit=1, window=timedelta(minutes=10))
+
+    if not limiter.hit(user.id):
+        raise ...  # Throttled, try again in limiter.seconds_until_allowed(user.id) seconds.
+    """
+
+    # A hit is recorded while holding a lock of its identifier. Concurrent hits for the same
+    # identifier don't wait for the lock, they are throttled (see hit()). The lock expires after
+    # lock_timeout seconds, in case its hit never finished.
+    lock_timeout = 5
+
+    def __init__(self, action: str, limit: int, window: timedelta):
+        self.action = action
+        self.limit = limit
+        self.window = window
+
+    def key(self, identifier) -> str:
+        if identifier is None:
+            raise ValueError(
+                f"The {self.action} rate limit requires an identifier, e.g. a saved user's ID."
+            )
+
+        return f"rate-limit:{self.action}:{identifier}"
+
+    def attempts(self, identifier, now: float = None) -> list[float]:
+        """
+        Returns the timestamps of all requests within the current window, oldest first.
+        """
+        if identifier is None:
+            return []
+
+        now = now or time.time()
+        start = now - self.window.total_seconds()
+
+        return [
+            timestamp
+            for timestamp in get_cache().get(self.key(identifier), [])
+            if timestamp > start
+        ]
+
+    def store(self, identifier, attempts: list[float], now: float):
+        if not attempts:
+            get_cache().delete(self.key(identifier))
+            return
+
+        # The entry expires together with its newest request.
+        timeout = math.ceil(attempts[-1] + self.window.total_seconds() - now)
+        get_cache().set(self.key(identifier), attempts[-self.limit :], max(timeout, 1))
+
+    def hit(self, identifier) -> bool:
+        """
+        Records a request and returns True, or returns False if the request is throttled.
+
+        A request is also throttled while a concurrent request for the same identifier is being
+        recorded, instead of waiting for it: the concurrent requests of a burst would mostly be
+        throttled anyway, and waiting would tie up the worker.
+        """
+        cache = get_cache()
+        lock_key = f"{self.key(identifier)}:lock"
+
+        if not cache.add(lock_key, True, self.lock_timeout):
+            return False
+
+        try:
+            now = time.time()
+            attempts = self.attempts(identifier, now)
+
+            if len(attempts) >= self.limit:
+                return False
+
+            self.store(identifier, attempts + [now], now)
+
+            return True
+        finally:
+            cache.delete(lock_key)
+
+    def record(self, identifier, when: datetime = None):
+        """
+        Records a request regardless of the limit.
+        """
+        now = time.time()
+        timestamp = when.timestamp() if when else now
+
+        self.store(
+            identifier, sorted(self.attempts(identifier, now) + [timestamp]), now
+        )
+
+    def block_until(self, identifier, when: datetime):
+        """
+        Throttles all requests until the given datetime.
+        """
+        timestamp = when.timestamp() - self.window.total_seconds()
+
+        self.store(identifier, [timestamp] * self.limit, time.time())
+
+    def reset(self, identifier):
+        if identifier is not None:
+            get_cache().delete(self.key(identifier))
+
+    def last_attempt(self, identifier) -> datetime:
+        """
+        Returns the datetime of the latest request within the current window, or None.
+        """
+        attempts = self.attempts(identifier)
+
+        if not attempts:
+            return None
+
+        return datetime.fromtimestamp(attempts[-1], tz=datetime_timezone.utc)
+
+    def allowed_at(self, identifier) -> datetime:
+        """
+        Returns the datetime at which the next request is allowed, or None if it is allowed now.
+        """
+        attempts = self.attempts(identifier)
+
+        if len(attempts) < self.limit:
+            return None
+
+        return datetime.fromtimestamp(
+            attempts[-self.limit] + self.window.total_seconds(),
+            tz=datetime_timezone.utc,
+        )
+
+    def seconds_until_allowed(self, identifier) -> int:
+        """
+        Returns the number of seconds until the next request is allowed (0 if it is allowed now).
+        """
+        allowed_at = self.allowed_at(identifier)
+
+        if not allowed_at:
+            return 0
+
+        return max(int((allowed_at - timezone.now()).total_seconds()), 0)
@@ -0,0 +1,19 @@
+# This file contains the search index of user accounts, which is used by the UserAdmin
+# (see core/search.py). It covers the username and all contact fields.
+
+from core.search import SearchIndex
+
+user_search_index = SearchIndex(
+    "user_search",
+    "user.User",
+    (
+        "id",
+        "username",
+        "first_name",
+        "last_name",
+        "email_address",
+        "tmp_email_address",
+        "phone_number",
+        "tmp_phone_number",
+    ),
+)
@@ -18,4 +18,26 @@ system_messages = {
         "de": "Du hast jetzt eine neue primäre E-Mail-Adresse ({}). Bitte bestätige diese, um deine Account-Sicherheit "
         "zu gewährleisten.",
     },
+    4: {
+        "en": "Your account was deactivated: {}",
+        "de": "Dein Account wurde deaktiviert: {}",
+    },
+    5: {
+        "en": "Your account was reactivated.",
+        "de": "Dein Account wurde wieder aktiviert.",
+    },
+}
+
+# The reasons of deactivations (see ban_codes.py), which are inserted into message 4 in the
+# locale of the message. The message stores the ban code as its variable.
+ban_reasons = {
+    1: {
+        "en": "No reason given.",
+        "de": "Es wurde kein Grund angegeben.",
+    },
+    2: {
+        "en": "Your only email address was verified on another account. Please create a new account or log in.",
+        "de": "Deine einzige E-Mail-Adresse wurde auf einem anderen Account bestätigt. Bitte erstelle einen neuen "
+        "Account oder melde dich an.",
+    },
 }
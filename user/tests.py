@@ -0,0 +1,142 @@
+import json
+import math
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from . import tokens, views
+from .models import SystemMessage, User
+
+
+class RemoveUnverifiedContactQueriesTest(TestCase):
+    """
+    Verifying a contact removes it from the other accounts with a constant number of queries,
+    however many accounts are affected (see User.remove_unverified_contact()).
+    """
+
+    def create_accounts(self, name: str, other_accounts: int) -> User:
+        """
+        Creates a user with an unverified email address, which other_accounts accounts
+        have as their unverified email address as well.
+        """
+        user = User.objects.create(
+            username=name,
+            email_address=f"{name}@example.com",
+            email_verified=True,
+            tmp_email_address=f"{name}-new@example.com",
+        )
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{name}-{i}",
+                    email_address=f"{name}-{i}@example.com",
+                    tmp_email_address=user.tmp_email_address,
+                )
+                for i in range(other_accounts)
+            ]
+        )
+
+        return user
+
+    def test_verify_email(self):
+        user = self.create_accounts("single", 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            user.verify_email()
+
+        user = self.create_accounts("many", 20)
+
+        with self.assertNumQueries(len(queries)):
+            user.verify_email()
+
+        others = User.objects.filter(username__startswith="many-")
+        self.assertEqual(user.email_address, "many-new@example.com")
+        self.assertFalse(others.exclude(tmp_email_address=None).exists())
+        self.assertEqual(
+            SystemMessage.objects.filter(user__in=others, code=1).count(), 20
+        )
+
+    def test_remove_unverified_contact(self):
+        user = self.create_accounts("single", 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            user.remove_unverified_contact(
+                "tmp_email_address", "email_address", user.tmp_email_address, code=1
+            )
+
+        user = self.create_accounts("many", 20)
+
+        with self.assertNumQueries(len(queries)):
+            user.remove_unverified_contact(
+                "tmp_email_address", "email_address", user.tmp_email_address, code=1
+            )
+
+        others = User.objects.filter(username__startswith="many-")
+        self.assertFalse(others.exclude(tmp_email_address=None).exists())
+
+
+class TokenTest(TestCase):
+    """
+    Tokens are issued by the token view and revoked by deactivating the account, even if a stale
+    epoch is added to the cache concurrently (see tokens.py).
+    """
+
+    def setUp(self):
+        tokens.get_cache().clear()
+        self.user = User.objects.create_user(
+            email_address="token@example.com", password="correct horse"
+        )
+
+    def request_token(self, password: str):
+        return self.client.post(
+            "/auth/token",
+            json.dumps({"emailAddress": "token@example.com", "password": password}),
+            content_type="application/json",
+        )
+
+    def test_token_view(self):
+        self.assertEqual(self.request_token("wrong").status_code, 401)
+
+        response = self.request_token("correct horse")
+        token = response.json()["token"]
+
+        self.assertEqual(tokens.get_user_id(token), self.user.pk)
+
+    def test_token_view_throttling(self):
+        for _ in range(views.token_email_limiter.limit):
+            self.assertEqual(self.request_token("wrong").status_code, 401)
+
+        response = self.request_token("correct horse")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_deactivation_overwrites_stale_epoch(self):
+        token = self.request_token("correct horse").json()["token"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.deactivate_accounts(User.objects.filter(pk=self.user.pk), 1)
+
+        # A concurrent cache miss, which read the epoch before the commit.
+        tokens.get_cache().add(tokens.epoch_key(self.user.pk), 0.0)
+
+        self.assertEqual(tokens.get_revocation_epoch(self.user.pk), math.inf)
+        self.assertIsNone(tokens.get_user_id(token))
+        self.assertEqual(self.request_token("correct horse").status_code, 401)
+
+
+class DeactivationMessageTest(TestCase):
+    def test_reason_is_translated(self):
+        user = User.objects.create(username="banned")
+        User.objects.deactivate_accounts(User.objects.filter(pk=user.pk), 1)
+        message = SystemMessage.objects.get(user=user, code=4)
+
+        self.assertEqual(message.variables, [1])
+        self.assertEqual(
+            message.render("en"), "Your account was deactivated: No reason given."
+        )
+        self.assertEqual(
+            message.render("de"),
+            "Dein Account wurde deaktiviert: Es wurde kein Grund angegeben.",
+        )
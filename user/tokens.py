@@ -0,0 +1,159 @@
+# This file contains the signed tokens of the stateless authentication.
+#
+# A token contains the user's ID and its issue time, signed with the SECRET_KEY. Clients send it
+# in the header "Authorization: Bearer <token>" (see authentication.py), instead of a session
+# cookie. Verifying a token doesn't query the database:
+#
+# - The signature and the lifetime (settings.AUTH_TOKENS["LIFETIME"]) are checked locally.
+# - Tokens issued before the user's revocation epoch are rejected. The epoch is the time of the
+#   user's last "log out everywhere" (User.last_logout_all), or infinity if the user is inactive
+#   (banned). It is cached per user and only read from the database on a cache miss.
+# - The user of the request is loaded lazily: only its ID is known, other fields are loaded on
+#   first access (as deferred fields).
+#
+# User.save() overwrites the cached epoch whenever last_logout_all or is_active change, so logging
+# out everywhere and bans take effect immediately. The epochs are written with cache.set() after
+# the transaction is committed, never deleted: a concurrent cache miss, which read the stale epoch
+# before the commit, only adds it to the cache if no epoch is cached (cache.add()), so it can't
+# replace the new one. The cache has to be shared by all workers (see core/caches.py and
+# settings.AUTH_TOKENS["CACHE_ALIAS"]). Code which changes these fields with QuerySet.update() has
+# to call update_cached_epochs().
+#
+# Clients obtain tokens from the token view (see views.py).
+
+import math
+import time
+
+from core.caches import get_shared_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+DEFAULTS = {
+    # The alias of the cache in settings.CACHES, which stores the revocation epochs.
+    "CACHE_ALIAS": "shared",
+    # Seconds after which a token expires.
+    "LIFETIME": 14 * 24 * 60 * 60,
+    # Seconds after which a cached epoch is read from the database again.
+    "EPOCH_TIMEOUT": 60 * 60,
+}
+
+SALT = "user.tokens"
+
+# The fields which revoke tokens when they change.
+REVOCATION_FIELDS = ("last_logout_all", "is_active")
+
+
+def get_setting(name: str):
+    return getattr(settings, "AUTH_TOKENS", {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return get_shared_cache(get_setting("CACHE_ALIAS"), 'AUTH_TOKENS["CACHE_ALIAS"]')
+
+
+def epoch_key(user_id) -> str:
+    return f"auth-epoch:{user_id}"
+
+
+def revocation_epoch(last_logout_all, is_active: bool) -> float:
+    """
+    Returns the time before which all tokens of a user are revoked.
+    """
+    if not is_active:
+        return math.inf
+
+    return last_logout_all.timestamp() if last_logout_all else 0.0
+
+
+def read_revocation_epochs(user_ids) -> dict:
+    """
+    Returns the revocation epochs of the given users from the database ({user ID: epoch}).
+    Unknown users have no epoch.
+    """
+    # Read from the primary, replicas may not contain the latest logout or ban (see core/routers.py).
+    users = (
+        get_user_model()
+        .objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk__in=user_ids)
+        .values_list("pk", *REVOCATION_FIELDS)
+    )
+
+    return {pk: revocation_epoch(*values) for pk, *values in users}
+
+
+def get_revocation_epoch(user_id) -> float:
+    """
+    Returns the cached revocation epoch of a user. Only cache misses query the database.
+    """
+    cache = get_cache()
+    epoch = cache.get(epoch_key(user_id))
+
+    if epoch is not None:
+        return epoch
+
+    epoch = read_revocation_epochs([user_id]).get(user_id, math.inf)
+
+    # Doesn't overwrite an epoch which was updated in the meantime (see update_revocation_epoch()).
+    cache.add(epoch_key(user_id), epoch, get_setting("EPOCH_TIMEOUT"))
+
+    return epoch
+
+
+def update_revocation_epoch(user):
+    """
+    Updates the cached epoch of the user, once the current transaction is committed.
+    """
+    if any(field in user.get_deferred_fields() for field in REVOCATION_FIELDS):
+        update_cached_epochs([user.pk])
+        return
+
+    epoch = revocation_epoch(user.last_logout_all, user.is_active)
+
+    transaction.on_commit(
+        lambda: get_cache().set(epoch_key(user.pk), epoch, get_setting("EPOCH_TIMEOUT"))
+    )
+
+
+def update_cached_epochs(user_ids: list):
+    """
+    Updates the cached epochs of the given users from the database once the current transaction
+    is committed, e.g. after last_logout_all or is_active were changed with QuerySet.update().
+    """
+
+    def update():
+        epochs = read_revocation_epochs(user_ids)
+        get_cache().set_many(
+            {epoch_key(user_id): epochs.get(user_id, math.inf) for user_id in user_ids},
+            get_setting("EPOCH_TIMEOUT"),
+        )
+
+    transaction.on_commit(update)
+
+
+def create_token(user) -> str:
+    """
+    Returns a new token of the user, valid for settings.AUTH_TOKENS["LIFETIME"] seconds.
+    """
+    return signing.dumps({"uid": user.pk, "iat": time.time()}, salt=SALT)
+
+
+def get_user_id(token: str):
+    """
+    Returns the ID of the token's user, or None if the token is invalid, expired or revoked.
+    """
+    try:
+        payload = signing.loads(token, salt=SALT)
+        user_id = payload["uid"]
+        issued_at = float(payload["iat"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+    if issued_at + get_setting("LIFETIME") < time.time():
+        return None
+
+    if issued_at < get_revocation_epoch(user_id):
+        return None
+
+    return user_id
@@ -0,0 +1,72 @@
+# This file contains the views of the user app.
+
+import json
+from datetime import timedelta
+
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import hashing, tokens
+from .identity import get_user_by_email, normalize_email
+from .rate_limit import RateLimiter
+
+# Password guessing is throttled per email address and per client IP address (see rate_limit.py).
+token_email_limiter = RateLimiter("token-email", limit=10, window=timedelta(minutes=15))
+token_ip_limiter = RateLimiter("token-ip", limit=100, window=timedelta(minutes=15))
+
+
+def throttled(seconds: int) -> JsonResponse:
+    response = JsonResponse({"error": "Too many attempts."}, status=429)
+    response["Retry-After"] = str(max(seconds, 1))
+
+    return response
+
+
+@csrf_exempt
+@require_POST
+def token_view(request):
+    """
+    Issues a token for the stateless authentication (see tokens.py). Expects the JSON body
+    {"emailAddress": ..., "password": ...} and responds with {"token": ..., "expiresIn": seconds},
+    or with 401 if the credentials are wrong or the user is inactive, or with 429 (and
+    Retry-After) if too many tokens were requested for the address or from the client.
+    """
+    try:
+        data = json.loads(request.body)
+        email_address = data["emailAddress"]
+        password = data["password"]
+    except (ValueError, TypeError, KeyError):
+        return HttpResponseBadRequest("Expected emailAddress and password.")
+
+    if not isinstance(email_address, str) or not isinstance(password, str):
+        return HttpResponseBadRequest("Expected emailAddress and password.")
+
+    email_address = normalize_email(email_address)
+    ip_address = request.META.get("REMOTE_ADDR", "")
+
+    if not token_ip_limiter.hit(ip_address):
+        return throttled(token_ip_limiter.seconds_until_allowed(ip_address))
+
+    if not token_email_limiter.hit(email_address):
+        return throttled(token_email_limiter.seconds_until_allowed(email_address))
+
+    user = get_user_by_email(email_address, "id", "password", "is_active")
+
+    if user is None:
+        # Hashes anyway, so the response time doesn't reveal whether the address exists.
+        hashing.make_password(password)
+        return JsonResponse({"error": "Invalid credentials."}, status=401)
+
+    if not user.check_password(password) or not user.is_active:
+        return JsonResponse({"error": "Invalid credentials."}, status=401)
+
+    # Failed attempts before the successful one don't count against the address.
+    token_email_limiter.reset(email_address)
+
+    return JsonResponse(
+        {
+            "token": tokens.create_token(user),
+            "expiresIn": tokens.get_setting("LIFETIME"),
+        }
+    )